@@ -1,9 +1,15 @@
 from django.contrib import admin
-from .models import WeatherData
+from .models import Location, WeatherData
+
+@admin.register(Location)
+class LocationAdmin(admin.ModelAdmin):
+    list_display = ('name', 'latitude', 'longitude', 'resolved_at')
+    search_fields = ('name', 'normalized_name')
+    ordering = ('name',)
 
 @admin.register(WeatherData)
 class WeatherDataAdmin(admin.ModelAdmin):
     list_display = ('city', 'date', 'temperature', 'timestamp')
     list_filter = ('city', 'date')
     search_fields = ('city',)
-    ordering = ('-date',)
+    ordering = ('-date',)
\ No newline at end of file
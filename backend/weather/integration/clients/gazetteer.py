@@ -0,0 +1,262 @@
+import bisect
+import json
+import logging
+import threading
+import time
+from array import array
+from weather.utils.constants import GAZETTEER_PATH
+from weather.utils.text_utils import normalize_city_name
+
+logger = logging.getLogger(__name__)
+
+# Columns of the GeoNames cities dumps (e.g. cities15000.txt)
+GEONAMES_NAME = 1
+GEONAMES_ASCII_NAME = 2
+GEONAMES_ALTERNATE_NAMES = 3
+GEONAMES_LATITUDE = 4
+GEONAMES_LONGITUDE = 5
+GEONAMES_POPULATION = 14
+
+INDEX_FORMAT_VERSION = 1
+
+class Gazetteer:
+    """
+    Offline city geocoder backed by a compact in-memory index.
+    
+    Normalized names and aliases are stored in one sorted string with an
+    offsets array and looked up by binary search; coordinates and populations
+    are kept in typed arrays. When a name matches several cities, the most
+    populous one wins.
+    """
+    
+    _default = None
+    _default_loaded = False
+    _default_lock = threading.Lock()
+    
+    def __init__(self, keys, key_offsets, key_rows, names, name_offsets, latitudes, longitudes, populations):
+        """
+        Args:
+            keys (str): Sorted normalized names, concatenated
+            key_offsets (array): Start of each key in keys, plus the end of the last key
+            key_rows (array): City row for each key
+            names (str): Display names of the cities, concatenated
+            name_offsets (array): Start of each display name, plus the end of the last name
+            latitudes (array): Latitude of each city
+            longitudes (array): Longitude of each city
+            populations (array): Population of each city
+        """
+        self._keys = keys
+        self._key_offsets = key_offsets
+        self._key_rows = key_rows
+        self._names = names
+        self._name_offsets = name_offsets
+        self._latitudes = latitudes
+        self._longitudes = longitudes
+        self._populations = populations
+    
+    def __len__(self):
+        return len(self._latitudes)
+    
+    def lookup(self, city):
+        """
+        Find a city by name or alias
+        
+        Args:
+            city (str): City name as typed by the user
+        
+        Returns:
+            dict: Name, latitude and longitude of the city, or None if unknown
+        """
+        key = normalize_city_name(city)
+        if not key:
+            return None
+        
+        index = bisect.bisect_left(_KeyView(self), key)
+        if index == len(self._key_rows) or self._key(index) != key:
+            return None
+        
+        row = self._key_rows[index]
+        return {
+            "name": self._names[self._name_offsets[row]:self._name_offsets[row + 1]],
+            "latitude": round(self._latitudes[row], 5),
+            "longitude": round(self._longitudes[row], 5),
+        }
+    
+    def _key(self, index):
+        return self._keys[self._key_offsets[index]:self._key_offsets[index + 1]]
+    
+    @classmethod
+    def from_geonames(cls, path):
+        """
+        Build the index from a GeoNames cities dump (tab separated)
+        
+        Args:
+            path (str): Path to the dump file
+        
+        Returns:
+            Gazetteer: The loaded gazetteer
+        """
+        names = []
+        latitudes = array("f")
+        longitudes = array("f")
+        populations = array("L")
+        best_rows = {}
+        
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                fields = line.rstrip("\n").split("\t")
+                if len(fields) <= GEONAMES_POPULATION:
+                    continue
+                
+                row = len(names)
+                population = int(fields[GEONAMES_POPULATION] or 0)
+                names.append(fields[GEONAMES_NAME])
+                latitudes.append(float(fields[GEONAMES_LATITUDE]))
+                longitudes.append(float(fields[GEONAMES_LONGITUDE]))
+                populations.append(population)
+                
+                aliases = [fields[GEONAMES_NAME], fields[GEONAMES_ASCII_NAME]]
+                if fields[GEONAMES_ALTERNATE_NAMES]:
+                    aliases.extend(fields[GEONAMES_ALTERNATE_NAMES].split(","))
+                
+                for alias in aliases:
+                    key = normalize_city_name(alias)
+                    if not key:
+                        continue
+                    current = best_rows.get(key)
+                    if current is None or populations[current] < population:
+                        best_rows[key] = row
+        
+        sorted_keys = sorted(best_rows)
+        return cls(
+            "".join(sorted_keys),
+            _offsets(sorted_keys),
+            array("L", (best_rows[key] for key in sorted_keys)),
+            "".join(names),
+            _offsets(names),
+            latitudes,
+            longitudes,
+            populations
+        )
+    
+    def save(self, path):
+        """
+        Write the index in a binary format that loads without parsing the dump again
+        
+        Args:
+            path (str): Destination file path
+        """
+        sections = [
+            self._keys.encode("utf-8"),
+            self._key_offsets.tobytes(),
+            self._key_rows.tobytes(),
+            self._names.encode("utf-8"),
+            self._name_offsets.tobytes(),
+            self._latitudes.tobytes(),
+            self._longitudes.tobytes(),
+            self._populations.tobytes(),
+        ]
+        header = {
+            "version": INDEX_FORMAT_VERSION,
+            "itemsize": array("L").itemsize,
+            "sections": [len(section) for section in sections],
+        }
+        with open(path, "wb") as f:
+            f.write(json.dumps(header).encode("utf-8") + b"\n")
+            for section in sections:
+                f.write(section)
+    
+    @classmethod
+    def load(cls, path):
+        """
+        Load an index written by save(), or build one from a GeoNames dump
+        
+        Args:
+            path (str): Path to a binary index or a GeoNames dump
+        
+        Returns:
+            Gazetteer: The loaded gazetteer
+        """
+        with open(path, "rb") as f:
+            header_line = f.readline()
+            try:
+                header = json.loads(header_line)
+            except ValueError:
+                header = None
+            if not isinstance(header, dict) or header.get("version") != INDEX_FORMAT_VERSION:
+                return cls.from_geonames(path)
+            if header["itemsize"] != array("L").itemsize:
+                raise ValueError(f"Gazetteer index {path} was built on an incompatible platform")
+            sections = [f.read(length) for length in header["sections"]]
+        
+        def typed(typecode, data):
+            values = array(typecode)
+            values.frombytes(data)
+            return values
+        
+        return cls(
+            sections[0].decode("utf-8"),
+            typed("L", sections[1]),
+            typed("L", sections[2]),
+            sections[3].decode("utf-8"),
+            typed("L", sections[4]),
+            typed("f", sections[5]),
+            typed("f", sections[6]),
+            typed("L", sections[7])
+        )
+    
+    @classmethod
+    def get_default(cls):
+        """
+        Get the gazetteer configured by GAZETTEER_PATH, loading it on first use
+        
+        Returns:
+            Gazetteer: The loaded gazetteer, or None if none is configured or it failed to load
+        """
+        if cls._default_loaded:
+            return cls._default
+        
+        with cls._default_lock:
+            if not cls._default_loaded:
+                if GAZETTEER_PATH:
+                    start = time.monotonic()
+                    try:
+                        cls._default = cls.load(GAZETTEER_PATH)
+                        logger.info(
+                            f"Loaded {len(cls._default)} cities from {GAZETTEER_PATH} "
+                            f"in {time.monotonic() - start:.2f}s"
+                        )
+                    except (OSError, ValueError) as e:
+                        logger.error(f"Could not load gazetteer from {GAZETTEER_PATH}: {str(e)}")
+                cls._default_loaded = True
+        
+        return cls._default
+
+class _KeyView:
+    """Sequence view over the sorted keys of a Gazetteer, for bisect"""
+    
+    def __init__(self, gazetteer):
+        self._gazetteer = gazetteer
+    
+    def __len__(self):
+        return len(self._gazetteer._key_rows)
+    
+    def __getitem__(self, index):
+        return self._gazetteer._key(index)
+
+def _offsets(strings):
+    """
+    Compute the start offset of each string once concatenated
+    
+    Args:
+        strings (list): Strings in concatenation order
+    
+    Returns:
+        array: Offsets, with the total length as the last element
+    """
+    offsets = array("L", [0])
+    total = 0
+    for string in strings:
+        total += len(string)
+        offsets.append(total)
+    return offsets
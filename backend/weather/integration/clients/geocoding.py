@@ -1,13 +1,27 @@
 import requests
-import time
 import logging
+from weather.integration.clients.gazetteer import Gazetteer
+from weather.integration.clients.http import HttpClient
 from weather.utils.cache_utils import CacheManager
-from weather.utils.constants import GEOCODING_API_BASE_URL, CACHE_TIMEOUT_MONTH, USER_AGENT, DEFAULT_LANGUAGE
+from weather.utils.rate_limiter import TokenBucketRateLimiter
+from weather.utils.constants import (
+    GEOCODING_API_BASE_URL,
+    CACHE_TIMEOUT_MONTH,
+    USER_AGENT,
+    DEFAULT_LANGUAGE,
+    NOMINATIM_RATE_LIMIT_PER_SECOND,
+    NOMINATIM_RATE_LIMIT_BURST,
+    NOMINATIM_RATE_LIMIT_TIMEOUT
+)
 
 logger = logging.getLogger(__name__)
 
-# Rate limiting constant
-NOMINATIM_RATE_LIMIT_SECONDS = 1
+# Shared by all workers to respect Nominatim's usage policy (max 1 request per second)
+nominatim_rate_limiter = TokenBucketRateLimiter(
+    "nominatim",
+    rate=NOMINATIM_RATE_LIMIT_PER_SECOND,
+    capacity=NOMINATIM_RATE_LIMIT_BURST
+)
 
 class GeocodingClient:
     """Client for converting city names to geographical coordinates using Nominatim API"""
@@ -41,13 +55,18 @@ class GeocodingClient:
             "Accept-Language": DEFAULT_LANGUAGE
         }
         
-        # Respect Nominatim's usage policy (max 1 request per second)
-        time.sleep(NOMINATIM_RATE_LIMIT_SECONDS)
+        # Respect Nominatim's usage policy for every request sent, retries included,
+        # waiting only if the shared budget is used up
+        def acquire_token():
+            waited = nominatim_rate_limiter.acquire(timeout=NOMINATIM_RATE_LIMIT_TIMEOUT)
+            if waited:
+                logger.info(f"Waited {waited:.2f}s for the Nominatim rate limit")
         
-        response = requests.get(
+        response = HttpClient.get(
             GEOCODING_API_BASE_URL, 
             params=params,
-            headers=headers
+            headers=headers,
+            before_attempt=acquire_token
         )
         response.raise_for_status()
         return response.json()
@@ -55,15 +74,24 @@ class GeocodingClient:
     @staticmethod
     def get_coordinates(city, _skip_cache=False):
         """
-        Convert a city name to geographical coordinates using Nominatim
+        Convert a city name to geographical coordinates, using the offline
+        gazetteer when it knows the city and Nominatim otherwise
         
         Args:
             city (str): City name to geocode
-            _skip_cache (bool, optional): If True, bypass the cache (used for contract testing)
+            _skip_cache (bool, optional): If True, bypass the cache (used for contract testing
+                and by callers that cache the result themselves)
             
         Returns:
             dict: Dictionary containing latitude and longitude
         """
+        # Known cities are resolved locally without a cache or API round trip
+        gazetteer = Gazetteer.get_default()
+        match = gazetteer.lookup(city) if gazetteer is not None else None
+        if match:
+            logger.debug(f"Geocoded city {city} from the gazetteer")
+            return {"latitude": match["latitude"], "longitude": match["longitude"]}
+        
         # Prepare cache key
         cache_key = f"geocode_{city.lower()}"
         
@@ -87,7 +115,8 @@ class GeocodingClient:
                 
                 return coordinates
                 
-            except requests.exceptions.RequestException as e:
+            # TimeoutError: the Nominatim rate limit had no token within NOMINATIM_RATE_LIMIT_TIMEOUT
+            except (requests.exceptions.RequestException, TimeoutError) as e:
                 logger.error(f"Error geocoding city '{city}': {str(e)}")
                 raise Exception(f"Error geocoding city: {str(e)}")
             except (KeyError, IndexError) as e:
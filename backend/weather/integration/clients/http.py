@@ -0,0 +1,246 @@
+import contextvars
+import logging
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from weather.utils.constants import (
+    HTTP_CONNECT_TIMEOUT,
+    HTTP_READ_TIMEOUT,
+    HTTP_POOL_MAXSIZE,
+    HTTP_MAX_RETRIES,
+    HTTP_BACKOFF_BASE,
+    HTTP_BACKOFF_MAX
+)
+
+logger = logging.getLogger(__name__)
+
+# Responses worth retrying: rate limited or a transient upstream failure
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Request counters of the enclosing HttpClient.count_requests() blocks
+_request_counters = contextvars.ContextVar("http_request_counters", default=())
+
+class HttpClient:
+    """
+    Shared HTTP client for the integration clients. Requests go through one
+    pooled keep-alive session per process, with connect/read timeouts and
+    retries with jittered exponential backoff for idempotent GETs.
+    """
+    
+    _session = None
+    _session_pid = None
+    _lock = threading.Lock()
+    _stats = {}
+    
+    @staticmethod
+    def get(url, params=None, headers=None, timeout=None, before_attempt=None):
+        """
+        Send a GET request, retrying connection errors, timeouts and transient
+        error responses
+        
+        Args:
+            url (str): Request URL
+            params (dict, optional): Query parameters
+            headers (dict, optional): Request headers
+            timeout (tuple, optional): (connect, read) timeouts in seconds
+            before_attempt (callable, optional): Called before the first attempt and
+                every retry, e.g. to take a rate limit token per request sent
+            
+        Returns:
+            requests.Response: The last response received
+            
+        Raises:
+            requests.exceptions.RequestException: If every attempt failed without a response
+        """
+        session = HttpClient._get_session()
+        timeout = timeout or (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+        parts = urlsplit(url)
+        host = parts.netloc
+        
+        attempt = 0
+        while True:
+            if before_attempt is not None:
+                before_attempt()
+            start = time.monotonic()
+            try:
+                response = session.get(url, params=params, headers=headers, timeout=timeout)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                HttpClient._record(host, parts.scheme, time.monotonic() - start, error=True)
+                if attempt >= HTTP_MAX_RETRIES:
+                    raise
+                logger.warning(f"Request to {host} failed ({str(e)}), retrying")
+                delay = HttpClient._backoff(attempt)
+            else:
+                HttpClient._record(
+                    host,
+                    parts.scheme,
+                    time.monotonic() - start,
+                    error=response.status_code >= 500
+                )
+                if response.status_code not in RETRY_STATUS_CODES or attempt >= HTTP_MAX_RETRIES:
+                    return response
+                logger.warning(f"Request to {host} returned {response.status_code}, retrying")
+                delay = HttpClient._backoff(attempt, response.headers.get("Retry-After"))
+            
+            attempt += 1
+            HttpClient._record_retry(host)
+            time.sleep(delay)
+    
+    @staticmethod
+    def get_stats():
+        """
+        Get request statistics of this process for each upstream host
+        
+        Returns:
+            dict: Requests, errors, retries, latency, new connections (handshakes)
+                and connection reuse rate keyed by host
+        """
+        session = HttpClient._get_session()
+        stats = {}
+        with HttpClient._lock:
+            hosts = {host: dict(host_stats) for host, host_stats in HttpClient._stats.items()}
+        
+        for host, host_stats in hosts.items():
+            # urllib3 counts the connections opened and requests sent by each pool
+            scheme = host_stats.pop("scheme")
+            connections, pool_requests = HttpClient._pool_counters(session, scheme, host)
+            stats[host] = dict(
+                host_stats,
+                latency_avg=host_stats["latency_total"] / host_stats["requests"] if host_stats["requests"] else 0.0,
+                handshakes=connections,
+                reuse_rate=1 - connections / pool_requests if pool_requests else 0.0,
+            )
+        return stats
+    
+    @staticmethod
+    def get_request_count():
+        """
+        Get the number of upstream requests made by this process, retries included
+        
+        Returns:
+            int: Total requests over every host
+        """
+        with HttpClient._lock:
+            return sum(host_stats["requests"] for host_stats in HttpClient._stats.values())
+    
+    @staticmethod
+    @contextmanager
+    def count_requests():
+        """
+        Count the upstream requests sent in this context, retries included,
+        unlike get_request_count() which counts those of every thread
+        
+        Yields:
+            dict: Counter whose "requests" key is updated as requests are sent
+        """
+        counter = {"requests": 0}
+        token = _request_counters.set(_request_counters.get() + (counter,))
+        try:
+            yield counter
+        finally:
+            _request_counters.reset(token)
+    
+    @staticmethod
+    def _pool_counters(session, scheme, host):
+        """
+        Count the connections opened and requests sent by the pools of a host
+        
+        Args:
+            session (requests.Session): Pooled session
+            scheme (str): URL scheme
+            host (str): Host name, with the port if not the default one
+            
+        Returns:
+            tuple: (connections, requests)
+        """
+        url = urlsplit(f"{scheme}://{host}")
+        port = url.port or (443 if scheme == "https" else 80)
+        pools = session.get_adapter(f"{scheme}://{host}").poolmanager.pools
+        
+        connections = pool_requests = 0
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is not None and (key.key_scheme, key.key_host, key.key_port) == (scheme, url.hostname, port):
+                connections += pool.num_connections
+                pool_requests += pool.num_requests
+        return connections, pool_requests
+    
+    @staticmethod
+    def _get_session():
+        """
+        Get the session of this process, creating it after a fork
+        
+        Returns:
+            requests.Session: Pooled session
+        """
+        if HttpClient._session is not None and HttpClient._session_pid == os.getpid():
+            return HttpClient._session
+        
+        with HttpClient._lock:
+            if HttpClient._session is None or HttpClient._session_pid != os.getpid():
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_maxsize=HTTP_POOL_MAXSIZE, max_retries=0)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                HttpClient._session = session
+                HttpClient._session_pid = os.getpid()
+                HttpClient._stats = {}
+            return HttpClient._session
+    
+    @staticmethod
+    def _backoff(attempt, retry_after=None):
+        """
+        Compute the delay before the next attempt
+        
+        Args:
+            attempt (int): Number of attempts already retried
+            retry_after (str, optional): Retry-After header of the last response
+            
+        Returns:
+            float: Delay in seconds
+        """
+        if retry_after:
+            if retry_after.isdigit():
+                return min(float(retry_after), HTTP_BACKOFF_MAX)
+            # Retry-After may also be an HTTP date
+            try:
+                retry_at = parsedate_to_datetime(retry_after)
+            except (TypeError, ValueError):
+                retry_at = None
+            if retry_at is not None:
+                if retry_at.tzinfo is None:
+                    retry_at = retry_at.replace(tzinfo=timezone.utc)
+                delay = (retry_at - datetime.now(timezone.utc)).total_seconds()
+                return min(max(0.0, delay), HTTP_BACKOFF_MAX)
+        # Full jitter spreads out retries from workers that failed together
+        return random.uniform(0, min(HTTP_BACKOFF_MAX, HTTP_BACKOFF_BASE * 2 ** attempt))
+    
+    @staticmethod
+    def _record(host, scheme, latency, error=False):
+        for counter in _request_counters.get():
+            counter["requests"] += 1
+        with HttpClient._lock:
+            host_stats = HttpClient._stats.setdefault(host, {
+                "scheme": scheme,
+                "requests": 0,
+                "errors": 0,
+                "retries": 0,
+                "latency_total": 0.0,
+                "latency_max": 0.0,
+            })
+            host_stats["requests"] += 1
+            host_stats["errors"] += int(error)
+            host_stats["latency_total"] += latency
+            host_stats["latency_max"] = max(host_stats["latency_max"], latency)
+    
+    @staticmethod
+    def _record_retry(host):
+        with HttpClient._lock:
+            HttpClient._stats[host]["retries"] += 1
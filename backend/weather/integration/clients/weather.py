@@ -1,7 +1,16 @@
 import requests
 import logging
+from weather.integration.clients.http import HttpClient
+from weather.utils.batching import RequestBatcher
 from weather.utils.cache_utils import CacheManager
-from weather.utils.constants import WEATHER_API_BASE_URL, CACHE_TIMEOUT_HOUR
+from weather.utils.constants import (
+    WEATHER_API_BASE_URL,
+    CACHE_TIMEOUT_HOUR,
+    WEATHER_GRID_RESOLUTION,
+    WEATHER_BATCH_MAX_LOCATIONS,
+    WEATHER_BATCH_WAIT
+)
+from weather.utils.geo_utils import snap_coordinate
 
 logger = logging.getLogger(__name__)
 
@@ -9,7 +18,7 @@ class WeatherClient:
     """Client for fetching weather data from Open-Meteo API"""
     
     @staticmethod
-    def get_historical_weather(latitude, longitude, start_date, end_date, _skip_cache=False):
+    def get_historical_weather(latitude, longitude, start_date, end_date, _skip_cache=False, batch=False):
         """
         Fetch historical weather data for specific coordinates and date range
         
@@ -18,36 +27,27 @@ class WeatherClient:
             longitude (float): Longitude of the location
             start_date (str): Start date in YYYY-MM-DD format
             end_date (str): End date in YYYY-MM-DD format
-            _skip_cache (bool, optional): If True, bypass the cache (used for contract testing)
+            _skip_cache (bool, optional): If True, bypass the cache (contract tests, bulk backfills)
+            batch (bool, optional): If True, merge the call with concurrent requests for the same
+                dates; only for callers that make many requests at once, a lone request would
+                just wait WEATHER_BATCH_WAIT
             
         Returns:
             dict: Weather API response data
         """
+        # Snap to the model grid so nearby lookups share the request and cache entry
+        latitude = snap_coordinate(latitude, WEATHER_GRID_RESOLUTION)
+        longitude = snap_coordinate(longitude, WEATHER_GRID_RESOLUTION)
+        
         # Prepare cache key
         cache_key = f"weather_{latitude}_{longitude}_{start_date}_{end_date}"
         
-        # Define the function to get fresh data
+        # Define the function to get fresh data, merged with concurrent requests for the same dates
+        # when the caller makes many at once
         def fetch_weather_data():
-            logger.info(f"Fetching weather data for coordinates ({latitude}, {longitude})")
-            
-            # Prepare API request parameters
-            params = {
-                "latitude": latitude,
-                "longitude": longitude,
-                "start_date": start_date,
-                "end_date": end_date,
-                "daily": "temperature_2m_max",
-                "timezone": "auto"
-            }
-            
-            try:
-                response = requests.get(WEATHER_API_BASE_URL, params=params)
-                response.raise_for_status()
-                return response.json()
-                
-            except requests.exceptions.RequestException as e:
-                logger.error(f"Error fetching weather data: {str(e)}")
-                raise Exception(f"Error fetching weather data: {str(e)}")
+            if batch:
+                return _weather_batcher.submit((start_date, end_date), (latitude, longitude))
+            return WeatherClient._fetch_many((start_date, end_date), [(latitude, longitude)])[0]
         
         # Skip cache if requested (for contract testing)
         if _skip_cache:
@@ -55,3 +55,55 @@ class WeatherClient:
             
         # Use the cache manager to get or set the data
         return CacheManager.get_or_set(cache_key, fetch_weather_data, timeout=CACHE_TIMEOUT_HOUR)
+    
+    @staticmethod
+    def _fetch_many(date_range, points):
+        """
+        Fetch historical weather data for several points with one API call
+        
+        Args:
+            date_range (tuple): Start and end date in YYYY-MM-DD format
+            points (list): (latitude, longitude) tuples, possibly repeated
+            
+        Returns:
+            list: Weather API response data of each point, in order
+        """
+        start_date, end_date = date_range
+        unique_points = list(dict.fromkeys(points))
+        logger.info(f"Fetching weather data for {len(unique_points)} coordinates from {start_date} to {end_date}")
+        
+        # Open-Meteo takes comma-separated coordinates and answers with a list, in order
+        params = {
+            "latitude": ",".join(str(latitude) for latitude, _ in unique_points),
+            "longitude": ",".join(str(longitude) for _, longitude in unique_points),
+            "start_date": start_date,
+            "end_date": end_date,
+            "daily": "temperature_2m_max",
+            "timezone": "auto"
+        }
+        if len(unique_points) == 1:
+            params["latitude"], params["longitude"] = unique_points[0]
+        
+        try:
+            response = HttpClient.get(WEATHER_API_BASE_URL, params=params)
+            response.raise_for_status()
+            data = response.json()
+            
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Error fetching weather data: {str(e)}")
+            raise Exception(f"Error fetching weather data: {str(e)}")
+        
+        if len(unique_points) == 1:
+            data = [data]
+        if not isinstance(data, list) or len(data) != len(unique_points):
+            raise Exception("Error fetching weather data: unexpected response for multiple locations")
+        
+        by_point = dict(zip(unique_points, data))
+        return [by_point[point] for point in points]
+
+# Merges concurrent cache misses for the same date range into multi-location calls
+_weather_batcher = RequestBatcher(
+    lambda date_range, points: WeatherClient._fetch_many(date_range, points),
+    WEATHER_BATCH_MAX_LOCATIONS,
+    WEATHER_BATCH_WAIT
+)
@@ -0,0 +1,208 @@
+import logging
+import time
+from datetime import timedelta
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from weather.integration.clients.http import HttpClient
+from weather.integration.clients.weather import WeatherClient
+from weather.integration.services.geocoding import GeocodingService
+from weather.integration.services.weather import WeatherService
+from weather.models import BackfillCheckpoint
+from weather.utils.constants import BACKFILL_CHUNK_DAYS, BACKFILL_MAX_WORKERS
+from weather.utils.date_utils import get_missing_date_ranges, split_date_range
+from weather.utils.rate_limiter import PRIORITY_BACKGROUND, TokenBucketRateLimiter
+
+logger = logging.getLogger(__name__)
+
+class WeatherBackfillService:
+    """
+    Service loading the weather history of many cities over long date ranges.
+    Ranges are fetched in chunks by a bounded pool of workers and written by
+    the calling thread; every written chunk is checkpointed, so an interrupted
+    backfill resumes where it stopped.
+    """
+    
+    @staticmethod
+    def plan(location, start_date, end_date, chunk_days=BACKFILL_CHUNK_DAYS):
+        """
+        Get the chunks of a date range that are not checkpointed for a location yet
+        
+        Args:
+            location (Location): Location to backfill
+            start_date (date): First date of the range
+            end_date (date): Last date of the range
+            chunk_days (int): Maximum number of days per upstream call
+        
+        Returns:
+            list: (start_date, end_date) tuples, in order
+        """
+        loaded = set()
+        for chunk_start, chunk_end in BackfillCheckpoint.objects.filter(
+            location=location,
+            start_date__lte=end_date,
+            end_date__gte=start_date
+        ).values_list('start_date', 'end_date'):
+            loaded.update(chunk_start + timedelta(days=i) for i in range((chunk_end - chunk_start).days + 1))
+        
+        chunks = []
+        for range_start, range_end in get_missing_date_ranges(start_date, end_date, loaded):
+            chunks.extend(split_date_range(range_start, range_end, chunk_days))
+        return chunks
+    
+    @staticmethod
+    def run(cities, start_date, end_date, chunk_days=BACKFILL_CHUNK_DAYS, max_workers=BACKFILL_MAX_WORKERS,
+            progress=None):
+        """
+        Backfill the weather data of cities over a date range
+        
+        Args:
+            cities (list): City names
+            start_date (date): First date of the range
+            end_date (date): Last date of the range
+            chunk_days (int): Maximum number of days per upstream call
+            max_workers (int): Maximum number of concurrent upstream calls
+            progress (callable, optional): Called with the statistics after every written chunk
+        
+        Returns:
+            dict: Number of cities, chunks planned and written, rows written, upstream
+                calls made, elapsed seconds, and the error message of each failed city
+                or chunk
+        """
+        stats = {
+            "cities": 0,
+            "chunks": 0,
+            "chunks_done": 0,
+            "rows": 0,
+            "calls": 0,
+            "elapsed": 0.0,
+            "errors": {},
+        }
+        start = time.monotonic()
+        calls_before = HttpClient.get_request_count()
+        
+        def update_stats():
+            stats["calls"] = HttpClient.get_request_count() - calls_before
+            stats["elapsed"] = time.monotonic() - start
+        
+        # Geocode first, one city at a time; new cities go through the geocoding rate
+        # limiter at background priority so user requests are served first
+        work = []
+        locations = set()
+        with TokenBucketRateLimiter.priority(PRIORITY_BACKGROUND):
+            for city in dict.fromkeys(cities):
+                try:
+                    location = GeocodingService.get_location(city)
+                except Exception as e:
+                    logger.error(f"Backfill could not geocode {city}: {str(e)}")
+                    stats["errors"][city] = str(e)
+                    continue
+                # Spellings of the same city are loaded once
+                if location.pk in locations:
+                    continue
+                locations.add(location.pk)
+                stats["cities"] += 1
+                for chunk in WeatherBackfillService.plan(location, start_date, end_date, chunk_days):
+                    work.append((location, chunk))
+        stats["chunks"] = len(work)
+        logger.info(f"Backfilling {len(work)} chunks for {stats['cities']} cities")
+        
+        # Keep a bounded number of chunks in flight, so fetched data does not pile up
+        # faster than it is written
+        pending = iter(work)
+        in_flight = {}
+        with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="backfill") as executor:
+            def submit_next():
+                item = next(pending, None)
+                if item is not None:
+                    location, (chunk_start, chunk_end) = item
+                    future = executor.submit(WeatherBackfillService._fetch_chunk, location, chunk_start, chunk_end)
+                    in_flight[future] = item
+            
+            for _ in range(max(1, max_workers) * 2):
+                submit_next()
+            
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    location, (chunk_start, chunk_end) = in_flight.pop(future)
+                    submit_next()
+                    try:
+                        rows = WeatherBackfillService._write_chunk(location, chunk_start, chunk_end, future.result())
+                    except Exception as e:
+                        logger.error(f"Backfill of {location} from {chunk_start} to {chunk_end} failed: {str(e)}")
+                        stats["errors"][f"{location} {chunk_start}..{chunk_end}"] = str(e)
+                        continue
+                    
+                    stats["chunks_done"] += 1
+                    stats["rows"] += rows
+                    update_stats()
+                    if progress is not None:
+                        progress(stats)
+        
+        update_stats()
+        logger.info(
+            f"Backfilled {stats['rows']} rows in {stats['chunks_done']} of {stats['chunks']} chunks "
+            f"with {stats['calls']} upstream calls in {stats['elapsed']:.2f}s"
+        )
+        return stats
+    
+    @staticmethod
+    def _fetch_chunk(location, start_date, end_date):
+        """
+        Fetch the weather data of a location for one chunk. Runs in a worker
+        thread and does not touch the database.
+        
+        Args:
+            location (Location): Resolved location
+            start_date (date): First date of the chunk
+            end_date (date): Last date of the chunk
+        
+        Returns:
+            list: Processed list of temperature data
+        """
+        # The responses are written to the database once, caching them would only evict hot entries
+        data = WeatherClient.get_historical_weather(
+            location.latitude,
+            location.longitude,
+            start_date.strftime("%Y-%m-%d"),
+            end_date.strftime("%Y-%m-%d"),
+            _skip_cache=True,
+            batch=True
+        )
+        return WeatherService._process_weather_data(data)
+    
+    @staticmethod
+    def _write_chunk(location, start_date, end_date, temperature_data):
+        """
+        Upsert the weather data of a chunk and checkpoint its days up to the
+        first one without an upstream value
+        
+        Args:
+            location (Location): Resolved location
+            start_date (date): First date of the chunk
+            end_date (date): Last date of the chunk
+            temperature_data (list): Processed list of temperature data
+        
+        Returns:
+            int: Number of rows written
+        """
+        # Days without an upstream value yet are left out, requests fetch them once available
+        records = [
+            {"city": location.name, "date": item["date"], "temperature": item["temperature"]}
+            for item in temperature_data
+            if item["temperature"] is not None
+        ]
+        WeatherService.bulk_upsert_weather_data(records)
+        
+        # Days from the first one without a value are left uncheckpointed, so reruns retry them
+        stored_dates = {item["date"] for item in records}
+        loaded_end = start_date - timedelta(days=1)
+        while loaded_end < end_date and (loaded_end + timedelta(days=1)).isoformat() in stored_dates:
+            loaded_end += timedelta(days=1)
+        if loaded_end >= start_date:
+            BackfillCheckpoint.objects.update_or_create(
+                location=location,
+                start_date=start_date,
+                end_date=loaded_end,
+                defaults={"rows": (loaded_end - start_date).days + 1}
+            )
+        return len(records)
@@ -0,0 +1,244 @@
+import logging
+import os
+import threading
+import time
+from django.core.cache import cache
+from django.db import connections
+from weather.integration.clients.http import HttpClient
+from weather.integration.services.weather import WeatherService
+from weather.models import Location
+from weather.utils.cache_utils import CacheManager
+from weather.utils.constants import (
+    CACHE_TIMEOUT_HOUR,
+    CACHE_WARM_TRACKING,
+    CACHE_WARM_WINDOW_DAYS,
+    CACHE_WARM_TOP_N,
+    CACHE_WARM_AHEAD_SECONDS,
+    CACHE_WARM_MAX_UPSTREAM_CALLS,
+    CACHE_WARM_INTERVAL
+)
+from weather.utils.popularity import PopularityTracker
+from weather.utils.rate_limiter import PRIORITY_BACKGROUND, TokenBucketRateLimiter
+from weather.utils.text_utils import normalize_city_name
+
+logger = logging.getLogger(__name__)
+
+# Kinds of cached weather responses that can be warmed
+KIND_AVERAGE = "average"
+KIND_HISTORY = "history"
+
+# Requests counted per kind, days and normalized city, e.g. "average:7:london"
+request_popularity = PopularityTracker("weather_requests", CACHE_WARM_WINDOW_DAYS)
+
+_scheduler_lock = threading.Lock()
+_scheduler_pid = None
+
+class CacheWarmingService:
+    """
+    Service refreshing the most requested weather cache entries before they
+    expire, so popular requests keep hitting the cache
+    """
+    
+    LOCK_KEY = "lock_cache_warming"
+    
+    @staticmethod
+    def record_request(kind, city, days):
+        """
+        Count a request for the popularity ranking. Tracking errors are logged
+        and never fail the request.
+        
+        Args:
+            kind (str): KIND_AVERAGE or KIND_HISTORY
+            city (str): City name
+            days (int): Number of days
+        """
+        if not CACHE_WARM_TRACKING:
+            return
+        
+        try:
+            request_popularity.record(f"{kind}:{days}:{normalize_city_name(city)}")
+        except Exception as e:
+            logger.warning(f"Could not record request popularity: {str(e)}")
+        
+        if CACHE_WARM_INTERVAL > 0:
+            CacheWarmingService._ensure_scheduler(CACHE_WARM_INTERVAL)
+    
+    @staticmethod
+    def get_popular(limit=CACHE_WARM_TOP_N):
+        """
+        Get the most requested cache keys of the tracking window
+        
+        Args:
+            limit (int): Maximum number of keys
+        
+        Returns:
+            list: Dictionaries with the kind, normalized city, days, request
+                count and cache key of each popular request, most requested first
+        """
+        popular = []
+        for member, requests in request_popularity.top(limit):
+            kind, days, city = member.split(":", 2)
+            days = int(days)
+            popular.append({
+                "kind": kind,
+                "city": city,
+                "days": days,
+                "requests": requests,
+                "cache_key": CacheWarmingService._cache_key(kind, city, days),
+            })
+        return popular
+    
+    @staticmethod
+    def warm(limit=CACHE_WARM_TOP_N, max_upstream_calls=CACHE_WARM_MAX_UPSTREAM_CALLS,
+             ahead_seconds=CACHE_WARM_AHEAD_SECONDS):
+        """
+        Refresh the most requested cache keys that are missing or expire within
+        ahead_seconds. Upstream calls are made at background priority, so the
+        shared rate limits serve interactive requests first, and no new key is
+        started once the budget of upstream calls is used. Only the calls made
+        by the warming itself count, not those of concurrent requests.
+        
+        Args:
+            limit (int): Number of most requested keys considered
+            max_upstream_calls (int): Budget of upstream HTTP calls for this run
+            ahead_seconds (int): Refresh keys expiring within this many seconds
+        
+        Returns:
+            dict: Number of keys considered, already fresh, warmed, failed and
+                skipped for the budget, upstream calls made, and the share of the
+                tracked requests whose cache entry is predicted to stay fresh until
+                the next run, before and after warming. The share is a proxy of the
+                hit ratio, the actual hits are not measured.
+        """
+        popular = CacheWarmingService.get_popular(limit)
+        report = {
+            "keys": len(popular),
+            "fresh": 0,
+            "warmed": 0,
+            "failed": 0,
+            "skipped": 0,
+            "upstream_calls": 0,
+            "fresh_share_before": CacheWarmingService._fresh_share(popular, ahead_seconds),
+            "fresh_share_after": None,
+        }
+        
+        with TokenBucketRateLimiter.priority(PRIORITY_BACKGROUND), HttpClient.count_requests() as upstream:
+            for item in popular:
+                remaining = CacheManager.time_to_refresh(item["cache_key"])
+                if remaining is not None and remaining > ahead_seconds:
+                    report["fresh"] += 1
+                    continue
+                
+                if upstream["requests"] >= max_upstream_calls:
+                    report["skipped"] += 1
+                    continue
+                
+                try:
+                    CacheWarmingService._warm_key(item["kind"], item["city"], item["days"])
+                    report["warmed"] += 1
+                except Exception as e:
+                    logger.warning(f"Could not warm {item['cache_key']}: {str(e)}")
+                    report["failed"] += 1
+        
+        report["upstream_calls"] = upstream["requests"]
+        report["fresh_share_after"] = CacheWarmingService._fresh_share(popular, ahead_seconds)
+        logger.info(
+            f"Warmed {report['warmed']} of {report['keys']} popular cache keys with "
+            f"{report['upstream_calls']} upstream calls, predicted fresh share "
+            f"{report['fresh_share_before']:.1%} -> {report['fresh_share_after']:.1%}"
+        )
+        return report
+    
+    @staticmethod
+    def _cache_key(kind, city, days):
+        if kind == KIND_AVERAGE:
+            return WeatherService._average_temperature_cache_key(city, days)
+        return WeatherService._historical_weather_cache_key(city, days)
+    
+    @staticmethod
+    def _warm_key(kind, city, days):
+        """
+        Recompute a cache entry, bypassing the cached value
+        
+        Args:
+            kind (str): KIND_AVERAGE or KIND_HISTORY
+            city (str): Normalized city name
+            days (int): Number of days
+        """
+        # Load with the display name, so warming does not add the normalized name as an alias
+        name = Location.objects.filter(normalized_name=city).values_list('name', flat=True).first() or city
+        if kind == KIND_AVERAGE:
+            value = WeatherService._load_average_temperature(name, days)
+        else:
+            value = WeatherService._load_historical_weather(name, days)
+        CacheManager.set(CacheWarmingService._cache_key(kind, city, days), value, timeout=CACHE_TIMEOUT_HOUR)
+    
+    @staticmethod
+    def _fresh_share(popular, ahead_seconds):
+        """
+        Get the share of the tracked requests whose cache entry stays fresh for
+        at least ahead_seconds. It predicts how fresh the cache stays until the
+        next run, a proxy of the hit ratio rather than a measured one.
+        
+        Args:
+            popular (list): Popular keys from get_popular()
+            ahead_seconds (int): Minimum remaining freshness in seconds
+        
+        Returns:
+            float: Request-weighted share between 0 and 1
+        """
+        total = sum(item["requests"] for item in popular)
+        if not total:
+            return 0.0
+        
+        fresh = 0
+        for item in popular:
+            remaining = CacheManager.time_to_refresh(item["cache_key"])
+            if remaining is not None and remaining > ahead_seconds:
+                fresh += item["requests"]
+        return fresh / total
+    
+    @staticmethod
+    def _ensure_scheduler(interval):
+        """
+        Start the warming thread once per process. The process id is checked so
+        that forked workers start their own thread.
+        
+        Args:
+            interval (int): Seconds between runs
+        """
+        global _scheduler_pid
+        if _scheduler_pid == os.getpid():
+            return
+        
+        with _scheduler_lock:
+            if _scheduler_pid == os.getpid():
+                return
+            _scheduler_pid = os.getpid()
+            threading.Thread(
+                target=CacheWarmingService._run_scheduler,
+                args=(interval,),
+                name="cache-warming",
+                daemon=True
+            ).start()
+    
+    @staticmethod
+    def _run_scheduler(interval):
+        """
+        Warm the cache every interval until the process exits. Each worker runs
+        a scheduler, the shared lock lets only one of them warm per interval.
+        
+        Args:
+            interval (int): Seconds between runs
+        """
+        while True:
+            time.sleep(interval)
+            # The lock is never released, it expires with the interval
+            if not cache.add(CacheWarmingService.LOCK_KEY, os.getpid(), interval):
+                continue
+            try:
+                CacheWarmingService.warm(ahead_seconds=max(CACHE_WARM_AHEAD_SECONDS, interval))
+            except Exception as e:
+                logger.error(f"Cache warming failed: {str(e)}")
+            finally:
+                connections.close_all()
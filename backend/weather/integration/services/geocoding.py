@@ -1,5 +1,10 @@
 import logging
+from django.utils import timezone
 from weather.integration.clients.geocoding import GeocodingClient
+from weather.models import Location
+from weather.utils.cache_utils import CacheManager
+from weather.utils.constants import CACHE_TIMEOUT_MONTH
+from weather.utils.text_utils import normalize_city_name
 
 logger = logging.getLogger(__name__)
 
@@ -13,10 +18,62 @@ class GeocodingService:
         
         Args:
             city (str): City name to geocode
-            
+        
         Returns:
             dict: Dictionary containing latitude and longitude
         """
-        # Delegate directly to the client - let the client handle specific errors
-        # as it already has appropriate error handling
-        return GeocodingClient.get_coordinates(city)
+        resolved = GeocodingService._get_resolved_location(city)
+        return {"latitude": resolved["latitude"], "longitude": resolved["longitude"]}
+    
+    @staticmethod
+    def get_location(city):
+        """
+        Get the resolved location of a city, see _get_resolved_location
+        
+        Args:
+            city (str): City name to geocode
+        
+        Returns:
+            Location: Location with latitude and longitude set
+        """
+        return Location.objects.get(pk=GeocodingService._get_resolved_location(city)["id"])
+    
+    @staticmethod
+    def _get_resolved_location(city):
+        """
+        Get the id and coordinates of the resolved location of a city. They are
+        read from the cache, then from the database, and only geocoded by the
+        client when neither knows the coordinates, so one geocode per place
+        survives a cache flush. Plain values are cached rather than the model
+        instance, so cached entries outlive changes of the Location schema.
+        
+        Args:
+            city (str): City name to geocode
+        
+        Returns:
+            dict: id, latitude and longitude of the location
+        """
+        normalized_name = normalize_city_name(city)
+        if not normalized_name:
+            raise ValueError(f"Could not find coordinates for city: {city}")
+        cache_key = f"location_{normalized_name}"
+        
+        def resolve_location():
+            known = Location.objects.filter(normalized_name=normalized_name).first()
+            if known is not None and known.is_resolved:
+                logger.debug(f"Geocoded city {city} from the location table")
+                location = Location.objects.for_city(city)
+                return {"id": location.pk, "latitude": location.latitude, "longitude": location.longitude}
+            
+            # Geocode before writing anything, so names that cannot be geocoded leave no rows.
+            # Let the client raise its own errors, it already handles them appropriately.
+            # The resolved location is cached below, so the client does not cache it again.
+            coords = GeocodingClient.get_coordinates(city, _skip_cache=True)
+            location = Location.objects.for_city(city)
+            location.latitude = coords["latitude"]
+            location.longitude = coords["longitude"]
+            location.resolved_at = timezone.now()
+            location.save(update_fields=['latitude', 'longitude', 'resolved_at'])
+            return {"id": location.pk, "latitude": location.latitude, "longitude": location.longitude}
+        
+        return CacheManager.get_or_set(cache_key, resolve_location, timeout=CACHE_TIMEOUT_MONTH)
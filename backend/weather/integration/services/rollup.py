@@ -0,0 +1,157 @@
+import logging
+from django.db import transaction
+from weather.models import Location, WeatherData, WeatherRollup
+from weather.utils.constants import WEATHER_UPSERT_BATCH_SIZE
+from weather.utils.text_utils import normalize_city_name
+
+logger = logging.getLogger(__name__)
+
+# Largest relative difference between a stored and a recomputed running sum
+# that is still considered consistent, running sums accumulate rounding errors
+ROLLUP_SUM_TOLERANCE = 1e-9
+
+class WeatherRollupService:
+    """
+    Service maintaining per-location running sums of the stored temperatures,
+    so the total and number of stored days of any window take two lookups
+    """
+    
+    @staticmethod
+    def get_window_totals(city, start_date, end_date):
+        """
+        Get the sum of the stored temperatures of a city, the number of stored
+        days between two dates and when the data up to the last one was written
+        
+        Args:
+            city (str): City name
+            start_date (date): First date of the window
+            end_date (date): Last date of the window
+        
+        Returns:
+            tuple: (temperature_sum, day_count, last_modified), (0.0, 0, None) when nothing is stored
+        """
+        rollups = WeatherRollup.objects.filter(location__normalized_name=normalize_city_name(city))
+        
+        # Running totals at the end of the window and just before its start
+        end_totals = rollups.filter(date__lte=end_date).order_by('-date').values_list(
+            'temperature_sum', 'day_count', 'last_modified'
+        ).first()
+        if end_totals is None:
+            return 0.0, 0, None
+        start_totals = rollups.filter(date__lt=start_date).order_by('-date').values_list(
+            'temperature_sum', 'day_count'
+        ).first() or (0.0, 0)
+        
+        return end_totals[0] - start_totals[0], end_totals[1] - start_totals[1], end_totals[2]
+    
+    @staticmethod
+    def update(location, from_date=None):
+        """
+        Recompute the running totals of a location from a date onwards, after
+        its weather data changed on or after that date
+        
+        Args:
+            location (Location): Location whose weather data changed
+            from_date (date, optional): First changed date, None to rebuild everything
+        
+        Returns:
+            int: Number of running totals written
+        """
+        with transaction.atomic():
+            # Serialize writers of the same location so their updates do not interleave
+            Location.objects.select_for_update().filter(pk=location.pk).exists()
+            
+            rollups = WeatherRollup.objects.filter(location=location)
+            weather_data = WeatherData.objects.filter(location=location)
+            temperature_sum, day_count, last_modified = 0.0, 0, None
+            if from_date is not None:
+                previous = rollups.filter(date__lt=from_date).order_by('-date').values_list(
+                    'temperature_sum', 'day_count', 'last_modified'
+                ).first()
+                if previous is not None:
+                    temperature_sum, day_count, last_modified = previous
+                rollups = rollups.filter(date__gte=from_date)
+                weather_data = weather_data.filter(date__gte=from_date)
+            
+            to_write = []
+            for date_obj, temperature, timestamp in weather_data.order_by('date').values_list(
+                'date', 'temperature', 'timestamp'
+            ):
+                temperature_sum += temperature
+                day_count += 1
+                # A write to any earlier date changes the totals too
+                if last_modified is None or timestamp > last_modified:
+                    last_modified = timestamp
+                to_write.append(WeatherRollup(
+                    location=location,
+                    date=date_obj,
+                    temperature_sum=temperature_sum,
+                    day_count=day_count,
+                    last_modified=last_modified
+                ))
+            
+            rollups.delete()
+            WeatherRollup.objects.bulk_create(to_write, batch_size=WEATHER_UPSERT_BATCH_SIZE)
+        
+        return len(to_write)
+    
+    @staticmethod
+    def rebuild(locations=None):
+        """
+        Rebuild the running totals from the stored weather data
+        
+        Args:
+            locations (iterable, optional): Locations to rebuild, all by default
+        
+        Returns:
+            int: Number of running totals written
+        """
+        if locations is None:
+            locations = Location.objects.all()
+        
+        written = 0
+        for location in locations:
+            written += WeatherRollupService.update(location)
+        
+        logger.info(f"Rebuilt {written} weather rollup rows")
+        return written
+    
+    @staticmethod
+    def check(location):
+        """
+        Compare the running totals of a location with its stored weather data
+        
+        Args:
+            location (Location): Location to check
+        
+        Returns:
+            list: Description of every inconsistency, empty when consistent
+        """
+        stored = {
+            date_obj: (temperature_sum, day_count)
+            for date_obj, temperature_sum, day_count in WeatherRollup.objects.filter(
+                location=location
+            ).values_list('date', 'temperature_sum', 'day_count')
+        }
+        
+        problems = []
+        temperature_sum, day_count = 0.0, 0
+        for date_obj, temperature in WeatherData.objects.filter(
+            location=location
+        ).order_by('date').values_list('date', 'temperature'):
+            temperature_sum += temperature
+            day_count += 1
+            totals = stored.pop(date_obj, None)
+            if totals is None:
+                problems.append(f"{location}: no running total for {date_obj}")
+            elif (abs(totals[0] - temperature_sum) > ROLLUP_SUM_TOLERANCE * max(1.0, abs(temperature_sum))
+                  or totals[1] != day_count):
+                problems.append(
+                    f"{location}: running total for {date_obj} is {totals[0]:.4f} over {totals[1]} days, "
+                    f"expected {temperature_sum:.4f} over {day_count} days"
+                )
+        
+        for date_obj in sorted(stored):
+            problems.append(f"{location}: running total for {date_obj} has no weather data")
+        
+        return problems
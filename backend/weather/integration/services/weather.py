@@ -1,11 +1,27 @@
 import logging
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from itertools import islice
+from django.db import connections, transaction
+from django.db.models import Avg, Count, Max, Sum
+from django.utils import timezone
 from weather.integration.services.geocoding import GeocodingService
+from weather.integration.services.rollup import WeatherRollupService
 from weather.integration.clients.weather import WeatherClient
-from weather.utils.date_utils import get_date_range
+from weather.utils.date_utils import get_date_range, get_missing_date_ranges, get_recent_start
 from weather.utils.cache_utils import CacheManager
-from weather.utils.constants import CACHE_TIMEOUT_HOUR
-from weather.models import WeatherData
+from weather.utils.response_cache import ResponseCache
+from weather.utils.text_utils import normalize_city_name
+from weather.utils.constants import (
+    CACHE_TIMEOUT_HOUR,
+    MAX_DAYS_ALLOWED,
+    WEATHER_FETCH_MERGE_GAP_DAYS,
+    WEATHER_RECENT_DAYS,
+    WEATHER_RECENT_REFRESH,
+    WEATHER_UPSERT_BATCH_SIZE,
+    BATCH_MAX_WORKERS
+)
+from weather.models import Location, WeatherData
 
 logger = logging.getLogger(__name__)
 
@@ -13,71 +29,374 @@ class WeatherService:
     """Service for fetching weather data from external API"""
     
     @staticmethod
-    def get_historical_weather(city, days):
+    def get_historical_weather(city, days, batch=False):
         """
         Fetch historical weather data for a city for the specified number of days
         
         Args:
             city (str): City name
             days (int): Number of days to fetch data for
+            batch (bool, optional): Merge upstream calls with concurrent requests for the same dates
             
         Returns:
             list: List of temperature data for each day
         """
         # Prepare cache key
-        cache_key = f"processed_weather_{city}_{days}"
+        cache_key = WeatherService._historical_weather_cache_key(city, days)
         
-        # Define the function to get fresh data
-        def fetch_and_process_weather():
-            logger.info(f"Fetching and processing weather data for {city} for {days} days")
+        # Use the cache manager to get or set the data
+        return CacheManager.get_or_set(
+            cache_key,
+            lambda: WeatherService._load_historical_weather(city, days, batch=batch),
+            timeout=CACHE_TIMEOUT_HOUR
+        )
+    
+    @staticmethod
+    def get_average_temperature(city, days):
+        """
+        Get the average temperature of a city over the specified number of days
+        
+        Args:
+            city (str): City name
+            days (int): Number of days to average over
+            
+        Returns:
+            float: Average temperature
+        """
+        return WeatherService.get_average_summary(city, days)["average"]
+    
+    @staticmethod
+    def get_average_summary(city, days):
+        """
+        Get the average temperature of a city over the specified number of days
+        with the version of the stored data it was computed from. The version is
+        cached with the average, so validating a response costs no query.
+        
+        Args:
+            city (str): City name
+            days (int): Number of days to average over
+            
+        Returns:
+            dict: average, day_count (stored days of the window) and last_modified
+                (when they were last written, None when nothing is stored)
+        """
+        cache_key = WeatherService._average_temperature_cache_key(city, days)
+        
+        return CacheManager.get_or_set(
+            cache_key,
+            lambda: WeatherService._load_average_temperature(city, days),
+            timeout=CACHE_TIMEOUT_HOUR
+        )
+    
+    @staticmethod
+    def get_historical_weather_many(cities, days):
+        """
+        Fetch historical weather data for several cities at once. Cached values
+        are read with one cache round trip and stored data with one query;
+        the remaining cities are fetched concurrently.
+        
+        Args:
+            cities (list): City names
+            days (int): Number of days to fetch data for
             
-            # Calculate date range using utility function
+        Returns:
+            tuple: (results, errors) dictionaries keyed by city, holding the list
+                of temperature data or the error message for each city
+        """
+        cities = list(dict.fromkeys(cities))
+        results = {}
+        errors = {}
+        
+        # Resolve everything we can from the cache in one round trip
+        getters = {
+            WeatherService._historical_weather_cache_key(city, days):
+                (lambda city=city: WeatherService._load_historical_weather(city, days, batch=True))
+            for city in cities
+        }
+        cached = CacheManager.get_many(getters, timeout=CACHE_TIMEOUT_HOUR)
+        for city in cities:
+            cache_key = WeatherService._historical_weather_cache_key(city, days)
+            if cache_key in cached:
+                results[city] = cached[cache_key]
+        
+        # Then from the database in one query
+        misses = [city for city in cities if city not in results]
+        if misses:
             start_date, end_date = get_date_range(days)
+            window_days = (end_date - start_date).days + 1
+            normalized_names = {city: normalize_city_name(city) for city in misses}
+            stored = {name: [] for name in normalized_names.values()}
+            for name, date_obj, temperature in WeatherData.objects.filter(
+                location__normalized_name__in=stored,
+                date__gte=start_date,
+                date__lte=end_date
+            ).order_by('date').values_list('location__normalized_name', 'date', 'temperature'):
+                stored[name].append({"date": date_obj.strftime("%Y-%m-%d"), "temperature": temperature})
+            stale = WeatherService._stale_recent_dates(set(normalized_names.values()), start_date, end_date)
+            
+            for city, name in normalized_names.items():
+                rows = stored[name]
+                # Dates are unique per location, so a full count means nothing is missing
+                if len(rows) == window_days and name not in stale:
+                    results[city] = rows
+                    CacheManager.set(
+                        WeatherService._historical_weather_cache_key(city, days),
+                        rows,
+                        timeout=CACHE_TIMEOUT_HOUR
+                    )
+        
+        # Fetch whatever is left concurrently with a bounded pool
+        misses = [city for city in cities if city not in results]
+        if misses:
+            logger.info(f"Fetching weather data for {len(misses)} of {len(cities)} cities")
+            
+            def fetch(city):
+                try:
+                    # The pool misses concurrently, so their upstream calls are merged
+                    return WeatherService.get_historical_weather(city, days, batch=True)
+                finally:
+                    # Worker threads open their own database connections
+                    connections.close_all()
+            
+            with ThreadPoolExecutor(max_workers=min(BATCH_MAX_WORKERS, len(misses))) as executor:
+                futures = {city: executor.submit(fetch, city) for city in misses}
+                for city, future in futures.items():
+                    try:
+                        results[city] = future.result()
+                    except ValueError as e:
+                        errors[city] = str(e)
+                    except Exception as e:
+                        logger.error(f"Error fetching weather data for {city}: {str(e)}")
+                        errors[city] = "Failed to fetch weather data. Please try again later."
+        
+        return results, errors
+    
+    @staticmethod
+    def _historical_weather_cache_key(city, days):
+        """
+        Build the cache key of the processed weather data for a city, shared
+        by all spellings of the city name
+        
+        Args:
+            city (str): City name
+            days (int): Number of days
+            
+        Returns:
+            str: Cache key
+        """
+        return f"processed_weather_{normalize_city_name(city)}_{days}"
+    
+    @staticmethod
+    def _average_temperature_cache_key(city, days):
+        """
+        Build the cache key of the average temperature of a city and the
+        version of its data, shared by all spellings of the city name
+        
+        Args:
+            city (str): City name
+            days (int): Number of days
+            
+        Returns:
+            str: Cache key
+        """
+        return f"average_summary_{normalize_city_name(city)}_{days}"
+    
+    @staticmethod
+    def _load_historical_weather(city, days, batch=False):
+        """
+        Load the weather data for a city from the database, fetching the
+        missing dates from the external API
+        
+        Args:
+            city (str): City name
+            days (int): Number of days to fetch data for
+            batch (bool, optional): Merge upstream calls with concurrent requests for the same dates
             
-            # Try to get data from the database first
-            db_data = WeatherService.get_weather_from_db(city, start_date, end_date)
-            
-            # If we have complete data in the database, return it
-            if db_data and len(db_data) == days:
-                logger.info(f"Retrieved complete weather data for {city} from database")
-                return db_data
-            
-            # Otherwise, fetch from API
-            logger.info(f"Fetching weather data for {city} from external API")
-            
-            # Use the Geocoding service to get coordinates for the city
-            try:
-                coords = GeocodingService.get_coordinates(city)
-            except ValueError as e:
-                logger.error(f"Geocoding error for city '{city}': {str(e)}")
-                raise ValueError(f"Could not find coordinates for city: {city}. Please check the spelling or try another city.")
-            except Exception as e:
-                logger.error(f"Geocoding service error: {str(e)}")
-                raise Exception(f"Geocoding service error: {str(e)}")
-            
-            # Use the Weather client to get historical weather data
-            try:
+        Returns:
+            list: List of temperature data for each day
+        """
+        logger.info(f"Fetching and processing weather data for {city} for {days} days")
+        
+        # Calculate date range using utility function
+        start_date, end_date = get_date_range(days)
+        
+        # Try to get data from the database first
+        db_data = WeatherService.get_weather_from_db(city, start_date, end_date)
+        
+        # Work out which dates are not stored yet, or are provisional and due to be fetched again
+        name = normalize_city_name(city)
+        stored_dates = {datetime.strptime(item["date"], "%Y-%m-%d").date() for item in db_data}
+        stored_dates -= WeatherService._stale_recent_dates([name], start_date, end_date).get(name, set())
+        missing_ranges = get_missing_date_ranges(
+            start_date,
+            end_date,
+            stored_dates,
+            max_gap_days=WEATHER_FETCH_MERGE_GAP_DAYS
+        )
+        
+        # If we have complete data in the database, return it
+        if not missing_ranges:
+            logger.info(f"Retrieved complete weather data for {city} from database")
+            return db_data
+        
+        # Otherwise, fetch only the missing ranges from the API
+        logger.info(
+            f"Fetching {len(missing_ranges)} missing date range(s) for {city} from external API"
+        )
+        fresh_data = WeatherService._fetch_missing_weather(city, missing_ranges, batch=batch)
+        
+        # Combine stored and fresh rows, fresh values win for overlapping dates
+        combined = {item["date"]: item for item in db_data}
+        combined.update((item["date"], item) for item in fresh_data)
+        
+        return [combined[date_str] for date_str in sorted(combined)]
+    
+    @staticmethod
+    def _load_average_temperature(city, days):
+        """
+        Compute the average temperature of a city in the database, fetching the
+        missing dates from the external API first. A fully stored window is
+        answered from the running totals, otherwise stored rows are aggregated
+        in SQL and only the freshly fetched rows are summed in Python.
+        
+        Args:
+            city (str): City name
+            days (int): Number of days to average over
+            
+        Returns:
+            dict: average, day_count and last_modified, see get_average_summary
+        """
+        start_date, end_date = get_date_range(days)
+        window_days = (end_date - start_date).days + 1
+        
+        name = normalize_city_name(city)
+        stored = WeatherData.objects.filter(
+            location__normalized_name=name,
+            date__gte=start_date,
+            date__lte=end_date
+        )
+        # Provisional recent days due to be fetched again count as missing
+        stale_dates = WeatherService._stale_recent_dates([name], start_date, end_date).get(name, set())
+        
+        # A complete window is answered by two running total lookups, once the
+        # running totals are timestamped (totals built before that need a rebuild)
+        temperature_sum, day_count, last_modified = WeatherRollupService.get_window_totals(
+            city, start_date, end_date
+        )
+        if day_count == window_days and last_modified is not None and not stale_dates:
+            logger.info(f"Computed average temperature for {city} from the rollups")
+            return {
+                "average": round(temperature_sum / day_count, 2),
+                "day_count": day_count,
+                "last_modified": last_modified
+            }
+        
+        # Or by the database alone if the running totals are not built yet
+        stats = stored.aggregate(average=Avg('temperature'), count=Count('id'), last_modified=Max('timestamp'))
+        if stats["count"] == window_days and not stale_dates:
+            logger.info(f"Computed average temperature for {city} in the database")
+            return {
+                "average": round(stats["average"], 2),
+                "day_count": stats["count"],
+                "last_modified": stats["last_modified"]
+            }
+        
+        # Otherwise only the stored dates are loaded to work out what is missing
+        missing_ranges = get_missing_date_ranges(
+            start_date,
+            end_date,
+            set(stored.values_list('date', flat=True)) - stale_dates,
+            max_gap_days=WEATHER_FETCH_MERGE_GAP_DAYS
+        )
+        logger.info(
+            f"Fetching {len(missing_ranges)} missing date range(s) for {city} from external API"
+        )
+        fresh_data = WeatherService._fetch_missing_weather(city, missing_ranges)
+        
+        # Fresh values win for dates that were stored already
+        fresh_dates = [datetime.strptime(item["date"], "%Y-%m-%d").date() for item in fresh_data]
+        stats = stored.exclude(date__in=fresh_dates).aggregate(
+            total=Sum('temperature'), count=Count('id'), last_modified=Max('timestamp')
+        )
+        count = stats["count"] + len(fresh_data)
+        # The fresh rows were written just now
+        last_modified = timezone.now() if fresh_data else stats["last_modified"]
+        if not count:
+            return {"average": 0, "day_count": 0, "last_modified": last_modified}
+        
+        total = (stats["total"] or 0) + sum(item["temperature"] for item in fresh_data)
+        return {"average": round(total / count, 2), "day_count": count, "last_modified": last_modified}
+    
+    @staticmethod
+    def _stale_recent_dates(normalized_names, start_date, end_date):
+        """
+        Get the stored dates among the most recent days whose rows were written
+        more than WEATHER_RECENT_REFRESH seconds ago. Their upstream values are
+        provisional, so they are fetched again like missing dates.
+        
+        Args:
+            normalized_names (iterable): Normalized city names
+            start_date (date): Start date of the window
+            end_date (date): End date of the window
+            
+        Returns:
+            dict: Set of stale dates for each normalized name that has any
+        """
+        stale = {}
+        for name, date_obj in WeatherData.objects.filter(
+            location__normalized_name__in=normalized_names,
+            date__gte=max(start_date, get_recent_start(WEATHER_RECENT_DAYS)),
+            date__lte=end_date,
+            timestamp__lt=timezone.now() - timedelta(seconds=WEATHER_RECENT_REFRESH)
+        ).values_list('location__normalized_name', 'date'):
+            stale.setdefault(name, set()).add(date_obj)
+        return stale
+    
+    @staticmethod
+    def _fetch_missing_weather(city, missing_ranges, batch=False):
+        """
+        Fetch weather data for the given date ranges from the external API and
+        store it in the database
+        
+        Args:
+            city (str): City name
+            missing_ranges (list): List of (start_date, end_date) tuples
+            batch (bool, optional): Merge upstream calls with concurrent requests for the same dates
+            
+        Returns:
+            list: Processed list of temperature data for all fetched ranges
+        """
+        # Use the Geocoding service to get coordinates for the city
+        try:
+            coords = GeocodingService.get_coordinates(city)
+        except ValueError as e:
+            logger.error(f"Geocoding error for city '{city}': {str(e)}")
+            raise ValueError(f"Could not find coordinates for city: {city}. Please check the spelling or try another city.")
+        except Exception as e:
+            logger.error(f"Geocoding service error: {str(e)}")
+            raise Exception(f"Geocoding service error: {str(e)}")
+        
+        # Use the Weather client to get historical weather data, one call per range
+        try:
+            fresh_data = []
+            for range_start, range_end in missing_ranges:
                 data = WeatherClient.get_historical_weather(
                     coords["latitude"],
                     coords["longitude"],
-                    start_date.strftime("%Y-%m-%d"),
-                    end_date.strftime("%Y-%m-%d")
+                    range_start.strftime("%Y-%m-%d"),
+                    range_end.strftime("%Y-%m-%d"),
+                    batch=batch
                 )
-                
-                # Process the data
-                processed_data = WeatherService._process_weather_data(data)
-                
-                # Store the data in the database for future use
-                WeatherService.store_weather_data(city, processed_data)
-                
-                return processed_data
-                
-            except Exception as e:
-                logger.error(f"Error fetching weather data: {str(e)}")
-                raise Exception(f"Error fetching weather data: {str(e)}")
-        
-        # Use the cache manager to get or set the data
-        return CacheManager.get_or_set(cache_key, fetch_and_process_weather, timeout=CACHE_TIMEOUT_HOUR)
+                fresh_data.extend(WeatherService._process_weather_data(data))
+            
+            # Store the data in the database for future use
+            WeatherService.store_weather_data(city, fresh_data)
+            
+            return fresh_data
+            
+        except Exception as e:
+            logger.error(f"Error fetching weather data: {str(e)}")
+            raise Exception(f"Error fetching weather data: {str(e)}")
     
     @staticmethod
     def _process_weather_data(data):
@@ -100,43 +419,152 @@ class WeatherService:
     @staticmethod
     def store_weather_data(city, temperature_data):
         """
-        Store weather data in the database
+        Store weather data in the database under the location of the city
         
         Args:
             city (str): City name
             temperature_data (list): List of temperature data
             
         Returns:
-            list: List of created or updated WeatherData objects
+            dict: Number of created, updated and unchanged records
+        """
+        location = Location.objects.for_city(city)
+        records = (
+            {"city": location.name, "date": item["date"], "temperature": item["temperature"]}
+            for item in temperature_data
+        )
+        return WeatherService.bulk_upsert_weather_data(records)
+    
+    @staticmethod
+    def bulk_upsert_weather_data(records, batch_size=WEATHER_UPSERT_BATCH_SIZE):
+        """
+        Insert or update weather records in batches, one INSERT ... ON CONFLICT
+        statement per batch. Records whose temperature is unchanged are skipped.
+        Records are stored under the location of their city, so different
+        spellings of a city name share the same rows, and the running totals
+        of the locations are updated from the first changed date.
+        
+        Args:
+            records (iterable): Dictionaries with city, date and temperature keys
+            batch_size (int): Maximum number of records written per statement
+            
+        Returns:
+            dict: Number of created, updated and unchanged records
         """
-        stored_data = []
+        counts = {"created": 0, "updated": 0, "unchanged": 0}
+        records = iter(records)
+        
+        while True:
+            batch = list(islice(records, batch_size))
+            if not batch:
+                break
+            for key, value in WeatherService._upsert_batch(batch).items():
+                counts[key] += value
         
-        for item in temperature_data:
-            # Convert string date to datetime object if needed
+        logger.info(
+            f"Stored weather records: {counts['created']} created, "
+            f"{counts['updated']} updated, {counts['unchanged']} unchanged"
+        )
+        return counts
+    
+    @staticmethod
+    def _upsert_batch(batch):
+        """
+        Write a single batch of weather records with one upsert statement
+        
+        Args:
+            batch (list): Dictionaries with city, date and temperature keys
+            
+        Returns:
+            dict: Number of created, updated and unchanged records in the batch
+        """
+        # Deduplicate on the unique key, the last value wins as it would row by row
+        locations = {}
+        rows = {}
+        for item in batch:
+            if item["city"] not in locations:
+                locations[item["city"]] = Location.objects.for_city(item["city"])
+            location = locations[item["city"]]
             date_obj = item["date"]
             if isinstance(date_obj, str):
                 date_obj = datetime.strptime(date_obj, "%Y-%m-%d").date()
-                
-            # Use get_or_create to avoid duplicates based on unique_together constraint
-            weather_obj, created = WeatherData.objects.get_or_create(
+            rows[(location.name, date_obj)] = (location, item["temperature"])
+        
+        # Load the current temperatures for the batch in a single query
+        cities = {city for city, _ in rows}
+        dates = {date_obj for _, date_obj in rows}
+        existing = {
+            (city, date_obj): temperature
+            for city, date_obj, temperature in WeatherData.objects.filter(
+                city__in=cities,
+                date__in=dates
+            ).values_list('city', 'date', 'temperature')
+        }
+        
+        counts = {"created": 0, "updated": 0, "unchanged": 0}
+        to_write = []
+        for (city, date_obj), (location, temperature) in rows.items():
+            if (city, date_obj) not in existing:
+                counts["created"] += 1
+            elif existing[(city, date_obj)] != temperature:
+                counts["updated"] += 1
+            else:
+                counts["unchanged"] += 1
+                # Unchanged rows keep their timestamp, so validators and cached responses stay valid
+                continue
+            to_write.append(WeatherData(
                 city=city,
+                city_norm=location.normalized_name,
+                location=location,
                 date=date_obj,
-                defaults={"temperature": item["temperature"]}
+                temperature=temperature
+            ))
+        
+        if to_write:
+            # No DDL here: rows of dates without a partition land in the default partition
+            # until `manage.py create_weather_partitions` creates theirs
+            WeatherData.objects.bulk_create(
+                to_write,
+                update_conflicts=True,
+                unique_fields=['city', 'date'],
+                update_fields=['location', 'temperature', 'timestamp']
             )
             
-            # If the record already existed but the temperature is different, update it
-            if not created and weather_obj.temperature != item["temperature"]:
-                weather_obj.temperature = item["temperature"]
-                weather_obj.save()
-                
-            stored_data.append(weather_obj)
-            
-            if created:
-                logger.info(f"Created new weather record for {city} on {date_obj}")
-            else:
-                logger.info(f"Updated existing weather record for {city} on {date_obj}")
-                
-        return stored_data
+            # Only the running totals from the first changed date onwards are affected
+            changed_from = {}
+            for row in to_write:
+                if row.location not in changed_from or row.date < changed_from[row.location]:
+                    changed_from[row.location] = row.date
+            for location, from_date in changed_from.items():
+                WeatherRollupService.update(location, from_date)
+                transaction.on_commit(
+                    lambda name=location.normalized_name: WeatherService._invalidate_cached_data(name)
+                )
+        
+        return counts
+    
+    @staticmethod
+    def _invalidate_cached_data(name):
+        """
+        Drop the cached weather data, averages and rendered responses of a
+        location once its rewritten data is committed
+        
+        Args:
+            name (str): Normalized name of the location
+        """
+        try:
+            CacheManager.delete_many([
+                cache_key
+                for days in range(1, MAX_DAYS_ALLOWED + 1)
+                for cache_key in (
+                    WeatherService._historical_weather_cache_key(name, days),
+                    WeatherService._average_temperature_cache_key(name, days)
+                )
+            ])
+        except Exception as e:
+            # Entries left behind expire with their timeout, it must not fail the write
+            logger.warning(f"Could not invalidate cached weather data of {name}: {str(e)}")
+        ResponseCache.invalidate(name)
     
     @staticmethod
     def get_weather_from_db(city, start_date, end_date):
@@ -153,7 +581,7 @@ class WeatherService:
         """
         # Query the database for weather data for the city and date range
         weather_data = WeatherData.objects.filter(
-            city=city,
+            location__normalized_name=normalize_city_name(city),
             date__gte=start_date,
             date__lte=end_date
         ).order_by('date')
@@ -0,0 +1,90 @@
+import time
+from datetime import date, timedelta
+from django.core.management.base import BaseCommand, CommandError
+from weather.integration.services.backfill import WeatherBackfillService
+from weather.models import BackfillCheckpoint
+from weather.utils.constants import BACKFILL_CHUNK_DAYS, BACKFILL_MAX_WORKERS
+from weather.utils.text_utils import normalize_city_name
+
+class Command(BaseCommand):
+    """Load the weather history of many cities over a date range"""
+    
+    help = (
+        "Backfill the weather data of cities over a date range with concurrent chunked upstream "
+        "calls. Loaded chunks are checkpointed, so running the command again resumes it."
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument('cities', nargs='*', help="City names")
+        parser.add_argument('--file', help="File with one city name per line, lines starting with # are ignored")
+        parser.add_argument('--start', type=date.fromisoformat, required=True, help="First date (YYYY-MM-DD)")
+        parser.add_argument('--end', type=date.fromisoformat,
+                            help="Last date (YYYY-MM-DD, default: yesterday)")
+        parser.add_argument('--chunk-days', type=int, default=BACKFILL_CHUNK_DAYS,
+                            help=f"Days per upstream call (default: {BACKFILL_CHUNK_DAYS})")
+        parser.add_argument('--workers', type=int, default=BACKFILL_MAX_WORKERS,
+                            help=f"Concurrent upstream calls (default: {BACKFILL_MAX_WORKERS})")
+        parser.add_argument('--restart', action='store_true',
+                            help="Forget the checkpoints of the cities and load the whole range again")
+    
+    def handle(self, *args, **options):
+        cities = list(options['cities'])
+        if options['file']:
+            try:
+                with open(options['file'], encoding='utf-8') as f:
+                    cities.extend(
+                        line.strip() for line in f
+                        if line.strip() and not line.lstrip().startswith('#')
+                    )
+            except OSError as e:
+                raise CommandError(f"Could not read {options['file']}: {str(e)}")
+        if not cities:
+            raise CommandError("Give at least one city, or a file with --file")
+        
+        start_date = options['start']
+        end_date = options['end'] or date.today() - timedelta(days=1)
+        if start_date > end_date:
+            raise CommandError(f"The start date {start_date} is after the end date {end_date}")
+        
+        if options['restart']:
+            deleted, _ = BackfillCheckpoint.objects.filter(
+                location__normalized_name__in=[normalize_city_name(city) for city in cities]
+            ).delete()
+            self.stdout.write(f"Removed {deleted} checkpoints")
+        
+        last_report = [0.0]
+        
+        def progress(stats):
+            # At most one line per second
+            now = time.monotonic()
+            if now - last_report[0] < 1 and stats['chunks_done'] < stats['chunks']:
+                return
+            last_report[0] = now
+            self.stdout.write(self._format_progress(stats))
+        
+        self.stdout.write(f"Backfilling {len(cities)} cities from {start_date} to {end_date}")
+        stats = WeatherBackfillService.run(
+            cities,
+            start_date,
+            end_date,
+            chunk_days=options['chunk_days'],
+            max_workers=options['workers'],
+            progress=progress
+        )
+        
+        for key, error in stats['errors'].items():
+            self.stderr.write(f"{key}: {error}")
+        
+        summary = self._format_progress(stats)
+        if stats['errors']:
+            raise CommandError(f"{summary}, {len(stats['errors'])} failed, run the command again to resume")
+        self.stdout.write(self.style.SUCCESS(summary))
+    
+    @staticmethod
+    def _format_progress(stats):
+        elapsed = max(stats['elapsed'], 1e-9)
+        return (
+            f"{stats['chunks_done']}/{stats['chunks']} chunks, {stats['rows']} rows, "
+            f"{stats['calls']} upstream calls in {stats['elapsed']:.1f}s "
+            f"({stats['rows'] / elapsed:.1f} rows/s, {stats['calls'] / elapsed:.2f} calls/s)"
+        )
@@ -0,0 +1,91 @@
+import re
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from weather.models import WeatherData
+
+# Indexes serving the normalized city search, dropped to show the plans without them
+CITY_SEARCH_INDEXES = (
+    'weather_city_norm_date_id_idx',
+    'weather_city_norm_trgm_idx',
+    'weather_city_norm_prefix_idx',
+)
+
+class _Rollback(Exception):
+    """Raised to undo a benchmark phase"""
+
+class Command(BaseCommand):
+    """Compare the query plans of the history city search with and without its indexes"""
+    
+    help = (
+        "Load synthetic weather data, then print the query plans and timings of the history "
+        "city search with and without the city_norm indexes. Everything runs in one transaction "
+        "that is rolled back, but it locks the weather table: use a non-production database. "
+        "PostgreSQL only."
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=3_000_000, help="Number of synthetic rows (default: 3000000)")
+        parser.add_argument('--days', type=int, default=365, help="Days of data per synthetic city (default: 365)")
+    
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError("The city search benchmark needs PostgreSQL")
+        
+        days = max(1, options['days'])
+        cities = max(1, options['rows'] // days)
+        probe = cities // 2 + 1
+        city_norm = f"benchmark city {probe}"
+        
+        queries = [
+            ("contains on city (previous filter)", WeatherData.objects.filter(city__icontains=f"Benchmark City {probe}")),
+            ("exact on city_norm", WeatherData.objects.filter(city_norm=city_norm)),
+            ("prefix on city_norm", WeatherData.objects.filter(city_norm__startswith=city_norm)),
+            ("contains on city_norm", WeatherData.objects.filter(city_norm__contains=city_norm)),
+        ]
+        
+        try:
+            with transaction.atomic():
+                self.stdout.write(f"Loading {cities * days} rows for {cities} cities...")
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        "INSERT INTO weather_weatherdata (city, city_norm, date, temperature, timestamp) "
+                        "SELECT 'Benchmark City ' || c, 'benchmark city ' || c, DATE '2000-01-01' + d, "
+                        "10 + random() * 20, now() "
+                        "FROM generate_series(1, %s) AS c, generate_series(0, %s) AS d",
+                        [cities, days - 1]
+                    )
+                    cursor.execute("ANALYZE weather_weatherdata")
+                
+                try:
+                    with transaction.atomic():
+                        with connection.cursor() as cursor:
+                            for index in CITY_SEARCH_INDEXES:
+                                cursor.execute(f"DROP INDEX IF EXISTS {index}")
+                        self._explain("Without city_norm indexes", queries)
+                        raise _Rollback()
+                except _Rollback:
+                    pass
+                
+                self._explain("With city_norm indexes", queries)
+                raise _Rollback()
+        except _Rollback:
+            pass
+        
+        self.stdout.write(self.style.SUCCESS("Benchmark data rolled back"))
+    
+    def _explain(self, title, queries):
+        """
+        Print the plan and execution time of the first page of every query
+        
+        Args:
+            title (str): Title of the benchmark phase
+            queries (list): (label, queryset) tuples
+        """
+        self.stdout.write(self.style.MIGRATE_HEADING(title))
+        for label, queryset in queries:
+            plan = queryset.order_by('-date')[:100].explain(analyze=True, buffers=True)
+            timing = re.search(r"Execution Time: ([\d.]+) ms", plan)
+            self.stdout.write(self.style.MIGRATE_LABEL(
+                f"{label}: {timing.group(1) if timing else '?'} ms"
+            ))
+            self.stdout.write(plan)
@@ -0,0 +1,95 @@
+import time
+from datetime import date, datetime, timedelta, timezone
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+from weather.models import WeatherData
+from weather.pagination import KeysetPagination
+from weather.renderers import ORJSONRenderer
+from weather.serializers import (
+    WeatherAverageResponseSerializer,
+    WeatherDataSerializer,
+    represent_average,
+    represent_weather_data
+)
+
+class Command(BaseCommand):
+    """Compare the CPU time of the serializer and lean response paths"""
+    
+    help = (
+        "Measure the CPU time per request spent building and rendering the /average and history "
+        "page responses, with the DRF serializers and JSONRenderer and with the lean path and "
+        "ORJSONRenderer. Uses synthetic data, no database or network access."
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=2000, help="Requests per measurement (default: 2000)")
+        parser.add_argument('--page-size', type=int, default=KeysetPagination.page_size,
+                            help=f"Rows per history page (default: {KeysetPagination.page_size})")
+    
+    def handle(self, *args, **options):
+        iterations = max(1, options['iterations'])
+        today = date.today()
+        start_date = today - timedelta(days=7)
+        written = datetime.now(timezone.utc)
+        rows = [
+            WeatherData(
+                id=i + 1,
+                city="Benchmark City",
+                date=today - timedelta(days=i),
+                temperature=10 + i % 20 + 0.25,
+                timestamp=written
+            )
+            for i in range(max(1, options['page_size']))
+        ]
+        
+        def average_serializer():
+            serializer = WeatherAverageResponseSerializer(data={
+                'city': "Benchmark City",
+                'average_temperature': 18.37,
+                'days': 7,
+                'start_date': start_date,
+                'end_date': today
+            })
+            serializer.is_valid(raise_exception=True)
+            return JSONRenderer().render(serializer.data)
+        
+        def average_lean():
+            return ORJSONRenderer().render(represent_average("Benchmark City", 18.37, 7, start_date, today))
+        
+        def page_serializer():
+            return JSONRenderer().render({'next': None, 'results': WeatherDataSerializer(rows, many=True).data})
+        
+        def page_lean():
+            return ORJSONRenderer().render({'next': None, 'results': represent_weather_data(rows)})
+        
+        for label, before, after in (
+            ("average", average_serializer, average_lean),
+            (f"history page of {len(rows)} rows", page_serializer, page_lean),
+        ):
+            if before() != after():
+                self.stderr.write(f"{label}: the lean response differs from the serializer response")
+            before_us = self._measure(before, iterations)
+            after_us = self._measure(after, iterations)
+            self.stdout.write(self.style.MIGRATE_LABEL(
+                f"{label}: serializer + json {before_us:.1f} us, lean + orjson {after_us:.1f} us "
+                f"per request ({before_us / after_us:.1f}x)"
+            ))
+        
+        self.stdout.write(self.style.SUCCESS(f"Measured {iterations} requests per path"))
+    
+    def _measure(self, build, iterations):
+        """
+        Measure the CPU time of building a response
+        
+        Args:
+            build (callable): Builds and renders one response
+            iterations (int): Number of responses to build
+        
+        Returns:
+            float: Microseconds of CPU time per response
+        """
+        build()
+        start = time.process_time()
+        for _ in range(iterations):
+            build()
+        return (time.process_time() - start) / iterations * 1_000_000
@@ -0,0 +1,129 @@
+import re
+from datetime import datetime, timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from weather.utils.partition_utils import WEATHER_TABLE, ensure_partitions, is_partitioned, reset_partition_cache
+
+# Single table with the indexes the weather data had before partitioning
+HEAP_TABLE = "weather_benchmark_heap"
+
+# Queries of get_weather_from_db, of a deep WeatherDataListView page and of a date range report
+QUERIES = [
+    (
+        "history window",
+        "SELECT date, temperature FROM {table} WHERE city_norm = %(city)s "
+        "AND date BETWEEN %(window_start)s AND %(today)s ORDER BY date",
+    ),
+    (
+        "history page",
+        "SELECT id, city, date, temperature FROM {table} WHERE date <= %(cursor)s "
+        "ORDER BY date DESC, id DESC LIMIT 100",
+    ),
+    (
+        "month scan",
+        "SELECT count(*), avg(temperature) FROM {table} WHERE date BETWEEN %(month_start)s AND %(month_end)s",
+    ),
+]
+
+class _Rollback(Exception):
+    """Raised to undo the benchmark"""
+
+class Command(BaseCommand):
+    """Compare query latencies of the partitioned weather table and a single table as rows grow"""
+    
+    help = (
+        "Load growing amounts of synthetic weather data into the partitioned weather table and into "
+        "a single table with the previous indexes, and print the latency of the history queries at "
+        "each size. Everything is rolled back, but the weather table is locked meanwhile: use a "
+        "non-production database. PostgreSQL only."
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, nargs='+', default=[100_000, 1_000_000, 5_000_000],
+                            help="Row counts to measure at (default: 100000 1000000 5000000)")
+        parser.add_argument('--years', type=int, default=10, help="Years of data per synthetic city (default: 10)")
+        parser.add_argument('--plans', action='store_true', help="Print the query plans")
+    
+    def handle(self, *args, **options):
+        if not is_partitioned(connection):
+            raise CommandError("The weather data table is not partitioned, run the migrations on PostgreSQL")
+        
+        today = datetime.now().date()
+        days = max(1, options['years']) * 365
+        month_start = (today - timedelta(days=730)).replace(day=1)
+        params = {
+            "window_start": today - timedelta(days=30),
+            "today": today,
+            "cursor": today - timedelta(days=400),
+            "month_start": month_start,
+            "month_end": (month_start + timedelta(days=32)).replace(day=1) - timedelta(days=1),
+        }
+        
+        try:
+            with transaction.atomic(), connection.cursor() as cursor:
+                ensure_partitions(connection, [today - timedelta(days=offset) for offset in range(0, days, 28)])
+                cursor.execute(f"CREATE TEMP TABLE {HEAP_TABLE} (LIKE {WEATHER_TABLE} INCLUDING DEFAULTS)")
+                cursor.execute(f"CREATE INDEX ON {HEAP_TABLE} (city_norm, date DESC, id DESC)")
+                cursor.execute(f"CREATE INDEX ON {HEAP_TABLE} (date DESC, id DESC)")
+                cursor.execute(f"CREATE UNIQUE INDEX ON {HEAP_TABLE} (city, date)")
+                cursor.execute(f"SELECT coalesce(max(id), 0) FROM {WEATHER_TABLE}")
+                first_id = cursor.fetchone()[0] + 1
+                
+                loaded = 0
+                cities = 0
+                for target in sorted(options['rows']):
+                    new_cities = max(1, (target - loaded) // days)
+                    self.stdout.write(f"Loading {new_cities * days} rows...")
+                    cursor.execute(
+                        f"INSERT INTO {HEAP_TABLE} (id, city, city_norm, location_id, date, temperature, timestamp) "
+                        "SELECT %s + (c - 1) * %s + d, 'Benchmark City ' || c, 'benchmark city ' || c, NULL, "
+                        "%s::date - d, 10 + random() * 20, now() "
+                        "FROM generate_series(%s, %s) AS c, generate_series(0, %s) AS d",
+                        [first_id, days, today, cities + 1, cities + new_cities, days - 1]
+                    )
+                    cursor.execute(
+                        f"INSERT INTO {WEATHER_TABLE} SELECT * FROM {HEAP_TABLE} WHERE id >= %s",
+                        [first_id + cities * days]
+                    )
+                    cities += new_cities
+                    loaded += new_cities * days
+                    cursor.execute(f"ANALYZE {HEAP_TABLE}")
+                    cursor.execute(f"ANALYZE {WEATHER_TABLE}")
+                    
+                    params["city"] = f"benchmark city {cities // 2 + 1}"
+                    self._measure(cursor, loaded, params, options['plans'])
+                raise _Rollback()
+        except _Rollback:
+            pass
+        finally:
+            reset_partition_cache()
+        
+        self.stdout.write(self.style.SUCCESS("Benchmark data rolled back"))
+    
+    def _measure(self, cursor, loaded, params, show_plans):
+        """
+        Print the execution time of every query on both tables
+        
+        Args:
+            cursor: Database cursor
+            loaded (int): Number of synthetic rows loaded
+            params (dict): Query parameters
+            show_plans (bool): Print the full query plans
+        """
+        self.stdout.write(self.style.MIGRATE_HEADING(f"{loaded} rows"))
+        for label, sql in QUERIES:
+            timings = {}
+            for table in (HEAP_TABLE, WEATHER_TABLE):
+                cursor.execute("EXPLAIN (ANALYZE, BUFFERS) " + sql.format(table=table), params)
+                plan = "\n".join(row[0] for row in cursor.fetchall())
+                timing = re.search(r"Execution Time: ([\d.]+) ms", plan)
+                timings[table] = (timing.group(1) if timing else "?", plan)
+            
+            partitions = set(re.findall(rf"on ({WEATHER_TABLE}_\w+)", timings[WEATHER_TABLE][1]))
+            self.stdout.write(self.style.MIGRATE_LABEL(
+                f"{label}: single table {timings[HEAP_TABLE][0]} ms, "
+                f"partitioned {timings[WEATHER_TABLE][0]} ms ({len(partitions)} partitions scanned)"
+            ))
+            if show_plans:
+                self.stdout.write(timings[HEAP_TABLE][1])
+                self.stdout.write(timings[WEATHER_TABLE][1])
@@ -0,0 +1,31 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from weather.integration.clients.gazetteer import Gazetteer
+
+class Command(BaseCommand):
+    """Build the binary gazetteer index from a GeoNames cities dump"""
+    
+    help = "Build a gazetteer index from a GeoNames cities dump (e.g. cities15000.txt) for GAZETTEER_PATH"
+    
+    def add_arguments(self, parser):
+        parser.add_argument('source', help="Path to the GeoNames cities dump")
+        parser.add_argument('output', help="Path of the index file to write")
+    
+    def handle(self, *args, **options):
+        start = time.monotonic()
+        try:
+            gazetteer = Gazetteer.from_geonames(options['source'])
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Could not read {options['source']}: {str(e)}")
+        gazetteer.save(options['output'])
+        build_seconds = time.monotonic() - start
+        
+        # Report how long workers will take to load the result
+        start = time.monotonic()
+        Gazetteer.load(options['output'])
+        load_seconds = time.monotonic() - start
+        
+        self.stdout.write(self.style.SUCCESS(
+            f"Indexed {len(gazetteer)} cities in {build_seconds:.2f}s, "
+            f"index loads in {load_seconds:.3f}s"
+        ))
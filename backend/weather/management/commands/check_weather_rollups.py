@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+from weather.integration.services.rollup import WeatherRollupService
+from weather.models import Location
+from weather.utils.text_utils import normalize_city_name
+
+class Command(BaseCommand):
+    """Check the running temperature totals against the stored weather data"""
+    
+    help = "Check that the weather rollup table matches the stored weather data"
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--city', action='append', help="Only check this city, can be repeated")
+    
+    def handle(self, *args, **options):
+        locations = Location.objects.all()
+        if options['city']:
+            locations = locations.filter(
+                normalized_name__in=[normalize_city_name(city) for city in options['city']]
+            )
+        
+        checked = 0
+        problems = []
+        for location in locations:
+            problems.extend(WeatherRollupService.check(location))
+            checked += 1
+        
+        for problem in problems:
+            self.stderr.write(problem)
+        if problems:
+            raise CommandError(
+                f"Found {len(problems)} inconsistencies in {checked} locations, "
+                f"run rebuild_weather_rollups to fix them"
+            )
+        
+        self.stdout.write(self.style.SUCCESS(f"Rollups of {checked} locations are consistent"))
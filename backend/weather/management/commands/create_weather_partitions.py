@@ -0,0 +1,57 @@
+from datetime import datetime
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from weather.utils.constants import WEATHER_PARTITION_INTERVAL, WEATHER_PARTITION_AHEAD
+from weather.utils.partition_utils import (
+    DEFAULT_PARTITION,
+    ensure_partitions,
+    interval_bounds,
+    is_partitioned,
+    partition_weather_table,
+    reset_partition_cache
+)
+
+class Command(BaseCommand):
+    """Create the upcoming partitions of the weather data table"""
+    
+    help = (
+        "Create the partitions of the weather data table for the current and upcoming periods, "
+        "and move rows that landed in the default partition into their own partition. Run it "
+        "ahead of time, e.g. from cron; writes do not create partitions. PostgreSQL only."
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--ahead', type=int, default=WEATHER_PARTITION_AHEAD,
+                            help=f"Number of future partitions (default: {WEATHER_PARTITION_AHEAD})")
+        parser.add_argument('--interval', choices=['year', 'month'], default=WEATHER_PARTITION_INTERVAL,
+                            help=f"Range of new partitions (default: {WEATHER_PARTITION_INTERVAL})")
+        parser.add_argument('--convert', action='store_true',
+                            help="Partition the weather data table first if it is not (rewrites the table under a lock)")
+    
+    def handle(self, *args, **options):
+        interval = options['interval']
+        if connection.vendor != 'postgresql':
+            raise CommandError("Partitioning needs PostgreSQL")
+        if not is_partitioned(connection):
+            if not options['convert']:
+                raise CommandError(
+                    "The weather data table is not partitioned, set WEATHER_PARTITIONING=True before "
+                    "migrating or run this command with --convert"
+                )
+            partition_weather_table(connection, interval, options['ahead'])
+            self.stdout.write(f"Partitioned the weather data table by {interval}")
+        
+        dates = [datetime.now().date()]
+        for _ in range(options['ahead']):
+            dates.append(interval_bounds(dates[-1], interval)[1])
+        
+        # Rows written while no partition covered their date
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT DISTINCT date_trunc('{interval}', date)::date FROM {DEFAULT_PARTITION}")
+            dates.extend(row[0] for row in cursor.fetchall())
+        
+        reset_partition_cache()
+        created = ensure_partitions(connection, dates, interval)
+        for name in created:
+            self.stdout.write(f"Created {name}")
+        self.stdout.write(self.style.SUCCESS(f"Created {len(created)} partitions"))
@@ -0,0 +1,28 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from weather.integration.services.rollup import WeatherRollupService
+from weather.models import Location
+from weather.utils.text_utils import normalize_city_name
+
+class Command(BaseCommand):
+    """Rebuild the running temperature totals from the stored weather data"""
+    
+    help = "Rebuild the weather rollup table from the stored weather data"
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--city', action='append', help="Only rebuild this city, can be repeated")
+    
+    def handle(self, *args, **options):
+        locations = Location.objects.all()
+        if options['city']:
+            names = [normalize_city_name(city) for city in options['city']]
+            locations = locations.filter(normalized_name__in=names)
+            if len(locations) != len(set(names)):
+                raise CommandError("Unknown city in " + ", ".join(options['city']))
+        
+        start = time.monotonic()
+        written = WeatherRollupService.rebuild(locations)
+        
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {written} running totals in {time.monotonic() - start:.2f}s"
+        ))
@@ -0,0 +1,44 @@
+import time
+from django.core.management.base import BaseCommand
+from weather.integration.services.cache_warming import CacheWarmingService
+from weather.utils.constants import (
+    CACHE_WARM_TOP_N,
+    CACHE_WARM_AHEAD_SECONDS,
+    CACHE_WARM_MAX_UPSTREAM_CALLS
+)
+
+class Command(BaseCommand):
+    """Refresh the most requested weather cache entries before they expire"""
+    
+    help = (
+        "Refresh the most requested weather cache entries that are missing or about to expire, "
+        "within a budget of upstream calls, and report the share of the tracked requests whose "
+        "cache entry is predicted to stay fresh until the next run"
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=CACHE_WARM_TOP_N,
+                            help=f"Number of most requested keys considered (default: {CACHE_WARM_TOP_N})")
+        parser.add_argument('--budget', type=int, default=CACHE_WARM_MAX_UPSTREAM_CALLS,
+                            help=f"Maximum upstream calls (default: {CACHE_WARM_MAX_UPSTREAM_CALLS})")
+        parser.add_argument('--ahead', type=int, default=CACHE_WARM_AHEAD_SECONDS,
+                            help=f"Refresh keys expiring within this many seconds (default: {CACHE_WARM_AHEAD_SECONDS})")
+        parser.add_argument('--list', action='store_true', help="Only list the most requested keys")
+    
+    def handle(self, *args, **options):
+        if options['list']:
+            for item in CacheWarmingService.get_popular(options['top']):
+                self.stdout.write(f"{item['requests']:>8}  {item['cache_key']}")
+            return
+        
+        start = time.monotonic()
+        report = CacheWarmingService.warm(options['top'], options['budget'], options['ahead'])
+        
+        self.stdout.write(
+            f"{report['keys']} popular keys: {report['fresh']} fresh, {report['warmed']} warmed, "
+            f"{report['failed']} failed, {report['skipped']} skipped (budget)"
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Predicted fresh share {report['fresh_share_before']:.1%} -> {report['fresh_share_after']:.1%} "
+            f"with {report['upstream_calls']} upstream calls in {time.monotonic() - start:.2f}s"
+        ))
@@ -0,0 +1,76 @@
+# Generated by Django 4.2.30 on 2026-10-17 20:11
+
+from collections import defaultdict
+from django.db import migrations, models
+import django.db.models.deletion
+from weather.utils.text_utils import normalize_city_name
+
+
+def link_weather_data(apps, schema_editor):
+    """
+    Create a location for every distinct city in the stored weather data and
+    fold the rows of different spellings of the same city into one series
+    """
+    Location = apps.get_model('weather', 'Location')
+    WeatherData = apps.get_model('weather', 'WeatherData')
+
+    # The most used spelling of a city becomes its name
+    spellings = defaultdict(list)
+    for city in WeatherData.objects.values('city').annotate(
+        rows=models.Count('id')
+    ).order_by('-rows', 'city').values_list('city', flat=True):
+        normalized_name = normalize_city_name(city)
+        if normalized_name:
+            spellings[normalized_name].append(city)
+
+    for normalized_name, cities in spellings.items():
+        aliases = list(dict.fromkeys(" ".join(city.split()) for city in cities))
+        location = Location.objects.create(
+            name=aliases[0],
+            normalized_name=normalized_name,
+            aliases=aliases
+        )
+
+        # Keep the most recently written row when several spellings share a date
+        seen_dates = set()
+        duplicates = []
+        for row_id, date in WeatherData.objects.filter(city__in=cities).order_by(
+            'date', '-timestamp', '-id'
+        ).values_list('id', 'date'):
+            if date in seen_dates:
+                duplicates.append(row_id)
+            else:
+                seen_dates.add(date)
+        WeatherData.objects.filter(id__in=duplicates).delete()
+        WeatherData.objects.filter(city__in=cities).update(city=location.name, location=location)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('weather', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Location',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('normalized_name', models.CharField(max_length=100, unique=True)),
+                ('aliases', models.JSONField(blank=True, default=list)),
+                ('latitude', models.FloatField(blank=True, null=True)),
+                ('longitude', models.FloatField(blank=True, null=True)),
+                ('resolved_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='weatherdata',
+            name='location',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='weather_data', to='weather.location'),
+        ),
+        migrations.RunPython(link_weather_data, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.30 on 2026-10-17 20:15
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('weather', '0002_location'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WeatherRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('temperature_sum', models.FloatField()),
+                ('day_count', models.IntegerField()),
+                ('location', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rollups', to='weather.location')),
+            ],
+            options={
+                'ordering': ['location', 'date'],
+                'unique_together': {('location', 'date')},
+            },
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 4.2.30 on 2026-10-17 20:16
+
+from django.db import migrations, models
+from weather.utils.text_utils import normalize_city_name
+
+
+def fill_city_norm(apps, schema_editor):
+    """Normalize the city of the stored weather data, one update per city"""
+    WeatherData = apps.get_model('weather', 'WeatherData')
+    for city in WeatherData.objects.values_list('city', flat=True).distinct():
+        WeatherData.objects.filter(city=city).update(city_norm=normalize_city_name(city))
+
+
+def create_search_indexes(apps, schema_editor):
+    """
+    Create the PostgreSQL specific indexes on city_norm: trigram (GIN) for
+    substring and similarity matches and varchar_pattern_ops for prefix
+    matches, which the default B-tree cannot serve outside the C locale
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS weather_city_norm_trgm_idx "
+        "ON weather_weatherdata USING gin (city_norm gin_trgm_ops)"
+    )
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS weather_city_norm_prefix_idx "
+        "ON weather_weatherdata (city_norm varchar_pattern_ops)"
+    )
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute("DROP INDEX IF EXISTS weather_city_norm_trgm_idx")
+    schema_editor.execute("DROP INDEX IF EXISTS weather_city_norm_prefix_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('weather', '0003_weatherrollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='weatherdata',
+            name='city_norm',
+            field=models.CharField(default='', editable=False, max_length=100),
+        ),
+        migrations.RunPython(fill_city_norm, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='weatherdata',
+            index=models.Index(fields=['city_norm', '-date'], name='weather_city_norm_date_idx'),
+        ),
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
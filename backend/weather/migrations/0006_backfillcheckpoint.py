@@ -0,0 +1,29 @@
+# Generated by Django 4.2.30 on 2026-10-17 20:24
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('weather', '0005_history_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BackfillCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start_date', models.DateField()),
+                ('end_date', models.DateField()),
+                ('rows', models.IntegerField(default=0)),
+                ('completed_at', models.DateTimeField(auto_now=True)),
+                ('location', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='backfill_checkpoints', to='weather.location')),
+            ],
+            options={
+                'ordering': ['location', 'start_date'],
+                'unique_together': {('location', 'start_date', 'end_date')},
+            },
+        ),
+    ]
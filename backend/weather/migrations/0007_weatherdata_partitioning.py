@@ -0,0 +1,33 @@
+# Generated by Django 4.2.30 on 2026-10-17 20:31
+
+from django.db import migrations
+from weather.utils.constants import WEATHER_PARTITIONING
+from weather.utils.partition_utils import partition_weather_table, unpartition_weather_table
+
+
+def partition_weather_data(apps, schema_editor):
+    """
+    Convert the weather data table into yearly (or monthly) range partitions
+    on date, with a BRIN index on date. The table is rewritten under an
+    exclusive lock, so large tables should be migrated in a maintenance window.
+    """
+    if schema_editor.connection.vendor != 'postgresql' or not WEATHER_PARTITIONING:
+        return
+    partition_weather_table(schema_editor.connection)
+
+
+def unpartition_weather_data(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    unpartition_weather_table(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('weather', '0006_backfillcheckpoint'),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_weather_data, unpartition_weather_data),
+    ]
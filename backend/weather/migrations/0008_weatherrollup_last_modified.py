@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-17 21:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('weather', '0007_weatherdata_partitioning'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='weatherrollup',
+            name='last_modified',
+            field=models.DateTimeField(null=True),
+        ),
+    ]
@@ -1,7 +1,68 @@
 from django.db import models
+from weather.utils.constants import LOCATION_MAX_ALIASES
+from weather.utils.text_utils import normalize_city_name
+
+class LocationManager(models.Manager):
+    def for_city(self, city):
+        """
+        Get the location for a city name as typed by a user, creating an
+        unresolved one on first sight and remembering new spellings as aliases,
+        up to LOCATION_MAX_ALIASES of them
+        
+        Args:
+            city (str): City name
+        
+        Returns:
+            Location: The location the name refers to
+        """
+        normalized_name = normalize_city_name(city)
+        if not normalized_name:
+            raise ValueError(f"Could not find coordinates for city: {city}")
+        
+        spelling = " ".join(city.split())
+        location, created = self.get_or_create(
+            normalized_name=normalized_name,
+            defaults={"name": spelling, "aliases": [spelling]}
+        )
+        while spelling not in location.aliases and len(location.aliases) < LOCATION_MAX_ALIASES:
+            aliases = location.aliases + [spelling]
+            # Only written if no concurrent request changed the aliases since they were read
+            if self.filter(pk=location.pk, aliases=location.aliases).update(aliases=aliases):
+                location.aliases = aliases
+            else:
+                location.aliases = self.filter(pk=location.pk).values_list('aliases', flat=True).get()
+        return location
+
+class Location(models.Model):
+    name = models.CharField(max_length=100)
+    normalized_name = models.CharField(max_length=100, unique=True)
+    aliases = models.JSONField(default=list, blank=True)
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    resolved_at = models.DateTimeField(null=True, blank=True)
+    
+    objects = LocationManager()
+    
+    class Meta:
+        ordering = ['name']
+    
+    @property
+    def is_resolved(self):
+        return self.resolved_at is not None
+    
+    def __str__(self):
+        return self.name
 
 class WeatherData(models.Model):
     city = models.CharField(max_length=100)
+    city_norm = models.CharField(max_length=100, default='', editable=False)
+    location = models.ForeignKey(
+        Location,
+        null=True,
+        blank=True,
+        on_delete=models.CASCADE,
+        related_name='weather_data'
+    )
     date = models.DateField()
     temperature = models.FloatField()
     timestamp = models.DateTimeField(auto_now_add=True)
@@ -9,6 +70,47 @@ class WeatherData(models.Model):
     class Meta:
         unique_together = ('city', 'date')
         ordering = ['-date']
+        indexes = [
+            # History pages in (date, id) order, for all cities and for exact city
+            # matches. The trigram and prefix indexes on city_norm are PostgreSQL
+            # specific and created in migrations.
+            models.Index(fields=['-date', '-id'], name='weather_date_id_idx'),
+            models.Index(fields=['city_norm', '-date', '-id'], name='weather_city_norm_date_id_idx'),
+        ]
+    
+    def save(self, *args, **kwargs):
+        self.city_norm = normalize_city_name(self.city)
+        super().save(*args, **kwargs)
     
     def __str__(self):
         return f"{self.city} - {self.date} - {self.temperature}°C"
+
+class WeatherRollup(models.Model):
+    """Running totals of the stored temperatures of a location up to each date"""
+    location = models.ForeignKey(Location, on_delete=models.CASCADE, related_name='rollups')
+    date = models.DateField()
+    temperature_sum = models.FloatField()
+    day_count = models.IntegerField()
+    last_modified = models.DateTimeField(null=True)  # Latest row timestamp up to this date
+    
+    class Meta:
+        unique_together = ('location', 'date')
+        ordering = ['location', 'date']
+    
+    def __str__(self):
+        return f"{self.location} - {self.date} - {self.day_count} days"
+
+class BackfillCheckpoint(models.Model):
+    """Date range of a location loaded by the backfill command, skipped when it is resumed"""
+    location = models.ForeignKey(Location, on_delete=models.CASCADE, related_name='backfill_checkpoints')
+    start_date = models.DateField()
+    end_date = models.DateField()
+    rows = models.IntegerField(default=0)
+    completed_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        unique_together = ('location', 'start_date', 'end_date')
+        ordering = ['location', 'start_date']
+    
+    def __str__(self):
+        return f"{self.location} - {self.start_date} to {self.end_date}"
\ No newline at end of file
@@ -0,0 +1,109 @@
+import base64
+import binascii
+from datetime import date
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+from .utils.constants import HISTORY_PAGE_SIZE, HISTORY_MAX_PAGE_SIZE
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination over (date, id) in descending order. The opaque cursor
+    holds the last row of the previous page, so every page is one index range
+    scan without a COUNT(*) and deep pages cost the same as the first one.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    page_size = HISTORY_PAGE_SIZE
+    max_page_size = HISTORY_MAX_PAGE_SIZE
+    invalid_cursor_message = 'Invalid cursor'
+    
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        position = self.decode_cursor(request)
+        
+        queryset = queryset.order_by('-date', '-id')
+        if position is not None:
+            date_obj, row_id = position
+            # The date__lte bound gives the database an index range to scan
+            queryset = queryset.filter(
+                Q(date__lt=date_obj) | Q(date=date_obj, id__lt=row_id),
+                date__lte=date_obj
+            )
+        
+        # Fetch one extra row to know whether there is a next page
+        page = list(queryset[:self.page_size + 1])
+        self.next_position = None
+        if len(page) > self.page_size:
+            page = page[:self.page_size]
+            self.next_position = (page[-1].date, page[-1].pk)
+        
+        return page
+    
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data
+        })
+    
+    def get_page_size(self, request):
+        """
+        Get the page size requested by the client, bounded by max_page_size
+        
+        Args:
+            request (Request): Current request
+            
+        Returns:
+            int: Number of rows per page
+        """
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+    
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.next_position))
+    
+    def encode_cursor(self, position):
+        """
+        Encode a (date, id) position into an opaque cursor
+        
+        Args:
+            position (tuple): Date and id of the last row of a page
+            
+        Returns:
+            str: URL safe cursor
+        """
+        date_obj, row_id = position
+        raw = f"{date_obj.isoformat()}|{row_id}".encode("ascii")
+        return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+    
+    def decode_cursor(self, request):
+        """
+        Decode the cursor of the request
+        
+        Args:
+            request (Request): Current request
+            
+        Returns:
+            tuple: Date and id to continue after, or None for the first page
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        
+        try:
+            raw = base64.urlsafe_b64decode(encoded + "=" * (-len(encoded) % 4)).decode("ascii")
+            date_str, row_id = raw.split("|")
+            return date.fromisoformat(date_str), int(row_id)
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
@@ -0,0 +1,28 @@
+import orjson
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+# Types orjson leaves to the default function are encoded as JSONRenderer encodes them
+_encoder = JSONEncoder()
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    JSON renderer using orjson, which encodes several times faster than the
+    standard json module. The output is the compact, unescaped UTF-8 of
+    JSONRenderer's default settings; indented renderings are left to it.
+    """
+    
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        
+        # Dates go through the DRF encoder, which shortens datetimes to milliseconds and uses Z for UTC
+        ret = orjson.dumps(data, default=_encoder.default, option=orjson.OPT_PASSTHROUGH_DATETIME)
+        
+        # Escaped like JSONRenderer does, for bodies embedded in JavaScript
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
@@ -1,6 +1,8 @@
+from django.utils import timezone
 from rest_framework import serializers
 from .models import WeatherData
-from .utils.constants import MAX_DAYS_ALLOWED
+from .utils.constants import MAX_DAYS_ALLOWED, BATCH_MAX_CITIES
+from .utils.date_utils import format_iso_datetime
 
 class WeatherDataSerializer(serializers.ModelSerializer):
     class Meta:
@@ -18,3 +20,69 @@ class WeatherAverageResponseSerializer(serializers.Serializer):
     days = serializers.IntegerField()
     start_date = serializers.DateField()
     end_date = serializers.DateField()
+
+class WeatherBatchAverageRequestSerializer(serializers.Serializer):
+    cities = serializers.ListField(
+        child=serializers.CharField(max_length=100),
+        min_length=1,
+        max_length=BATCH_MAX_CITIES
+    )
+    days = serializers.IntegerField(min_value=1, max_value=MAX_DAYS_ALLOWED)
+
+class WeatherBatchErrorSerializer(serializers.Serializer):
+    city = serializers.CharField()
+    error = serializers.CharField()
+
+class WeatherBatchAverageResponseSerializer(serializers.Serializer):
+    days = serializers.IntegerField()
+    start_date = serializers.DateField()
+    end_date = serializers.DateField()
+    results = WeatherAverageResponseSerializer(many=True)
+    errors = WeatherBatchErrorSerializer(many=True)
+
+def represent_weather_data(rows):
+    """
+    Represent weather data like WeatherDataSerializer(rows, many=True).data,
+    without running a serializer field per value; for rows read from the database
+    
+    Args:
+        rows (iterable): WeatherData instances
+        
+    Returns:
+        list: One dictionary per row
+    """
+    # Looked up once, per row the lookup would cost more than the rest of the row
+    current_timezone = timezone.get_current_timezone()
+    return [
+        {
+            'id': row.id,
+            'city': row.city,
+            'date': row.date.isoformat(),
+            'temperature': float(row.temperature),
+            'timestamp': format_iso_datetime(row.timestamp, current_timezone),
+        }
+        for row in rows
+    ]
+
+def represent_average(city, average_temperature, days, start_date, end_date):
+    """
+    Represent an average temperature like WeatherAverageResponseSerializer,
+    without validating values computed by the service
+    
+    Args:
+        city (str): City name
+        average_temperature (float): Average temperature
+        days (int): Number of days
+        start_date (date): First date of the window
+        end_date (date): Last date of the window
+        
+    Returns:
+        dict: Response data
+    """
+    return {
+        'city': city,
+        'average_temperature': float(average_temperature),
+        'days': days,
+        'start_date': start_date.isoformat(),
+        'end_date': end_date.isoformat(),
+    }
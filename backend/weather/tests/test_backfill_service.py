@@ -0,0 +1,153 @@
+import pytest
+from datetime import date, datetime, timedelta
+from io import StringIO
+from unittest.mock import patch
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from weather.integration.services.backfill import WeatherBackfillService
+from weather.models import BackfillCheckpoint, Location, WeatherData
+
+def fake_weather_response(latitude, longitude, start_date, end_date, _skip_cache=False, batch=False):
+    """Build an Open-Meteo style response with one temperature per day"""
+    first = datetime.strptime(start_date, "%Y-%m-%d").date()
+    last = datetime.strptime(end_date, "%Y-%m-%d").date()
+    dates = [first + timedelta(days=i) for i in range((last - first).days + 1)]
+    return {
+        "daily": {
+            "time": [day.strftime("%Y-%m-%d") for day in dates],
+            "temperature_2m_max": [float(day.day) for day in dates],
+        }
+    }
+
+@pytest.fixture
+def mock_geocoding():
+    """Fixture resolving every city but Atlantis to a location with coordinates"""
+    def get_location(city):
+        if city == "Atlantis":
+            raise ValueError(f"Could not find coordinates for city: {city}")
+        location = Location.objects.for_city(city)
+        location.latitude, location.longitude = 51.5, -0.1
+        return location
+    
+    with patch('weather.integration.services.backfill.GeocodingService.get_location', side_effect=get_location):
+        yield
+
+@pytest.fixture
+def mock_weather_client():
+    """Fixture answering upstream calls with fake_weather_response"""
+    with patch(
+        'weather.integration.services.backfill.WeatherClient.get_historical_weather',
+        side_effect=fake_weather_response
+    ) as mock_client:
+        yield mock_client
+
+@pytest.mark.django_db
+class TestWeatherBackfillService:
+    """Tests for WeatherBackfillService"""
+    
+    def test_plan_skips_checkpointed_chunks(self):
+        """Test that checkpointed dates are left out of the plan"""
+        location = Location.objects.for_city("London")
+        BackfillCheckpoint.objects.create(location=location, start_date=date(2025, 1, 11), end_date=date(2025, 1, 20))
+        
+        chunks = WeatherBackfillService.plan(location, date(2025, 1, 1), date(2025, 1, 31), chunk_days=7)
+        
+        # Verify
+        assert chunks == [
+            (date(2025, 1, 1), date(2025, 1, 7)),
+            (date(2025, 1, 8), date(2025, 1, 10)),
+            (date(2025, 1, 21), date(2025, 1, 27)),
+            (date(2025, 1, 28), date(2025, 1, 31)),
+        ]
+    
+    def test_run(self, mock_geocoding, mock_weather_client):
+        """Test that every chunk is fetched, written and checkpointed"""
+        progress = []
+        
+        stats = WeatherBackfillService.run(
+            ["London", "Paris", "london"],
+            date(2025, 1, 1),
+            date(2025, 1, 31),
+            chunk_days=10,
+            max_workers=2,
+            progress=lambda stats: progress.append(stats["chunks_done"])
+        )
+        
+        # Verify
+        assert stats["cities"] == 2
+        assert stats["chunks"] == stats["chunks_done"] == 8
+        assert stats["rows"] == 62
+        assert stats["errors"] == {}
+        assert progress == list(range(1, 9))
+        assert mock_weather_client.call_count == 8
+        assert mock_weather_client.call_args.kwargs["_skip_cache"] is True
+        assert mock_weather_client.call_args.kwargs["batch"] is True
+        assert WeatherData.objects.filter(location__normalized_name="paris").count() == 31
+        assert WeatherData.objects.get(city="London", date=date(2025, 1, 15)).temperature == 15.0
+        assert BackfillCheckpoint.objects.count() == 8
+    
+    def test_run_resumes(self, mock_geocoding, mock_weather_client):
+        """Test that a second run only fetches the chunks that were not loaded"""
+        mock_weather_client.side_effect = [
+            fake_weather_response(0, 0, "2025-01-01", "2025-01-10"),
+            Exception("Error fetching weather data: 503"),
+        ]
+        stats = WeatherBackfillService.run(["London"], date(2025, 1, 1), date(2025, 1, 20), chunk_days=10, max_workers=1)
+        
+        assert stats["chunks_done"] == 1
+        assert list(stats["errors"]) == ["London 2025-01-11..2025-01-20"]
+        
+        # Running again fetches the failed chunk only
+        mock_weather_client.side_effect = fake_weather_response
+        stats = WeatherBackfillService.run(["London"], date(2025, 1, 1), date(2025, 1, 20), chunk_days=10)
+        
+        # Verify
+        assert stats["chunks"] == stats["chunks_done"] == 1
+        assert mock_weather_client.call_args.args[2:4] == ("2025-01-11", "2025-01-20")
+        assert WeatherData.objects.filter(city="London").count() == 20
+    
+    def test_run_skips_missing_upstream_values(self, mock_geocoding, mock_weather_client):
+        """Test that days without an upstream value are not written"""
+        mock_weather_client.side_effect = None
+        mock_weather_client.return_value = {
+            "daily": {"time": ["2025-01-01", "2025-01-02"], "temperature_2m_max": [5.0, None]}
+        }
+        
+        stats = WeatherBackfillService.run(["London"], date(2025, 1, 1), date(2025, 1, 2))
+        
+        # Verify
+        assert stats["rows"] == 1
+        assert list(WeatherData.objects.values_list('date', flat=True)) == [date(2025, 1, 1)]
+        
+        # Only the day with a value is checkpointed, a rerun retries the other one
+        location = Location.objects.get(normalized_name="london")
+        assert list(BackfillCheckpoint.objects.values_list('start_date', 'end_date')) == [
+            (date(2025, 1, 1), date(2025, 1, 1))
+        ]
+        assert WeatherBackfillService.plan(location, date(2025, 1, 1), date(2025, 1, 2)) == [
+            (date(2025, 1, 2), date(2025, 1, 2))
+        ]
+    
+    def test_backfill_weather_command(self, mock_geocoding, mock_weather_client, tmp_path):
+        """Test the management command with a city file and a city that cannot be geocoded"""
+        city_file = tmp_path / "cities.txt"
+        city_file.write_text("# Capitals\nParis\n\nAtlantis\n")
+        out = StringIO()
+        err = StringIO()
+        
+        with pytest.raises(CommandError, match="1 failed"):
+            call_command(
+                'backfill_weather', 'London', '--file', str(city_file),
+                '--start', '2025-01-01', '--end', '2025-01-10', stdout=out, stderr=err
+            )
+        
+        # Verify
+        assert "Backfilling 3 cities from 2025-01-01 to 2025-01-10" in out.getvalue()
+        assert "2/2 chunks, 20 rows" in out.getvalue()
+        assert "rows/s" in out.getvalue()
+        assert "Atlantis: Could not find coordinates for city: Atlantis" in err.getvalue()
+    
+    def test_backfill_weather_command_invalid_range(self):
+        """Test that an empty date range is rejected"""
+        with pytest.raises(CommandError, match="after the end date"):
+            call_command('backfill_weather', 'London', '--start', '2025-02-01', '--end', '2025-01-01')
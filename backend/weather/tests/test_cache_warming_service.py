@@ -0,0 +1,140 @@
+import pytest
+import threading
+from io import StringIO
+from unittest.mock import patch
+from django.core.cache import cache
+from django.core.management import call_command
+from weather.integration.clients.http import HttpClient
+from weather.integration.services.cache_warming import (
+    KIND_AVERAGE,
+    KIND_HISTORY,
+    CacheWarmingService,
+    request_popularity
+)
+from weather.models import Location
+from weather.utils.cache_utils import CacheManager
+
+@pytest.fixture(autouse=True)
+def clean_state():
+    """Fixture isolating the process-local popularity counts and the cache"""
+    with patch('weather.utils.popularity.get_redis_client', return_value=None):
+        request_popularity.clear()
+        cache.clear()
+        yield
+    request_popularity.clear()
+    cache.clear()
+
+@pytest.fixture
+def popular_requests():
+    """Fixture recording London as the most requested average, then Paris history"""
+    for city in ["London", "london", " LONDON "]:
+        CacheWarmingService.record_request(KIND_AVERAGE, city, 7)
+    for city in ["Paris", "Paris"]:
+        CacheWarmingService.record_request(KIND_HISTORY, city, 7)
+    CacheWarmingService.record_request(KIND_AVERAGE, "Berlin", 3)
+
+@pytest.mark.django_db
+class TestCacheWarmingService:
+    """Tests for CacheWarmingService"""
+    
+    def test_get_popular(self, popular_requests):
+        """Test that spellings of a city are counted together and ranked"""
+        popular = CacheWarmingService.get_popular(2)
+        
+        # Verify
+        assert [(item["kind"], item["city"], item["days"], item["requests"]) for item in popular] == [
+            (KIND_AVERAGE, "london", 7, 3),
+            (KIND_HISTORY, "paris", 7, 2),
+        ]
+        assert popular[0]["cache_key"] == "average_summary_london_7"
+        assert popular[1]["cache_key"] == "processed_weather_paris_7"
+    
+    @patch('weather.integration.services.cache_warming.WeatherService._load_historical_weather')
+    @patch('weather.integration.services.cache_warming.WeatherService._load_average_temperature')
+    def test_warm(self, mock_load_average, mock_load_history, popular_requests):
+        """Test that missing keys are warmed, fresh keys skipped and the hit ratio reported"""
+        Location.objects.create(name="London", normalized_name="london")
+        mock_load_average.return_value = 15.5
+        mock_load_history.return_value = [{"date": "2025-09-01", "temperature": 20.0}]
+        CacheManager.set("average_summary_berlin_3", 12.0, timeout=3600)
+        
+        report = CacheWarmingService.warm(limit=10, max_upstream_calls=10, ahead_seconds=600)
+        
+        # Verify
+        mock_load_average.assert_called_once_with("London", 7)
+        mock_load_history.assert_called_once_with("paris", 7)
+        assert cache.get("average_summary_london_7").value == 15.5
+        assert cache.get("processed_weather_paris_7").value == [{"date": "2025-09-01", "temperature": 20.0}]
+        assert report["keys"] == 3
+        assert report["fresh"] == 1
+        assert report["warmed"] == 2
+        assert report["fresh_share_before"] == pytest.approx(1 / 6)
+        assert report["fresh_share_after"] == 1.0
+    
+    @patch('weather.integration.services.cache_warming.WeatherService._load_average_temperature')
+    def test_warm_refreshes_keys_about_to_expire(self, mock_load_average):
+        """Test that keys expiring within the lead time are refreshed"""
+        CacheWarmingService.record_request(KIND_AVERAGE, "London", 7)
+        CacheManager.set("average_summary_london_7", 10.0, timeout=60)
+        mock_load_average.return_value = 15.5
+        
+        report = CacheWarmingService.warm(ahead_seconds=600)
+        
+        # Verify
+        assert report["warmed"] == 1
+        assert cache.get("average_summary_london_7").value == 15.5
+    
+    @patch('weather.integration.services.cache_warming.WeatherService._load_historical_weather')
+    @patch('weather.integration.services.cache_warming.WeatherService._load_average_temperature')
+    def test_warm_stops_at_budget(self, mock_load_average, mock_load_history, popular_requests):
+        """Test that no key is started once the budget of upstream calls is used"""
+        def load_average(city, days):
+            # The first key makes two upstream calls, while another thread serves a request
+            HttpClient._record("api.example.com", "https", 0.1)
+            HttpClient._record("api.example.com", "https", 0.1)
+            request = threading.Thread(target=HttpClient._record, args=("api.example.com", "https", 0.1))
+            request.start()
+            request.join()
+            return 15.5
+        
+        mock_load_average.side_effect = load_average
+        
+        with patch.object(HttpClient, '_stats', {}):
+            report = CacheWarmingService.warm(limit=10, max_upstream_calls=2)
+            
+            # The request of the other thread is not charged to the budget
+            assert HttpClient.get_request_count() == 3
+        
+        # Verify
+        mock_load_average.assert_called_once_with("london", 7)
+        mock_load_history.assert_not_called()
+        assert report["warmed"] == 1
+        assert report["skipped"] == 2
+        assert report["upstream_calls"] == 2
+    
+    @patch('weather.integration.services.cache_warming.WeatherService._load_average_temperature')
+    def test_warm_failure(self, mock_load_average):
+        """Test that a failing key is reported and not cached"""
+        CacheWarmingService.record_request(KIND_AVERAGE, "Nowhere", 7)
+        mock_load_average.side_effect = ValueError("Could not find coordinates for city: nowhere")
+        
+        report = CacheWarmingService.warm()
+        
+        # Verify
+        assert report["failed"] == 1
+        assert report["fresh_share_after"] == 0.0
+        assert cache.get("average_summary_nowhere_7") is None
+    
+    @patch('weather.integration.services.cache_warming.WeatherService._load_historical_weather')
+    @patch('weather.integration.services.cache_warming.WeatherService._load_average_temperature')
+    def test_warm_weather_cache_command(self, mock_load_average, mock_load_history, popular_requests):
+        """Test the management command report"""
+        mock_load_average.return_value = 15.5
+        mock_load_history.return_value = []
+        out = StringIO()
+        
+        call_command('warm_weather_cache', '--top', '2', stdout=out)
+        
+        # Verify
+        assert "2 popular keys: 0 fresh, 2 warmed, 0 failed, 0 skipped (budget)" in out.getvalue()
+        assert "Predicted fresh share 0.0% -> 100.0%" in out.getvalue()
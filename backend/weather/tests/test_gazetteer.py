@@ -0,0 +1,88 @@
+import pytest
+from unittest.mock import patch
+from weather.integration.clients.gazetteer import Gazetteer
+from weather.integration.clients.geocoding import GeocodingClient
+
+def geonames_line(geoname_id, name, ascii_name, alternate_names, latitude, longitude, population):
+    """Build a line in the GeoNames cities dump format"""
+    fields = [str(geoname_id), name, ascii_name, ",".join(alternate_names), str(latitude), str(longitude)]
+    fields += ["P", "PPLC", "XX", "", "", "", "", ""]
+    fields += [str(population), "", "", "Europe/Paris", "2024-01-01"]
+    return "\t".join(fields) + "\n"
+
+@pytest.fixture
+def geonames_file(tmp_path):
+    """Fixture writing a small GeoNames cities dump"""
+    path = tmp_path / "cities.txt"
+    path.write_text(
+        geonames_line(1, "Zürich", "Zurich", ["Zuerich", "Turitg"], 47.36667, 8.55, 341730)
+        + geonames_line(2, "Paris", "Paris", ["Lutetia", "Parigi"], 48.85341, 2.3488, 2138551)
+        + geonames_line(3, "Paris", "Paris", [], 33.66094, -95.55551, 24782)
+        + geonames_line(4, "New York City", "New York City", ["NYC", "New York"], 40.71427, -74.00597, 8804190),
+        encoding="utf-8"
+    )
+    return str(path)
+
+class TestGazetteer:
+    """Tests for the offline gazetteer"""
+    
+    def test_lookup_by_name_and_alias(self, geonames_file):
+        """Test lookups by name, ASCII name and alternate names"""
+        gazetteer = Gazetteer.from_geonames(geonames_file)
+        
+        assert len(gazetteer) == 4
+        assert gazetteer.lookup("Zürich")["latitude"] == 47.36667
+        assert gazetteer.lookup("zurich")["name"] == "Zürich"
+        assert gazetteer.lookup("  NYC ")["longitude"] == -74.00597
+        assert gazetteer.lookup("new-york")["name"] == "New York City"
+        assert gazetteer.lookup("Atlantis") is None
+        assert gazetteer.lookup("") is None
+    
+    def test_lookup_prefers_most_populous_city(self, geonames_file):
+        """Test that ambiguous names resolve to the most populous city"""
+        gazetteer = Gazetteer.from_geonames(geonames_file)
+        
+        assert gazetteer.lookup("Paris")["latitude"] == 48.85341
+    
+    def test_save_and_load_index(self, geonames_file, tmp_path):
+        """Test that a saved index loads with the same content"""
+        index_path = str(tmp_path / "cities.idx")
+        Gazetteer.from_geonames(geonames_file).save(index_path)
+        
+        gazetteer = Gazetteer.load(index_path)
+        
+        assert len(gazetteer) == 4
+        assert gazetteer.lookup("Parigi") == {"name": "Paris", "latitude": 48.85341, "longitude": 2.3488}
+    
+    def test_load_geonames_dump(self, geonames_file):
+        """Test that load() also accepts a raw GeoNames dump"""
+        assert Gazetteer.load(geonames_file).lookup("Turitg")["name"] == "Zürich"
+
+@patch('weather.integration.clients.geocoding.GeocodingClient._make_geocoding_request')
+class TestGeocodingClientGazetteer:
+    """Tests for the gazetteer lookup in GeocodingClient"""
+    
+    def test_known_city_skips_nominatim(self, mock_request, geonames_file):
+        """Test that cities known to the gazetteer are not sent to Nominatim"""
+        gazetteer = Gazetteer.from_geonames(geonames_file)
+        
+        with patch.object(Gazetteer, 'get_default', return_value=gazetteer):
+            result = GeocodingClient.get_coordinates("Zurich")
+        
+        # Verify
+        assert result == {"latitude": 47.36667, "longitude": 8.55}
+        mock_request.assert_not_called()
+    
+    @patch('weather.integration.clients.geocoding.CacheManager.get_or_set')
+    def test_unknown_city_falls_back_to_nominatim(self, mock_cache, mock_request, geonames_file):
+        """Test that unknown cities are geocoded with Nominatim"""
+        gazetteer = Gazetteer.from_geonames(geonames_file)
+        mock_request.return_value = [{"lat": "51.5074", "lon": "-0.1278"}]
+        mock_cache.side_effect = lambda key, func, timeout: func()
+        
+        with patch.object(Gazetteer, 'get_default', return_value=gazetteer):
+            result = GeocodingClient.get_coordinates("London")
+        
+        # Verify
+        assert result == {"latitude": 51.5074, "longitude": -0.1278}
+        mock_request.assert_called_once_with("London")
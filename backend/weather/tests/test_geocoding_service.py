@@ -2,12 +2,21 @@ import pytest
 from unittest.mock import patch, MagicMock
 from weather.integration.services.geocoding import GeocodingService
 from weather.integration.clients.geocoding import GeocodingClient
+from weather.models import Location
 
+@pytest.fixture
+def mock_cache():
+    """Fixture to make the location cache call the real function"""
+    with patch('weather.integration.services.geocoding.CacheManager.get_or_set') as mock:
+        mock.side_effect = lambda key, func, timeout: func()
+        yield mock
+
+@pytest.mark.django_db
 class TestGeocodingService:
     """Tests for GeocodingService"""
     
     @patch('weather.integration.clients.geocoding.GeocodingClient.get_coordinates')
-    def test_get_coordinates_success(self, mock_client):
+    def test_get_coordinates_success(self, mock_client, mock_cache):
         """Test successful geocoding"""
         # Setup
         city = "New York"
@@ -19,10 +28,13 @@ class TestGeocodingService:
         
         # Verify
         assert result == expected_coords
-        mock_client.assert_called_once_with(city)
+        mock_client.assert_called_once_with(city, _skip_cache=True)
+        location = Location.objects.get(normalized_name="new york")
+        assert (location.latitude, location.longitude) == (40.71, -74.01)
+        assert location.is_resolved
     
     @patch('weather.integration.clients.geocoding.GeocodingClient.get_coordinates')
-    def test_get_coordinates_error(self, mock_client):
+    def test_get_coordinates_error(self, mock_client, mock_cache):
         """Test error handling in geocoding"""
         # Setup
         city = "NonExistentCity"
@@ -34,9 +46,36 @@ class TestGeocodingService:
         
         # Verify the error message
         assert "Could not find coordinates for city" in str(excinfo.value)
-        mock_client.assert_called_once_with(city)
+        mock_client.assert_called_once_with(city, _skip_cache=True)
+        assert not Location.objects.exists()
+    
+    @patch('weather.integration.clients.geocoding.GeocodingClient.get_coordinates')
+    def test_get_location_reads_location_table(self, mock_client, mock_cache):
+        """Test that a resolved location is not geocoded again after a cache loss"""
+        mock_client.return_value = {"latitude": 51.51, "longitude": -0.13}
+        GeocodingService.get_location("London")
+        
+        # Other spellings of the same city resolve to the stored location
+        location = GeocodingService.get_location("  LONDON ")
+        
+        # Verify
+        mock_client.assert_called_once()
+        assert mock_cache.call_args.args[0] == "location_london"
+        assert location.name == "London"
+        assert location.aliases == ["London", "LONDON"]
+        assert Location.objects.count() == 1
+    
+    @patch('weather.integration.clients.geocoding.GeocodingClient.get_coordinates')
+    def test_location_cache_holds_plain_values(self, mock_client, mock_cache):
+        """Test that the location cache stores the id and coordinates, not the model instance"""
+        mock_client.return_value = {"latitude": 51.51, "longitude": -0.13}
+        GeocodingService.get_coordinates("London")
+        
+        # Verify
+        cached = mock_cache.call_args.args[1]()
+        assert cached == {"id": Location.objects.get().pk, "latitude": 51.51, "longitude": -0.13}
 
-@patch('weather.integration.clients.geocoding.requests.get')
+@patch('weather.integration.clients.geocoding.HttpClient.get')
 @patch('weather.integration.clients.geocoding.CacheManager.get_or_set')
 class TestGeocodingClient:
     """Tests for GeocodingClient"""
@@ -110,6 +149,20 @@ class TestGeocodingClient:
         # Verify the error message
         assert "Error geocoding city" in str(excinfo.value) or str(excinfo.value) == "Network error"
     
+    def test_get_coordinates_rate_limit_timeout(self, mock_cache, mock_requests):
+        """Test that a rate limit timeout is reported like the other request errors"""
+        mock_requests.side_effect = lambda *args, before_attempt, **kwargs: before_attempt()
+        mock_cache.side_effect = lambda key, func, timeout: func()
+        
+        with patch('weather.integration.clients.geocoding.nominatim_rate_limiter.acquire') as mock_acquire:
+            mock_acquire.side_effect = TimeoutError("Rate limit for nominatim not available within 10 seconds")
+            with pytest.raises(Exception) as excinfo:
+                GeocodingClient.get_coordinates("New York")
+        
+        # Verify
+        assert not isinstance(excinfo.value, TimeoutError)
+        assert str(excinfo.value) == "Error geocoding city: Rate limit for nominatim not available within 10 seconds"
+    
     def test_get_coordinates_response_processing_error(self, mock_cache, mock_requests):
         """Test handling of response processing errors"""
         # Setup
@@ -131,4 +184,21 @@ class TestGeocodingClient:
             GeocodingClient.get_coordinates(city)
         
         # Verify the error message
-        assert "Failed to process geocoding response" in str(excinfo.value)
\ No newline at end of file
+        assert "Failed to process geocoding response" in str(excinfo.value)
+    
+    def test_make_geocoding_request_uses_rate_limiter(self, mock_cache, mock_requests):
+        """Test that requests go through the shared Nominatim rate limiter"""
+        mock_requests.return_value.json.return_value = [{"lat": "40.71", "lon": "-74.01"}]
+        
+        with patch('weather.integration.clients.geocoding.nominatim_rate_limiter.acquire') as mock_acquire:
+            mock_acquire.return_value = 0
+            GeocodingClient._make_geocoding_request("New York")
+            
+            # The token is taken per attempt sent, so retries wait for the limiter too
+            before_attempt = mock_requests.call_args.kwargs["before_attempt"]
+            before_attempt()
+            before_attempt()
+        
+        # Verify
+        assert mock_acquire.call_count == 2
+        mock_requests.assert_called_once()
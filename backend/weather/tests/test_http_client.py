@@ -0,0 +1,140 @@
+import threading
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+import pytest
+import requests
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch, MagicMock
+from weather.integration.clients.http import HttpClient
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    """Minimal handler that keeps connections open between requests"""
+    protocol_version = "HTTP/1.1"
+    
+    def do_GET(self):
+        body = b'{"ok": true}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture
+def local_server():
+    """Fixture running a local keep-alive HTTP server"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), KeepAliveHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def fresh_session():
+    """Fixture giving the test its own pooled session and statistics"""
+    with patch.object(HttpClient, '_session', None), patch.object(HttpClient, '_stats', {}):
+        yield
+
+def make_response(status_code, headers=None):
+    """Build a mock response"""
+    response = MagicMock()
+    response.status_code = status_code
+    response.headers = headers or {}
+    return response
+
+@patch('weather.integration.clients.http.time.sleep')
+class TestHttpClient:
+    """Tests for HttpClient"""
+    
+    def test_applies_default_timeouts(self, mock_sleep, fresh_session):
+        """Test that every request gets connect and read timeouts"""
+        with patch('weather.integration.clients.http.requests.Session.get') as mock_get:
+            mock_get.return_value = make_response(200)
+            HttpClient.get("https://example.com/search", params={"q": "London"})
+        
+        # Verify
+        kwargs = mock_get.call_args.kwargs
+        assert kwargs["params"] == {"q": "London"}
+        assert kwargs["timeout"][0] > 0 and kwargs["timeout"][1] > 0
+    
+    def test_retries_transient_errors(self, mock_sleep, fresh_session):
+        """Test that connection errors and 5xx responses are retried with backoff"""
+        with patch('weather.integration.clients.http.requests.Session.get') as mock_get:
+            mock_get.side_effect = [
+                requests.exceptions.ConnectionError("reset"),
+                make_response(503, {"Retry-After": "1"}),
+                make_response(200),
+            ]
+            response = HttpClient.get("https://example.com/search")
+        
+        # Verify
+        assert response.status_code == 200
+        assert mock_get.call_count == 3
+        assert mock_sleep.call_count == 2
+        assert mock_sleep.call_args_list[1].args[0] == 1.0
+        assert HttpClient.get_stats()["example.com"]["retries"] == 2
+    
+    def test_gives_up_after_max_retries(self, mock_sleep, fresh_session):
+        """Test that the last error is raised once retries are exhausted"""
+        with patch('weather.integration.clients.http.HTTP_MAX_RETRIES', 1), \
+                patch('weather.integration.clients.http.requests.Session.get') as mock_get:
+            mock_get.side_effect = requests.exceptions.Timeout("read timeout")
+            
+            with pytest.raises(requests.exceptions.Timeout):
+                HttpClient.get("https://example.com/search")
+        
+        # Verify
+        assert mock_get.call_count == 2
+    
+    def test_calls_before_attempt_for_every_attempt(self, mock_sleep, fresh_session):
+        """Test that the per-attempt hook runs before the first attempt and each retry"""
+        before_attempt = MagicMock()
+        with patch('weather.integration.clients.http.requests.Session.get') as mock_get:
+            mock_get.side_effect = [make_response(429), make_response(503), make_response(200)]
+            HttpClient.get("https://example.com/search", before_attempt=before_attempt)
+        
+        # Verify
+        assert before_attempt.call_count == 3
+        assert mock_get.call_count == 3
+    
+    def test_honours_http_date_retry_after(self, mock_sleep, fresh_session):
+        """Test that a Retry-After HTTP date is turned into a delay"""
+        retry_at = datetime.now(timezone.utc) + timedelta(seconds=30)
+        with patch('weather.integration.clients.http.HTTP_BACKOFF_MAX', 60), \
+                patch('weather.integration.clients.http.requests.Session.get') as mock_get:
+            mock_get.side_effect = [
+                make_response(503, {"Retry-After": format_datetime(retry_at, usegmt=True)}),
+                make_response(200),
+            ]
+            HttpClient.get("https://example.com/search")
+        
+        # Verify
+        assert 25 <= mock_sleep.call_args.args[0] <= 30
+    
+    def test_past_http_date_retry_after_does_not_wait(self, mock_sleep, fresh_session):
+        """Test that a Retry-After date in the past gives no delay"""
+        assert HttpClient._backoff(0, "Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+    
+    def test_does_not_retry_client_errors(self, mock_sleep, fresh_session):
+        """Test that 4xx responses other than 429 are returned at once"""
+        with patch('weather.integration.clients.http.requests.Session.get') as mock_get:
+            mock_get.return_value = make_response(404)
+            response = HttpClient.get("https://example.com/search")
+        
+        # Verify
+        assert response.status_code == 404
+        mock_sleep.assert_not_called()
+    
+    def test_reuses_connections(self, mock_sleep, fresh_session, local_server):
+        """Test that sequential requests share one keep-alive connection"""
+        for _ in range(5):
+            assert HttpClient.get(f"{local_server}/ping").status_code == 200
+        
+        # Verify
+        stats = HttpClient.get_stats()[local_server.split("://")[1]]
+        assert stats["requests"] == 5
+        assert stats["handshakes"] == 1
+        assert stats["reuse_rate"] == pytest.approx(0.8)
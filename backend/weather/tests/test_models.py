@@ -1,5 +1,6 @@
+from unittest.mock import patch
 from django.test import TestCase
-from weather.models import WeatherData
+from weather.models import Location, WeatherData
 
 class WeatherDataModelTests(TestCase):
     """Tests for the WeatherData model"""
@@ -15,4 +16,32 @@ class WeatherDataModelTests(TestCase):
     def test_weather_data_str(self):
         """Test the string representation of a WeatherData object"""
         weather_data = WeatherData.objects.get(city="Test City")
-        self.assertEqual(str(weather_data), "Test City - 2025-01-01 - 25.5°C")
\ No newline at end of file
+        self.assertEqual(str(weather_data), "Test City - 2025-01-01 - 25.5°C")
+
+class LocationManagerTests(TestCase):
+    """Tests for LocationManager.for_city"""
+    
+    def test_for_city_records_spellings(self):
+        """Test that new spellings are recorded once each"""
+        Location.objects.for_city("London")
+        Location.objects.for_city(" LONDON")
+        location = Location.objects.for_city("London")
+        self.assertEqual(location.aliases, ["London", "LONDON"])
+        self.assertEqual(Location.objects.get().aliases, ["London", "LONDON"])
+    
+    @patch('weather.models.LOCATION_MAX_ALIASES', 2)
+    def test_for_city_caps_aliases(self):
+        """Test that spellings beyond the limit resolve without being recorded"""
+        for spelling in ("London", "LONDON", "london", "LoNdOn"):
+            location = Location.objects.for_city(spelling)
+        self.assertEqual(location.normalized_name, "london")
+        self.assertEqual(Location.objects.get().aliases, ["London", "LONDON"])
+    
+    def test_for_city_keeps_concurrent_spellings(self):
+        """Test that a spelling recorded by another request since the read is kept"""
+        stale = Location.objects.for_city("London")
+        Location.objects.for_city("LONDON")
+        with patch.object(Location.objects, 'get_or_create', return_value=(stale, False)):
+            location = Location.objects.for_city("london")
+        self.assertEqual(location.aliases, ["London", "LONDON", "london"])
+        self.assertEqual(Location.objects.get().aliases, ["London", "LONDON", "london"])
\ No newline at end of file
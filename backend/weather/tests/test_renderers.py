@@ -0,0 +1,47 @@
+import pytest
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from io import StringIO
+from django.core.management import call_command
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.serializer_helpers import ReturnDict
+from weather.renderers import ORJSONRenderer
+
+class TestORJSONRenderer:
+    """Tests for ORJSONRenderer"""
+    
+    def test_matches_json_renderer(self):
+        """Test that the output is byte for byte the output of JSONRenderer"""
+        data = ReturnDict({
+            'city': "Saint-Étienne ",
+            'temperature': 12.3,
+            'count': 3,
+            'missing': None,
+            'date': date(2025, 9, 10),
+            'timestamp': datetime(2025, 9, 10, 8, 30, 15, 123456, tzinfo=timezone.utc),
+            'decimal': Decimal("1.5"),
+            'results': [{'id': 1}, {'id': 2}],
+        }, serializer=None)
+        
+        # Verify
+        assert ORJSONRenderer().render(data) == JSONRenderer().render(data)
+        assert ORJSONRenderer().render(None) == b''
+    
+    def test_indent(self):
+        """Test that indented renderings are left to JSONRenderer"""
+        data = {'city': "Paris", 'results': [1, 2]}
+        
+        # Verify
+        assert ORJSONRenderer().render(data, 'application/json; indent=4') == \
+            JSONRenderer().render(data, 'application/json; indent=4')
+
+def test_benchmark_serialization_command():
+    """Test that the benchmark compares identical responses"""
+    out = StringIO()
+    err = StringIO()
+    
+    call_command('benchmark_serialization', '--iterations', '2', '--page-size', '3', stdout=out, stderr=err)
+    
+    # Verify
+    assert "history page of 3 rows: serializer + json" in out.getvalue()
+    assert err.getvalue() == ""
@@ -0,0 +1,89 @@
+import pytest
+from datetime import date
+from io import StringIO
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from weather.integration.services.rollup import WeatherRollupService
+from weather.integration.services.weather import WeatherService
+from weather.models import Location, WeatherData, WeatherRollup
+
+@pytest.fixture
+def london():
+    """Fixture to provide a location with five stored days"""
+    WeatherService.store_weather_data("London", [
+        {"date": f"2025-09-{day:02d}", "temperature": float(day)}
+        for day in range(10, 15)
+    ])
+    return Location.objects.get(normalized_name="london")
+
+@pytest.mark.django_db
+class TestWeatherRollupService:
+    """Tests for WeatherRollupService"""
+    
+    def test_store_weather_data_updates_rollups(self, london):
+        """Test that storing weather data maintains the running totals"""
+        rollups = list(WeatherRollup.objects.filter(location=london).values_list('date', 'temperature_sum', 'day_count'))
+        assert rollups == [
+            (date(2025, 9, 10), 10.0, 1),
+            (date(2025, 9, 11), 21.0, 2),
+            (date(2025, 9, 12), 33.0, 3),
+            (date(2025, 9, 13), 46.0, 4),
+            (date(2025, 9, 14), 60.0, 5),
+        ]
+    
+    def test_get_window_totals(self, london):
+        """Test window totals from two running total lookups"""
+        assert WeatherRollupService.get_window_totals("london", date(2025, 9, 11), date(2025, 9, 13))[:2] == (36.0, 3)
+        assert WeatherRollupService.get_window_totals("LONDON", date(2025, 9, 1), date(2025, 9, 30))[:2] == (60.0, 5)
+        assert WeatherRollupService.get_window_totals("London", date(2025, 9, 1), date(2025, 9, 9))[:2] == (0.0, 0)
+        assert WeatherRollupService.get_window_totals("Paris", date(2025, 9, 1), date(2025, 9, 30))[:2] == (0.0, 0)
+    
+    def test_update_from_changed_date(self, london):
+        """Test that rewriting an earlier date updates the later running totals"""
+        WeatherService.store_weather_data("London", [
+            {"date": "2025-09-12", "temperature": 20.0},
+            {"date": "2025-09-08", "temperature": 1.0},
+        ])
+        
+        # Verify
+        assert WeatherRollupService.get_window_totals("London", date(2025, 9, 8), date(2025, 9, 14))[:2] == (69.0, 6)
+        assert WeatherRollupService.get_window_totals("London", date(2025, 9, 12), date(2025, 9, 12))[:2] == (20.0, 1)
+        assert WeatherRollupService.check(london) == []
+    
+    def test_window_totals_last_modified(self, london):
+        """Test that the running totals carry the latest write up to their date"""
+        rewritten = WeatherData.objects.filter(location=london, date=date(2025, 9, 11))
+        WeatherService.store_weather_data("London", [{"date": "2025-09-11", "temperature": 0.0}])
+        written = rewritten.get().timestamp
+        
+        # Verify
+        assert WeatherRollupService.get_window_totals("London", date(2025, 9, 10), date(2025, 9, 10))[2] < written
+        assert WeatherRollupService.get_window_totals("London", date(2025, 9, 11), date(2025, 9, 11))[2] == written
+        assert WeatherRollupService.get_window_totals("London", date(2025, 9, 13), date(2025, 9, 14))[2] == written
+        assert WeatherRollupService.get_window_totals("Paris", date(2025, 9, 1), date(2025, 9, 30))[2] is None
+    
+    def test_check_reports_inconsistencies(self, london):
+        """Test that the checker finds running totals that do not match the data"""
+        WeatherData.objects.filter(location=london, date=date(2025, 9, 12)).update(temperature=0.0)
+        WeatherRollup.objects.filter(location=london, date=date(2025, 9, 14)).delete()
+        
+        problems = WeatherRollupService.check(london)
+        
+        # Verify
+        assert len(problems) == 3
+        assert "no running total for 2025-09-14" in problems[-1]
+    
+    def test_commands(self, london):
+        """Test the check and rebuild management commands"""
+        WeatherRollup.objects.all().delete()
+        
+        with pytest.raises(CommandError):
+            call_command('check_weather_rollups', stdout=StringIO(), stderr=StringIO())
+        
+        call_command('rebuild_weather_rollups', '--city', 'London', stdout=StringIO())
+        out = StringIO()
+        call_command('check_weather_rollups', stdout=out)
+        
+        # Verify
+        assert "Rollups of 1 locations are consistent" in out.getvalue()
+        assert WeatherRollup.objects.filter(location=london).count() == 5
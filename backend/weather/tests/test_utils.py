@@ -1,9 +1,37 @@
+import io
 import pytest
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from unittest.mock import patch, MagicMock
 from datetime import datetime, timedelta
 from django.core.cache import cache
-from weather.utils.date_utils import get_date_range
-from weather.utils.cache_utils import CacheManager
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from weather.utils.date_utils import get_date_range, get_missing_date_ranges, get_recent_start, split_date_range
+from weather.utils.geo_utils import snap_coordinate
+from weather.utils.http_cache import accepts_encoding
+from weather.utils.cache_utils import CacheManager, CacheEntry, RELEASE_LOCK_SCRIPT
+from weather.utils.local_cache import LocalLRUCache
+from weather.integration.services.weather import WeatherService
+from weather.models import WeatherData
+from weather.utils.partition_utils import (
+    DEFAULT_PARTITION,
+    create_partition,
+    ensure_partitions,
+    get_partition_bounds,
+    interval_bounds,
+    is_partitioned,
+    partition_name,
+    partition_weather_table,
+    reset_partition_cache,
+    unpartition_weather_table
+)
+from weather.utils.popularity import PopularityTracker
+from weather.utils.response_cache import ResponseCache
+from weather.utils.rate_limiter import TokenBucketRateLimiter, PRIORITY_INTERACTIVE, PRIORITY_BACKGROUND
 from weather.utils.error_handlers import handle_api_exception
 from rest_framework.response import Response
 from rest_framework import status
@@ -32,10 +60,194 @@ class TestDateUtils:
         
         # Verify the datetime.now() was called
         mock_datetime.now.assert_called()
+    
+    @patch('weather.utils.date_utils.datetime')
+    def test_get_recent_start(self, mock_datetime):
+        """Test the first of the most recent days"""
+        mock_datetime.now.return_value = datetime(2025, 9, 12)
+        
+        # Verify
+        assert get_recent_start(2) == datetime(2025, 9, 11).date()
+        assert get_recent_start(1) == datetime(2025, 9, 12).date()
+        assert get_recent_start(0) == datetime(2025, 9, 12).date()
+    
+    def test_get_missing_date_ranges(self):
+        """Test detection of missing date sub-ranges"""
+        start_date = datetime(2025, 9, 1).date()
+        end_date = datetime(2025, 9, 10).date()
+        existing = [datetime(2025, 9, d).date() for d in (1, 2, 5, 6, 7, 8)]
+        
+        # Without merging, each run of missing dates is its own range
+        ranges = get_missing_date_ranges(start_date, end_date, existing)
+        assert ranges == [
+            (datetime(2025, 9, 3).date(), datetime(2025, 9, 4).date()),
+            (datetime(2025, 9, 9).date(), datetime(2025, 9, 10).date()),
+        ]
+        
+        # Ranges separated by a small enough gap are merged into one
+        ranges = get_missing_date_ranges(start_date, end_date, existing, max_gap_days=4)
+        assert ranges == [(datetime(2025, 9, 3).date(), datetime(2025, 9, 10).date())]
+        
+        # Nothing is missing when every date is available
+        all_dates = [start_date + timedelta(days=i) for i in range(10)]
+        assert get_missing_date_ranges(start_date, end_date, all_dates) == []
+    
+    def test_split_date_range(self):
+        """Test splitting a date range into chunks"""
+        start_date = datetime(2025, 9, 1).date()
+        end_date = datetime(2025, 9, 10).date()
+        
+        # Verify
+        assert split_date_range(start_date, end_date, 4) == [
+            (datetime(2025, 9, 1).date(), datetime(2025, 9, 4).date()),
+            (datetime(2025, 9, 5).date(), datetime(2025, 9, 8).date()),
+            (datetime(2025, 9, 9).date(), datetime(2025, 9, 10).date()),
+        ]
+        assert split_date_range(start_date, end_date, 30) == [(start_date, end_date)]
+        assert split_date_range(end_date, start_date, 4) == []
+
+class TestGeoUtils:
+    """Tests for geo_utils.py"""
+    
+    def test_snap_coordinate(self):
+        """Test snapping coordinates to a grid"""
+        assert snap_coordinate(40.7128, 0.1) == 40.7
+        assert snap_coordinate(-74.0060, 0.1) == -74.0
+        assert snap_coordinate(51.5074, 0.25) == 51.5
+        assert snap_coordinate(51.38, 0.25) == 51.5
+        assert snap_coordinate(40.7128, 0) == 40.7128
+
+class TestPartitionUtils:
+    """Tests for partition_utils.py"""
+    
+    def test_interval_bounds(self):
+        """Test the partition ranges of yearly and monthly partitions"""
+        day = datetime(2024, 12, 31).date()
+        
+        # Verify
+        assert interval_bounds(day, "year") == (datetime(2024, 1, 1).date(), datetime(2025, 1, 1).date())
+        assert interval_bounds(day, "month") == (datetime(2024, 12, 1).date(), datetime(2025, 1, 1).date())
+        assert partition_name(datetime(2024, 1, 1).date(), "year") == "weather_weatherdata_2024"
+        assert partition_name(datetime(2024, 12, 1).date(), "month") == "weather_weatherdata_2024_12"
+    
+    def test_ensure_partitions_without_postgresql(self):
+        """Test that nothing is created on databases without partitioning"""
+        connection = MagicMock(vendor='sqlite')
+        
+        # Verify
+        assert ensure_partitions(connection, [datetime(2024, 1, 1).date()]) == []
+        connection.cursor.assert_not_called()
+    
+    @pytest.mark.skipif(connection.vendor == 'postgresql', reason="Needs a database without partitioning")
+    def test_create_weather_partitions_without_postgresql(self):
+        """Test that the command refuses to run DDL on other databases"""
+        with pytest.raises(CommandError, match="PostgreSQL"):
+            call_command('create_weather_partitions', '--convert', stdout=io.StringIO())
+
+def count_rows(table):
+    """Count the rows of a table or partition"""
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT count(*) FROM {table}")
+        return cursor.fetchone()[0]
+
+@pytest.mark.skipif(connection.vendor != 'postgresql', reason="Partitioning needs PostgreSQL")
+@pytest.mark.django_db
+class TestPartitionUtilsPostgres:
+    """Tests converting the weather data table, PostgreSQL only"""
+    
+    @pytest.fixture
+    def stored(self):
+        """Fixture storing rows over two past years, returning the stored dates"""
+        dates = [datetime(2023, 6, 1).date(), datetime(2023, 12, 31).date(), datetime(2024, 1, 1).date()]
+        WeatherService.store_weather_data("London", [
+            {"date": date_obj.isoformat(), "temperature": 10.0 + i} for i, date_obj in enumerate(dates)
+        ])
+        yield dates
+        reset_partition_cache()
+    
+    def test_partition_populated_table(self, stored):
+        """Test that converting keeps the rows, their ids and the (city, date) upserts"""
+        ids = set(WeatherData.objects.values_list('id', flat=True))
+        
+        partition_weather_table(connection, "year", 1)
+        counts = WeatherService.store_weather_data("London", [
+            {"date": "2023-06-01", "temperature": 0.0},
+            {"date": "2023-12-31", "temperature": 11.0},
+            {"date": "2023-07-01", "temperature": 5.0},
+        ])
+        
+        # Verify
+        assert is_partitioned(connection)
+        bounds = get_partition_bounds(connection)
+        assert bounds[0] == interval_bounds(stored[0], "year")
+        assert interval_bounds(datetime.now().date(), "year") in bounds
+        assert counts == {"created": 1, "updated": 1, "unchanged": 1}
+        assert WeatherData.objects.count() == 4
+        assert WeatherData.objects.get(date=stored[0]).temperature == 0.0
+        assert ids < set(WeatherData.objects.values_list('id', flat=True))
+        assert max(ids) < WeatherData.objects.get(date="2023-07-01").id
+        assert count_rows("weather_weatherdata_2023") == 3
+        assert count_rows("weather_weatherdata_2024") == 1
+        assert count_rows(DEFAULT_PARTITION) == 0
+    
+    def test_create_partition_moves_default_rows(self, stored):
+        """Test that a new partition takes over its rows from the default partition"""
+        partition_weather_table(connection, "year", 0)
+        future = interval_bounds(datetime.now().date(), "year")[1]
+        future = future.replace(year=future.year + 1)
+        WeatherService.store_weather_data("London", [{"date": future.isoformat(), "temperature": 1.0}])
+        assert count_rows(DEFAULT_PARTITION) == 1
+        start, end = interval_bounds(future, "year")
+        
+        # Verify
+        assert create_partition(connection, start, end, partition_name(start, "year"))
+        assert not create_partition(connection, start, end, partition_name(start, "year"))
+        assert count_rows(DEFAULT_PARTITION) == 0
+        assert count_rows(partition_name(start, "year")) == 1
+        assert WeatherData.objects.count() == 4
+    
+    def test_unpartition(self, stored):
+        """Test that converting back gives a plain table with the same rows and upserts"""
+        partition_weather_table(connection, "year", 1)
+        unpartition_weather_table(connection)
+        counts = WeatherService.store_weather_data("London", [
+            {"date": "2023-06-01", "temperature": 0.0},
+            {"date": "2023-07-01", "temperature": 5.0},
+        ])
+        
+        # Verify
+        assert not is_partitioned(connection)
+        assert get_partition_bounds(connection) == []
+        assert counts == {"created": 1, "updated": 1, "unchanged": 0}
+        assert WeatherData.objects.count() == 4
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT indexname FROM pg_indexes WHERE tablename = %s AND indexname = 'weather_date_brin_idx'",
+                ["weather_weatherdata"]
+            )
+            assert cursor.fetchall() == []
+    
+    def test_create_weather_partitions_command(self, stored):
+        """Test that the command converts the table and creates the upcoming partitions"""
+        out = io.StringIO()
+        call_command('create_weather_partitions', '--convert', '--interval', 'year', '--ahead', '2', stdout=out)
+        
+        # Verify
+        assert "Partitioned the weather data table by year" in out.getvalue()
+        assert is_partitioned(connection)
+        assert WeatherData.objects.count() == 3
 
 class TestCacheUtils:
     """Tests for cache_utils.py"""
     
+    @pytest.fixture
+    def local_cache(self):
+        """Fixture replacing the shared cache with an isolated in-memory cache"""
+        local_cache = LocMemCache("test_cache_utils", {})
+        with patch('weather.utils.cache_utils.cache', local_cache):
+            yield local_cache
+        local_cache.clear()
+    
     @patch('weather.utils.cache_utils.cache.get_or_set')
     def test_get_or_set(self, mock_cache_get_or_set):
         """Test the get_or_set method"""
@@ -52,11 +264,354 @@ class TestCacheUtils:
             return value
         
         # Call the method
-        result = CacheManager.get_or_set(key, getter_func, timeout)
+        result = CacheManager.get_or_set(
+            key, getter_func, timeout, single_flight=False, stale_while_revalidate=False
+        )
         
         # Verify
         assert result == value
         mock_cache_get_or_set.assert_called_once_with(key, getter_func, timeout)
+    
+    def test_get_or_set_single_flight_miss(self, local_cache):
+        """Test that a miss computes the value once and releases the lock"""
+        getter_func = MagicMock(return_value="fresh_value")
+        
+        # Call the method twice
+        assert CacheManager.get_or_set("test_key", getter_func, 3600) == "fresh_value"
+        assert CacheManager.get_or_set("test_key", getter_func, 3600) == "fresh_value"
+        
+        # Verify the value was computed once and the lock is gone
+        getter_func.assert_called_once()
+        assert local_cache.get("lock_test_key") is None
+    
+    def test_get_or_set_single_flight_waits_for_lock_holder(self, local_cache):
+        """Test that a waiter reuses the value computed by the lock holder"""
+        getter_func = MagicMock(return_value="duplicate_value")
+        
+        # Simulate another worker holding the lock and publishing the value shortly after
+        local_cache.add("lock_test_key", "other_worker", 30)
+        timer = threading.Timer(0.1, local_cache.set, args=("test_key", "leader_value", 3600))
+        timer.start()
+        
+        try:
+            result = CacheManager.get_or_set("test_key", getter_func, 3600)
+        finally:
+            timer.cancel()
+        
+        # Verify the waiter did not repeat the work and was counted
+        assert result == "leader_value"
+        getter_func.assert_not_called()
+        assert CacheManager.get_stats()["single_flight_coalesced"] == 1
+    
+    @patch('weather.utils.cache_utils.CACHE_LOCK_WAIT_TIMEOUT', 0.1)
+    def test_get_or_set_single_flight_wait_timeout(self, local_cache):
+        """Test that a waiter computes the value itself when the lock holder stalls"""
+        getter_func = MagicMock(return_value="fresh_value")
+        
+        # Simulate a crashed worker that never releases the lock
+        local_cache.add("lock_test_key", "crashed_worker", 30)
+        
+        result = CacheManager.get_or_set("test_key", getter_func, 3600)
+        
+        # Verify
+        assert result == "fresh_value"
+        getter_func.assert_called_once()
+        assert CacheManager.get_stats()["single_flight_wait_timeouts"] == 1
+    
+    def test_single_flight_lock_on_redis(self, local_cache):
+        """Test that the lock is taken with SET NX and released by an atomic compare-and-delete"""
+        client = MagicMock()
+        client.set.return_value = True
+        
+        with patch('weather.utils.cache_utils.get_redis_client', return_value=client):
+            assert CacheManager.get_or_set("test_key", lambda: "fresh_value", 3600) == "fresh_value"
+        
+        # Verify
+        lock_key = local_cache.make_key("lock_test_key")
+        token = client.set.call_args.args[1]
+        client.set.assert_called_once()
+        assert client.set.call_args.args[0] == lock_key
+        assert client.set.call_args.kwargs["nx"]
+        client.eval.assert_called_once_with(RELEASE_LOCK_SCRIPT, 1, lock_key, token)
+        client.delete.assert_not_called()
+    
+    def test_get_or_set_stores_soft_expiry(self, local_cache):
+        """Test that new entries carry a soft expiry and outlive their timeout"""
+        CacheManager.get_or_set("test_key", lambda: "fresh_value", 60)
+        
+        entry = local_cache.get("test_key")
+        assert isinstance(entry, CacheEntry)
+        assert entry.value == "fresh_value"
+        assert entry.soft_expires_at <= time.time() + 60
+    
+    def test_get_or_set_serves_stale_and_refreshes(self, local_cache):
+        """Test that a stale entry is returned at once and refreshed in the background"""
+        getter_func = MagicMock(return_value="fresh_value")
+        local_cache.set("test_key", CacheEntry("stale_value", time.time() - 1), 3600)
+        executor = ThreadPoolExecutor(max_workers=1)
+        
+        with patch('weather.utils.cache_utils._refresh_executor', executor):
+            result = CacheManager.get_or_set("test_key", getter_func, 3600)
+            executor.shutdown(wait=True)
+        
+        # Verify the stale value was served and then replaced
+        assert result == "stale_value"
+        getter_func.assert_called_once()
+        assert local_cache.get("test_key").value == "fresh_value"
+        assert local_cache.get("lock_test_key") is None
+    
+    def test_get_or_set_stale_refresh_already_running(self, local_cache):
+        """Test that only the lock holder refreshes a stale entry"""
+        getter_func = MagicMock(return_value="fresh_value")
+        local_cache.set("test_key", CacheEntry("stale_value", time.time() - 1), 3600)
+        local_cache.add("lock_test_key", "other_worker", 30)
+        
+        with patch('weather.utils.cache_utils._refresh_executor') as mock_executor:
+            result = CacheManager.get_or_set("test_key", getter_func, 3600)
+        
+        # Verify
+        assert result == "stale_value"
+        mock_executor.submit.assert_not_called()
+    
+    def test_get_many(self, local_cache):
+        """Test reading several keys at once, refreshing the stale ones"""
+        local_cache.set("fresh_key", CacheEntry("fresh_value", time.time() + 60), 3600)
+        local_cache.set("stale_key", CacheEntry("stale_value", time.time() - 1), 3600)
+        getters = {"fresh_key": MagicMock(), "stale_key": MagicMock(), "missing_key": MagicMock()}
+        
+        with patch('weather.utils.cache_utils._refresh_executor') as mock_executor:
+            values = CacheManager.get_many(getters, 3600)
+        
+        # Verify missing keys are left out and only the stale key is refreshed
+        assert values == {"fresh_key": "fresh_value", "stale_key": "stale_value"}
+        mock_executor.submit.assert_called_once()
+    
+    def test_get_or_set_local_tier(self, local_cache):
+        """Test that the local tier serves repeated lookups without the shared cache"""
+        l1 = LocalLRUCache(max_entries=10, max_bytes=1024 * 1024, ttl=60)
+        getter_func = MagicMock(return_value="fresh_value")
+        
+        with patch('weather.utils.cache_utils._local_cache', l1), \
+                patch('weather.utils.cache_utils.get_redis_client', return_value=None):
+            CacheManager.get_or_set("test_key", getter_func, 3600)
+            
+            # Remove the shared copy, the local copy must still be served
+            local_cache.delete("test_key")
+            assert CacheManager.get_or_set("test_key", getter_func, 3600) == "fresh_value"
+            
+            tier_stats = CacheManager.get_tier_stats()
+            
+            # Delete from every tier
+            CacheManager.delete("test_key")
+            assert l1.get("test_key") is None
+        
+        # Verify
+        getter_func.assert_called_once()
+        assert tier_stats["l1"]["hits"] == 1
+        assert tier_stats["l1"]["misses"] == 1
+    
+    def test_handle_invalidation(self):
+        """Test that invalidations from other workers drop the local copy"""
+        l1 = LocalLRUCache(max_entries=10, max_bytes=1024 * 1024, ttl=60)
+        l1.set("test_key", "value")
+        l1.set("other_key", "value")
+        
+        with patch('weather.utils.cache_utils._local_cache', l1):
+            # Messages published by this process are ignored
+            CacheManager._handle_invalidation(f"{CacheManager._invalidation_origin()}|other_key")
+            CacheManager._handle_invalidation(b"other-host:1|test_key")
+        
+        # Verify
+        assert l1.get("test_key") is None
+        assert l1.get("other_key") == "value"
+    
+    def test_time_to_refresh(self, local_cache):
+        """Test the remaining freshness of soft-expiring and plain entries"""
+        CacheManager.set("soft_key", "value", 60)
+        CacheManager.set("plain_key", "value", 60, stale_while_revalidate=False)
+        local_cache.set("stale_key", CacheEntry("value", time.time() - 1), 60)
+        
+        # Verify
+        assert 50 < CacheManager.time_to_refresh("soft_key") <= 60
+        assert CacheManager.time_to_refresh("stale_key") == 0
+        # LocMemCache does not report expiries, plain entries are always due
+        assert CacheManager.time_to_refresh("plain_key") == 0
+        assert CacheManager.time_to_refresh("missing_key") is None
+
+class TestLocalLRUCache:
+    """Tests for local_cache.py"""
+    
+    def test_evicts_least_recently_used_entry(self):
+        """Test eviction once the entry limit is reached"""
+        l1 = LocalLRUCache(max_entries=2, max_bytes=1024 * 1024, ttl=60)
+        l1.set("a", 1)
+        l1.set("b", 2)
+        l1.get("a")
+        l1.set("c", 3)
+        
+        # Verify "b" was the least recently used entry
+        assert l1.get("b") is None
+        assert l1.get("a") == 1
+        assert l1.get("c") == 3
+        assert l1.stats()["evictions"] == 1
+    
+    def test_evicts_to_stay_within_byte_limit(self):
+        """Test eviction once the size limit is reached"""
+        l1 = LocalLRUCache(max_entries=100, max_bytes=300, ttl=60)
+        l1.set("a", "x" * 200)
+        l1.set("b", "y" * 200)
+        
+        # Verify
+        assert l1.get("a") is None
+        assert l1.get("b") == "y" * 200
+        assert l1.stats()["bytes"] <= 300
+    
+    def test_entries_expire(self):
+        """Test that entries are dropped after their time-to-live"""
+        l1 = LocalLRUCache(max_entries=10, max_bytes=1024, ttl=0.05)
+        l1.set("a", 1)
+        time.sleep(0.1)
+        
+        # Verify
+        assert l1.get("a") is None
+        assert l1.stats()["entries"] == 0
+
+@patch('weather.utils.rate_limiter.get_redis_client', return_value=None)
+class TestTokenBucketRateLimiter:
+    """Tests for rate_limiter.py (process-local bucket)"""
+    
+    def test_waits_only_when_budget_is_used_up(self, mock_redis):
+        """Test that the burst is served at once and later calls wait for a token"""
+        limiter = TokenBucketRateLimiter("test", rate=20, capacity=2)
+        
+        # The burst does not wait
+        assert limiter.acquire() == 0
+        assert limiter.acquire() == 0
+        
+        # The next token takes about 1 / rate seconds
+        waited = limiter.acquire()
+        assert 0 < waited < 1
+        
+        stats = limiter.stats()
+        assert stats["acquired"] == 3
+        assert stats["waited"] == 1
+        assert stats["wait_seconds_max"] == waited
+    
+    def test_background_yields_to_waiting_interactive(self, mock_redis):
+        """Test that background callers do not take tokens while interactive callers wait"""
+        limiter = TokenBucketRateLimiter("test", rate=20, capacity=1)
+        
+        # Simulate an interactive caller already queued for a token
+        limiter._local_waiters[PRIORITY_INTERACTIVE]["waiter"] = time.monotonic() + 60
+        
+        assert limiter._try_acquire(PRIORITY_BACKGROUND, "background_waiter", None) > 0
+        assert limiter._try_acquire(PRIORITY_INTERACTIVE, "waiter", None) == 0
+        assert limiter.stats()["queue_depth"] == {PRIORITY_INTERACTIVE: 0, PRIORITY_BACKGROUND: 1}
+    
+    def test_priority_context(self, mock_redis):
+        """Test that the context priority is used when none is given"""
+        limiter = TokenBucketRateLimiter("test", rate=20, capacity=1)
+        
+        with patch.object(limiter, '_try_acquire', return_value=0) as mock_try:
+            with TokenBucketRateLimiter.priority(PRIORITY_BACKGROUND):
+                limiter.acquire()
+            limiter.acquire()
+        
+        # Verify
+        assert mock_try.call_args_list[0].args[0] == PRIORITY_BACKGROUND
+        assert mock_try.call_args_list[1].args[0] == PRIORITY_INTERACTIVE
+    
+    def test_timeout(self, mock_redis):
+        """Test that acquire gives up when no token is available in time"""
+        limiter = TokenBucketRateLimiter("test", rate=0.1, capacity=1)
+        limiter.acquire()
+        
+        with pytest.raises(TimeoutError):
+            limiter.acquire(timeout=0.1)
+        
+        # Verify the caller no longer counts as waiting
+        stats = limiter.stats()
+        assert stats["timeouts"] == 1
+        assert stats["queue_depth"][PRIORITY_INTERACTIVE] == 0
+
+@patch('weather.utils.popularity.get_redis_client', return_value=None)
+class TestPopularityTracker:
+    """Tests for popularity.py (process-local counts)"""
+    
+    def test_top(self, mock_redis):
+        """Test that members are ranked by their number of requests"""
+        tracker = PopularityTracker("test", window_days=7)
+        for member in ["a", "b", "a", "c", "a", "b"]:
+            tracker.record(member)
+        
+        # Verify
+        assert tracker.top(2) == [("a", 3), ("b", 2)]
+        tracker.clear()
+        assert tracker.top(2) == []
+    
+    def test_old_days_leave_the_window(self, mock_redis):
+        """Test that requests older than the window are not counted"""
+        tracker = PopularityTracker("test", window_days=2)
+        with patch('weather.utils.popularity.date') as mock_date:
+            mock_date.today.return_value = datetime(2025, 9, 1).date()
+            tracker.record("a")
+            tracker.record("a")
+            mock_date.today.return_value = datetime(2025, 9, 2).date()
+            tracker.record("b")
+            assert tracker.top(10) == [("a", 2), ("b", 1)]
+            
+            mock_date.today.return_value = datetime(2025, 9, 3).date()
+            assert tracker.top(10) == [("b", 1)]
+
+class TestResponseCache:
+    """Tests for response_cache.py"""
+    
+    @pytest.fixture(autouse=True)
+    def local_cache(self):
+        """Fixture replacing the shared cache with an isolated in-memory cache"""
+        local_cache = LocMemCache("test_response_cache", {})
+        with patch('weather.utils.response_cache.cache', local_cache):
+            yield local_cache
+        local_cache.clear()
+    
+    def test_invalidate_group(self, local_cache):
+        """Test that invalidating a group drops its entries only"""
+        value, generation = ResponseCache.get("paris_1", "paris")
+        assert value is None
+        ResponseCache.set("paris_1", generation, b"body", timeout=60)
+        ResponseCache.set("rome_1", ResponseCache.get("rome_1", "rome")[1], b"other", timeout=60)
+        
+        assert ResponseCache.get("paris_1", "paris")[0] == b"body"
+        
+        ResponseCache.invalidate("paris")
+        
+        # Verify
+        assert ResponseCache.get("paris_1", "paris")[0] is None
+        assert ResponseCache.get("rome_1", "rome")[0] == b"other"
+    
+    def test_evicted_generation(self, local_cache):
+        """Test that entries miss once the generation of their group was evicted"""
+        generation = ResponseCache.get("paris_1", "paris")[1]
+        ResponseCache.set("paris_1", generation, b"body", timeout=60)
+        
+        local_cache.delete("response_generation_paris")
+        
+        # Verify
+        assert ResponseCache.get("paris_1", "paris")[0] is None
+
+class TestHttpCache:
+    """Tests for http_cache.py"""
+    
+    def test_accepts_encoding(self):
+        """Test Accept-Encoding matching with q-values"""
+        assert accepts_encoding("gzip, deflate", "gzip")
+        assert accepts_encoding("deflate;q=0.5, GZIP;q=0.8", "gzip")
+        assert accepts_encoding("*", "gzip")
+        assert not accepts_encoding("gzip;q=0", "gzip")
+        assert not accepts_encoding("gzip; q=0.0, *", "gzip")
+        assert not accepts_encoding("*;q=0, identity", "gzip")
+        assert not accepts_encoding("deflate, br", "gzip")
+        assert not accepts_encoding("", "gzip")
 
 class TestErrorHandlers:
     """Tests for error_handlers.py"""
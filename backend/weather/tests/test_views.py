@@ -1,11 +1,22 @@
+import gzip
+import io
+import json
 import pytest
+import pyarrow as pa
+import pyarrow.parquet as pq
 from unittest.mock import patch, MagicMock
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework.test import APIRequestFactory, force_authenticate
 from rest_framework import status
 from datetime import date, timedelta
-from weather.views import WeatherAverageView, WeatherDataListView
+from weather.integration.services.weather import WeatherService
+from weather.views import WeatherAverageView, WeatherBatchAverageView, WeatherDataExportView, WeatherDataListView
 from weather.models import WeatherData
+from weather.utils.export_utils import iter_parquet
 
 @pytest.fixture
 def api_factory():
@@ -21,9 +32,18 @@ def sample_weather_data():
         {"date": "2025-09-12", "temperature": 24.3},
     ]
 
+@pytest.mark.django_db
 class TestWeatherAverageView:
     """Tests for WeatherAverageView"""
     
+    @pytest.fixture(autouse=True)
+    def response_cache(self):
+        """Fixture isolating the response cache of every test"""
+        local_cache = LocMemCache("test_response_cache", {})
+        with patch('weather.utils.response_cache.cache', local_cache):
+            yield local_cache
+        local_cache.clear()
+    
     def test_missing_parameters(self, api_factory):
         """Test validation when parameters are missing"""
         view = WeatherAverageView.as_view()
@@ -62,16 +82,14 @@ class TestWeatherAverageView:
         response = view(request)
         assert response.status_code == status.HTTP_400_BAD_REQUEST
     
-    @patch('weather.views.WeatherService.get_historical_weather')
-    @patch('weather.views.WeatherService.calculate_average_temperature')
+    @patch('weather.views.WeatherService.get_average_summary')
     @patch('weather.views.get_date_range')
-    def test_successful_response(self, mock_date_range, mock_calc_avg, mock_get_weather, api_factory, sample_weather_data):
+    def test_successful_response(self, mock_date_range, mock_get_average, api_factory):
         """Test successful response"""
         view = WeatherAverageView.as_view()
         
         # Setup mocks
-        mock_get_weather.return_value = sample_weather_data
-        mock_calc_avg.return_value = 25.53
+        mock_get_average.return_value = {"average": 25.53, "day_count": 3, "last_modified": None}
         start_date = date(2025, 9, 10)
         end_date = date(2025, 9, 12)
         mock_date_range.return_value = (start_date, end_date)
@@ -89,17 +107,16 @@ class TestWeatherAverageView:
         assert response.data['end_date'] == end_date.isoformat()
         
         # Verify mocks were called correctly
-        mock_get_weather.assert_called_once_with('New York', 3)
-        mock_calc_avg.assert_called_once_with(sample_weather_data)
+        mock_get_average.assert_called_once_with('New York', 3)
         mock_date_range.assert_called_once_with(3)
     
-    @patch('weather.views.WeatherService.get_historical_weather')
-    def test_weather_service_error(self, mock_get_weather, api_factory):
+    @patch('weather.views.WeatherService.get_average_summary')
+    def test_weather_service_error(self, mock_get_average, api_factory):
         """Test error handling when WeatherService raises an exception"""
         view = WeatherAverageView.as_view()
         
         # Setup mock to raise an error
-        mock_get_weather.side_effect = ValueError("City not found")
+        mock_get_average.side_effect = ValueError("City not found")
         
         # Make request
         request = api_factory.get('/api/weather/average', {'city': 'NonExistentCity', 'days': 3})
@@ -110,15 +127,15 @@ class TestWeatherAverageView:
         assert "City not found" in str(response.data)
         
         # Verify mock was called
-        mock_get_weather.assert_called_once_with('NonExistentCity', 3)
+        mock_get_average.assert_called_once_with('NonExistentCity', 3)
     
-    @patch('weather.views.WeatherService.get_historical_weather')
-    def test_unexpected_error(self, mock_get_weather, api_factory):
+    @patch('weather.views.WeatherService.get_average_summary')
+    def test_unexpected_error(self, mock_get_average, api_factory):
         """Test handling of unexpected errors"""
         view = WeatherAverageView.as_view()
         
         # Setup mock to raise an unexpected error
-        mock_get_weather.side_effect = Exception("Unexpected error")
+        mock_get_average.side_effect = Exception("Unexpected error")
         
         # Make request
         request = api_factory.get('/api/weather/average', {'city': 'New York', 'days': 3})
@@ -129,7 +146,178 @@ class TestWeatherAverageView:
         assert "unexpected error" in str(response.data['error']).lower()
         
         # Verify mock was called
-        mock_get_weather.assert_called_once_with('New York', 3)
+        mock_get_average.assert_called_once_with('New York', 3)
+    
+    @patch('weather.views.WeatherService.get_average_summary')
+    @patch('weather.views.get_date_range')
+    def test_conditional_request(self, mock_date_range, mock_get_average, api_factory,
+                                 django_capture_on_commit_callbacks):
+        """Test validators, cache headers and 304 responses for unchanged stored data"""
+        view = WeatherAverageView.as_view()
+        written = timezone.now()
+        mock_get_average.side_effect = [
+            {"average": 25.0, "day_count": 2, "last_modified": written},
+            {"average": 25.5, "day_count": 2, "last_modified": written + timedelta(minutes=1)},
+        ]
+        mock_date_range.return_value = (date(2025, 9, 10), date(2025, 9, 11))
+        
+        response = view(api_factory.get('/api/weather/average', {'city': 'New York', 'days': 1}))
+        etag = response['ETag']
+        
+        # Verify
+        assert response.status_code == status.HTTP_200_OK
+        assert response.has_header('Last-Modified')
+        assert 'public' in response['Cache-Control']
+        assert int(response['Cache-Control'].split('max-age=')[1].split(',')[0]) <= 300
+        
+        # The same data is not computed again
+        response = view(api_factory.get(
+            '/api/weather/average', {'city': 'New York', 'days': 1}, HTTP_IF_NONE_MATCH=etag
+        ))
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response['ETag'] == etag
+        assert mock_get_average.call_count == 1
+        
+        # An average recomputed from rewritten data gets a new ETag
+        with django_capture_on_commit_callbacks(execute=True):
+            WeatherService.store_weather_data("New York", [{"date": "2025-09-11", "temperature": 27.0}])
+        with CaptureQueriesContext(connection) as queries:
+            response = view(api_factory.get(
+                '/api/weather/average', {'city': 'New York', 'days': 1}, HTTP_IF_NONE_MATCH=etag
+            ))
+        assert response.status_code == status.HTTP_200_OK
+        assert response['ETag'] != etag
+        # The version comes with the average, not from a query of its own
+        assert len(queries) == 0
+    
+    @patch('weather.views.WeatherService.get_average_summary')
+    @patch('weather.views.get_date_range')
+    def test_response_cache(self, mock_date_range, mock_get_average, api_factory,
+                            django_capture_on_commit_callbacks):
+        """Test that spellings of a city share the rendered response until its data is rewritten"""
+        view = WeatherAverageView.as_view()
+        mock_get_average.return_value = {"average": 25.0, "day_count": 2, "last_modified": timezone.now()}
+        mock_date_range.return_value = (date(2025, 9, 10), date(2025, 9, 11))
+        first = view(api_factory.get('/api/weather/average', {'city': 'New York', 'days': 1}))
+        first.render()
+        
+        with patch('weather.views.WeatherAverageRequestSerializer') as mock_serializer:
+            response = view(api_factory.get('/api/weather/average', {'city': ' new  YORK ', 'days': '1'}))
+        
+        # Verify
+        mock_serializer.assert_not_called()
+        assert mock_get_average.call_count == 1
+        assert response.status_code == status.HTTP_200_OK
+        assert response['Content-Type'] == 'application/json'
+        assert response.content == first.content.replace(b'"New York"', b'"new  YORK"')
+        assert response['ETag'] != first['ETag']
+        
+        # Rewritten data is computed again
+        with django_capture_on_commit_callbacks(execute=True):
+            WeatherService.store_weather_data("New York", [{"date": "2025-09-11", "temperature": 27.0}])
+        view(api_factory.get('/api/weather/average', {'city': 'New York', 'days': 1}))
+        assert mock_get_average.call_count == 2
+    
+    @patch('weather.integration.services.weather.get_date_range')
+    @patch('weather.views.get_date_range')
+    def test_rewritten_data_serves_new_average(self, mock_date_range, mock_service_date_range, api_factory,
+                                               django_capture_on_commit_callbacks):
+        """Test that rewriting the data of a city drops its cached average along with its responses"""
+        view = WeatherAverageView.as_view()
+        mock_date_range.return_value = mock_service_date_range.return_value = (date(2025, 9, 10), date(2025, 9, 11))
+        WeatherService.store_weather_data("New York", [
+            {"date": "2025-09-10", "temperature": 25.0},
+            {"date": "2025-09-11", "temperature": 27.0},
+        ])
+        
+        with patch('weather.utils.cache_utils.cache', LocMemCache("test_average_summary", {})):
+            first = view(api_factory.get('/api/weather/average', {'city': 'New York', 'days': 1}))
+            with django_capture_on_commit_callbacks(execute=True):
+                WeatherService.store_weather_data("New York", [{"date": "2025-09-11", "temperature": 29.0}])
+            second = view(api_factory.get('/api/weather/average', {'city': 'New York', 'days': 1}))
+        
+        # Verify
+        assert first.data["average_temperature"] == 26.0
+        assert second.data["average_temperature"] == 27.0
+        assert second['ETag'] != first['ETag']
+    
+    @patch('weather.views.WeatherService.get_average_summary')
+    def test_lean_serialization(self, mock_get_average, api_factory):
+        """Test that the lean response data matches the response serializer"""
+        view = WeatherAverageView.as_view()
+        mock_get_average.return_value = {"average": 25, "day_count": 0, "last_modified": None}
+        
+        lean = view(api_factory.get('/api/weather/average', {'city': 'Paris', 'days': 3}))
+        with patch('weather.views.API_LEAN_SERIALIZATION', False):
+            serialized = view(api_factory.get('/api/weather/average', {'city': 'Paris', 'days': 3}))
+        
+        # Verify
+        assert lean.data == serialized.data
+        assert lean.render().content == serialized.render().content
+    
+    def test_response_cache_skips_invalid_parameters(self, api_factory):
+        """Test that parameters the serializer rejects are not answered from the cache"""
+        view = WeatherAverageView.as_view()
+        
+        with patch('weather.views.ResponseCache.get') as mock_get:
+            too_long = view(api_factory.get('/api/weather/average', {'city': 'x' * 101, 'days': 1}))
+            not_a_number = view(api_factory.get('/api/weather/average', {'city': 'Paris', 'days': '1.5'}))
+        
+        # Verify
+        mock_get.assert_not_called()
+        assert too_long.status_code == status.HTTP_400_BAD_REQUEST
+        assert not_a_number.status_code == status.HTTP_400_BAD_REQUEST
+
+class TestWeatherBatchAverageView:
+    """Tests for WeatherBatchAverageView"""
+    
+    def test_invalid_parameters(self, api_factory):
+        """Test validation of the request body"""
+        view = WeatherBatchAverageView.as_view()
+        
+        # Test without cities
+        request = api_factory.post('/api/weather/average/batch', {'cities': [], 'days': 3}, format='json')
+        assert view(request).status_code == status.HTTP_400_BAD_REQUEST
+        
+        # Test with invalid days
+        request = api_factory.post('/api/weather/average/batch', {'cities': ['London'], 'days': 0}, format='json')
+        assert view(request).status_code == status.HTTP_400_BAD_REQUEST
+    
+    @patch('weather.views.WeatherService.get_historical_weather_many')
+    @patch('weather.views.get_date_range')
+    def test_successful_response(self, mock_date_range, mock_get_many, api_factory, sample_weather_data):
+        """Test per-city results and errors in one response"""
+        view = WeatherBatchAverageView.as_view()
+        
+        # Setup mocks
+        mock_date_range.return_value = (date(2025, 9, 10), date(2025, 9, 12))
+        mock_get_many.return_value = (
+            {'New York': sample_weather_data},
+            {'Atlantis': 'Could not find coordinates for city: Atlantis'}
+        )
+        
+        # Make request
+        request = api_factory.post(
+            '/api/weather/average/batch',
+            {'cities': ['New York', 'Atlantis'], 'days': 3},
+            format='json'
+        )
+        response = view(request)
+        
+        # Check response
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['days'] == 3
+        assert response.data['results'] == [{
+            'city': 'New York',
+            'average_temperature': 25.53,
+            'days': 3,
+            'start_date': date(2025, 9, 10),
+            'end_date': date(2025, 9, 12)
+        }]
+        assert response.data['errors'] == [
+            {'city': 'Atlantis', 'error': 'Could not find coordinates for city: Atlantis'}
+        ]
+        mock_get_many.assert_called_once_with(['New York', 'Atlantis'], 3)
 
 @pytest.mark.django_db
 class TestWeatherDataListView:
@@ -155,7 +343,8 @@ class TestWeatherDataListView:
         
         # Check response
         assert response.status_code == status.HTTP_200_OK
-        assert len(response.data) == 5  # All 5 records
+        assert len(response.data['results']) == 5  # All 5 records
+        assert response.data['next'] is None
     
     def test_filter_by_city(self, api_factory, setup_weather_data):
         """Test filtering by city"""
@@ -167,8 +356,8 @@ class TestWeatherDataListView:
         
         # Check response
         assert response.status_code == status.HTTP_200_OK
-        assert len(response.data) == 2  # Only New York records
-        for item in response.data:
+        assert len(response.data['results']) == 2  # Only New York records
+        for item in response.data['results']:
             assert item['city'] == 'New York'
     
     def test_filter_by_date_range(self, api_factory, setup_weather_data):
@@ -181,8 +370,8 @@ class TestWeatherDataListView:
         
         # Check response
         assert response.status_code == status.HTTP_200_OK
-        assert len(response.data) == 2  # Only records for 2025-09-11
-        for item in response.data:
+        assert len(response.data['results']) == 2  # Only records for 2025-09-11
+        for item in response.data['results']:
             assert item['date'] == '2025-09-11'
     
     def test_combined_filters(self, api_factory, setup_weather_data):
@@ -199,6 +388,231 @@ class TestWeatherDataListView:
         
         # Check response
         assert response.status_code == status.HTTP_200_OK
-        assert len(response.data) == 1  # Only one record matches all criteria
-        assert response.data[0]['city'] == 'New York'
-        assert response.data[0]['date'] == '2025-09-10'
\ No newline at end of file
+        assert len(response.data['results']) == 1  # Only one record matches all criteria
+        assert response.data['results'][0]['city'] == 'New York'
+        assert response.data['results'][0]['date'] == '2025-09-10'    
+    def test_filter_by_city_match_modes(self, api_factory, setup_weather_data):
+        """Test the normalized city match modes"""
+        view = WeatherDataListView.as_view()
+        
+        def cities(params):
+            response = view(api_factory.get('/api/weather/data', params))
+            assert response.status_code == status.HTTP_200_OK
+            return sorted({item['city'] for item in response.data['results']})
+        
+        # Check responses
+        assert cities({'city': ' NEW-york', 'match': 'exact'}) == ['New York']
+        assert cities({'city': 'new', 'match': 'exact'}) == []
+        assert cities({'city': 'lon', 'match': 'prefix'}) == ['London']
+        assert cities({'city': 'ON', 'match': 'contains'}) == ['London']
+        assert cities({'city': 'o'}) == ['London', 'New York', 'Tokyo']
+    
+    def test_filter_by_city_invalid_match(self, api_factory, setup_weather_data):
+        """Test validation of the match mode"""
+        view = WeatherDataListView.as_view()
+        
+        request = api_factory.get('/api/weather/data', {'city': 'London', 'match': 'regex'})
+        response = view(request)
+        
+        # Check response
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'match' in response.data
+    
+    def test_keyset_pagination(self, api_factory, setup_weather_data):
+        """Test walking all pages with the next cursor"""
+        view = WeatherDataListView.as_view()
+        
+        # Follow the next links two records at a time
+        rows = []
+        url = 'http://testserver/api/weather/data?page_size=2'
+        pages = 0
+        while url:
+            response = view(api_factory.get(url))
+            assert response.status_code == status.HTTP_200_OK
+            assert len(response.data['results']) <= 2
+            rows.extend(response.data['results'])
+            url = response.data['next']
+            pages += 1
+        
+        # Check every record was listed once, newest first
+        assert pages == 3
+        assert len({item['id'] for item in rows}) == 5
+        dates_ids = [(item['date'], item['id']) for item in rows]
+        assert dates_ids == sorted(dates_ids, reverse=True)
+    
+    def test_keyset_pagination_invalid_cursor(self, api_factory, setup_weather_data):
+        """Test that a malformed cursor is rejected"""
+        view = WeatherDataListView.as_view()
+        
+        request = api_factory.get('/api/weather/data', {'cursor': 'not-a-cursor'})
+        response = view(request)
+        
+        # Check response
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+    
+    @patch('weather.pagination.KeysetPagination.max_page_size', 3)
+    def test_keyset_pagination_max_page_size(self, api_factory, setup_weather_data):
+        """Test that the page size is capped"""
+        view = WeatherDataListView.as_view()
+        
+        request = api_factory.get('/api/weather/data', {'page_size': 1000})
+        response = view(request)
+        
+        # Check response
+        assert len(response.data['results']) == 3
+        assert response.data['next'] is not None
+    
+    def test_conditional_request(self, api_factory, setup_weather_data):
+        """Test validators, cache headers and 304 responses of history pages"""
+        view = WeatherDataListView.as_view()
+        
+        response = view(api_factory.get('/api/weather/data', {'city': 'London'}))
+        etag = response['ETag']
+        
+        # Verify
+        assert response.status_code == status.HTTP_200_OK
+        assert response.has_header('Last-Modified')
+        assert 'max-age=300' in response['Cache-Control']
+        
+        response = view(api_factory.get('/api/weather/data', {'city': 'London'}, HTTP_IF_NONE_MATCH=etag))
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert not response.content
+        
+        # Another page and a rewritten row are different bodies
+        response = view(api_factory.get('/api/weather/data', {'city': 'Tokyo'}, HTTP_IF_NONE_MATCH=etag))
+        assert response.status_code == status.HTTP_200_OK
+        WeatherService.bulk_upsert_weather_data([{"city": "London", "date": "2025-09-11", "temperature": 19.0}])
+        response = view(api_factory.get('/api/weather/data', {'city': 'London'}, HTTP_IF_NONE_MATCH=etag))
+        assert response.status_code == status.HTTP_200_OK
+    
+    def test_lean_serialization(self, api_factory, setup_weather_data):
+        """Test that the lean page data matches WeatherDataSerializer"""
+        view = WeatherDataListView.as_view()
+        
+        lean = view(api_factory.get('/api/weather/data'))
+        with patch('weather.views.API_LEAN_SERIALIZATION', False):
+            serialized = view(api_factory.get('/api/weather/data'))
+        
+        # Verify
+        assert lean.data == serialized.data
+        assert lean.render().content == serialized.render().content
+    
+    def test_past_history_max_age(self, api_factory, setup_weather_data):
+        """Test that pages ending before today may be cached longer"""
+        view = WeatherDataListView.as_view()
+        
+        response = view(api_factory.get('/api/weather/data', {'end_date': '2025-09-10'}))
+        
+        # Verify
+        assert 'max-age=86400' in response['Cache-Control']
+
+@pytest.mark.django_db
+class TestWeatherDataExportView:
+    """Tests for WeatherDataExportView"""
+    
+    @pytest.fixture
+    def setup_weather_data(self):
+        """Fixture to create test weather data in the database"""
+        WeatherData.objects.create(city="New York", date="2025-09-10", temperature=25.5)
+        WeatherData.objects.create(city="New York", date="2025-09-11", temperature=26.8)
+        WeatherData.objects.create(city="London", date="2025-09-10", temperature=18.2)
+    
+    def export(self, api_factory, params, **headers):
+        """Request an export and return the response and its body"""
+        view = WeatherDataExportView.as_view()
+        response = view(api_factory.get('/api/weather/history/export', params, **headers))
+        assert response.status_code == status.HTTP_200_OK
+        return response, b"".join(response.streaming_content)
+    
+    @patch('weather.views.EXPORT_CHUNK_SIZE', 1)
+    def test_export_csv(self, api_factory, setup_weather_data):
+        """Test exporting filtered rows as CSV"""
+        response, body = self.export(api_factory, {'city': 'new york'})
+        
+        # Check response
+        assert response['Content-Type'] == 'text/csv'
+        assert 'weather-history.csv' in response['Content-Disposition']
+        lines = body.decode('utf-8').splitlines()
+        assert lines[0] == 'id,city,date,temperature,timestamp'
+        assert [line.split(',')[1:4] for line in lines[1:]] == [
+            ['New York', '2025-09-11', '26.8'],
+            ['New York', '2025-09-10', '25.5'],
+        ]
+    
+    def test_export_ndjson(self, api_factory, setup_weather_data):
+        """Test exporting rows as NDJSON"""
+        response, body = self.export(api_factory, {'export_format': 'ndjson', 'end_date': '2025-09-10'})
+        
+        # Check response
+        assert response['Content-Type'] == 'application/x-ndjson'
+        rows = [json.loads(line) for line in body.decode('utf-8').splitlines()]
+        assert sorted((row['city'], row['date'], row['temperature']) for row in rows) == [
+            ('London', '2025-09-10', 18.2),
+            ('New York', '2025-09-10', 25.5),
+        ]
+    
+    def test_export_timestamps_match_api(self, api_factory, setup_weather_data):
+        """Test that exported timestamps are formatted like the history endpoint"""
+        _, csv_body = self.export(api_factory, {'city': 'London'})
+        _, ndjson_body = self.export(api_factory, {'export_format': 'ndjson', 'city': 'London'})
+        api_rows = WeatherDataListView.as_view()(api_factory.get('/api/weather/data', {'city': 'London'})).data['results']
+        
+        # Verify
+        timestamp = api_rows[0]['timestamp']
+        assert timestamp.endswith('Z')
+        assert csv_body.decode('utf-8').splitlines()[1].split(',')[4] == timestamp
+        assert json.loads(ndjson_body)['timestamp'] == timestamp
+    
+    def test_export_gzip(self, api_factory, setup_weather_data):
+        """Test that the export is compressed when the client accepts gzip"""
+        response, body = self.export(api_factory, {}, HTTP_ACCEPT_ENCODING='gzip, deflate')
+        
+        # Check response
+        assert response['Content-Encoding'] == 'gzip'
+        assert 'Accept-Encoding' in response['Vary']
+        assert len(gzip.decompress(body).decode('utf-8').splitlines()) == 4
+    
+    def test_export_gzip_refused(self, api_factory, setup_weather_data):
+        """Test that gzip with a q-value of 0 is not used"""
+        response, body = self.export(api_factory, {}, HTTP_ACCEPT_ENCODING='gzip;q=0, identity')
+        
+        # Check response
+        assert not response.has_header('Content-Encoding')
+        assert len(body.decode('utf-8').splitlines()) == 4
+    
+    @patch.dict('weather.views.EXPORT_FORMATS', {'parquet': (iter_parquet, 'application/vnd.apache.parquet', 2, False)})
+    def test_export_parquet(self, api_factory, setup_weather_data):
+        """Test exporting typed columns as Parquet row groups"""
+        response, body = self.export(api_factory, {'export_format': 'parquet'}, HTTP_ACCEPT_ENCODING='gzip')
+        
+        # Check response
+        assert response['Content-Type'] == 'application/vnd.apache.parquet'
+        assert not response.has_header('Content-Encoding')
+        parquet_file = pq.ParquetFile(io.BytesIO(body))
+        assert parquet_file.metadata.num_row_groups == 2
+        assert parquet_file.metadata.row_group(0).column(3).statistics.has_min_max
+        table = parquet_file.read()
+        assert table.schema.field('city').type == pa.dictionary(pa.int32(), pa.string())
+        assert table.schema.field('date').type == pa.date32()
+        assert table.schema.field('temperature').type == pa.float32()
+        assert table.column('date').to_pylist() == [date(2025, 9, 11), date(2025, 9, 10), date(2025, 9, 10)]
+    
+    def test_export_arrow(self, api_factory, setup_weather_data):
+        """Test exporting columns as an Arrow IPC stream"""
+        response, body = self.export(api_factory, {'export_format': 'arrow', 'city': 'London'})
+        
+        # Check response
+        assert response['Content-Type'] == 'application/vnd.apache.arrow.stream'
+        table = pa.ipc.open_stream(body).read_all()
+        assert table.column('city').to_pylist() == ['London']
+        assert table.column('temperature').to_pylist() == [pytest.approx(18.2)]
+    
+    def test_export_invalid_format(self, api_factory):
+        """Test validation of the export format"""
+        view = WeatherDataExportView.as_view()
+        
+        request = api_factory.get('/api/weather/history/export', {'export_format': 'xml'})
+        response = view(request)
+        
+        # Check response
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
@@ -1,8 +1,9 @@
 import pytest
+from concurrent.futures import ThreadPoolExecutor
 from unittest.mock import patch, MagicMock
 from weather.integration.clients.weather import WeatherClient
 
-@patch('weather.integration.clients.weather.requests.get')
+@patch('weather.integration.clients.weather.HttpClient.get')
 @patch('weather.integration.clients.weather.CacheManager.get_or_set')
 class TestWeatherClient:
     """Tests for WeatherClient"""
@@ -43,8 +44,8 @@ class TestWeatherClient:
         args, kwargs = mock_requests.call_args
         assert 'params' in kwargs
         params = kwargs['params']
-        assert params['latitude'] == latitude
-        assert params['longitude'] == longitude
+        assert params['latitude'] == 40.72
+        assert params['longitude'] == -74.0
         assert params['start_date'] == start_date
         assert params['end_date'] == end_date
     
@@ -70,4 +71,93 @@ class TestWeatherClient:
             WeatherClient.get_historical_weather(latitude, longitude, start_date, end_date)
         
         # Verify the error message
-        assert "Error fetching weather data" in str(excinfo.value) or "Network error" in str(excinfo.value)
\ No newline at end of file
+        assert "Error fetching weather data" in str(excinfo.value) or "Network error" in str(excinfo.value)
+    
+    def test_nearby_coordinates_share_cache_key(self, mock_cache, mock_requests):
+        """Test that coordinates in the same grid cell use the same cache entry"""
+        mock_cache.return_value = {}
+        
+        # Call the method for two points a few hundred meters apart
+        WeatherClient.get_historical_weather(40.7128, -74.0060, "2025-09-10", "2025-09-12")
+        WeatherClient.get_historical_weather(40.7150, -74.0020, "2025-09-10", "2025-09-12")
+        
+        # Verify
+        first_key = mock_cache.call_args_list[0].args[0]
+        second_key = mock_cache.call_args_list[1].args[0]
+        assert first_key == second_key == "weather_40.72_-74.0_2025-09-10_2025-09-12"
+    
+    @patch('weather.integration.clients.weather.WEATHER_GRID_RESOLUTION', 0)
+    def test_snapping_disabled(self, mock_cache, mock_requests):
+        """Test that a zero resolution keeps full precision"""
+        mock_cache.return_value = {}
+        
+        WeatherClient.get_historical_weather(40.7128, -74.0060, "2025-09-10", "2025-09-12")
+        
+        # Verify
+        assert mock_cache.call_args.args[0] == "weather_40.7128_-74.006_2025-09-10_2025-09-12"
+    
+    @patch('weather.integration.clients.weather._weather_batcher.max_wait', 5)
+    def test_single_request_is_not_batched(self, mock_cache, mock_requests):
+        """Test that a request without batch is sent at once instead of waiting for others"""
+        mock_cache.side_effect = lambda key, func, timeout: func()
+        mock_requests.return_value.json.return_value = {"latitude": 40.72}
+        
+        with patch('weather.integration.clients.weather._weather_batcher.submit') as mock_submit:
+            result = WeatherClient.get_historical_weather(40.71, -74.01, "2025-09-10", "2025-09-12")
+        
+        # Verify
+        mock_submit.assert_not_called()
+        assert result == {"latitude": 40.72}
+        assert mock_requests.call_args.kwargs["params"]["latitude"] == 40.72
+    
+    @patch('weather.integration.clients.weather._weather_batcher.max_wait', 5)
+    @patch('weather.integration.clients.weather._weather_batcher.max_size', 3)
+    def test_concurrent_requests_are_coalesced(self, mock_cache, mock_requests):
+        """Test that concurrent requests for the same dates make one multi-location call"""
+        mock_cache.side_effect = lambda key, func, timeout: func()
+        points = [(40.71, -74.01), (51.51, -0.13), (40.72, -74.0)]
+        
+        def multi_location_response(url, params):
+            response = MagicMock()
+            response.json.return_value = [
+                {"latitude": float(latitude)} for latitude in params["latitude"].split(",")
+            ]
+            return response
+        
+        mock_requests.side_effect = multi_location_response
+        
+        # Call the method from concurrent threads, the full batch is sent without waiting
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            results = list(executor.map(
+                lambda point: WeatherClient.get_historical_weather(*point, "2025-09-10", "2025-09-12", batch=True),
+                points
+            ))
+        
+        # Verify: every caller gets the response of its own point
+        assert [result["latitude"] for result in results] == [40.72, 51.52, 40.72]
+        mock_requests.assert_called_once()
+        params = mock_requests.call_args.kwargs["params"]
+        # The two New York points share a grid cell and are sent once
+        assert sorted(params["latitude"].split(",")) == ["40.72", "51.52"]
+        assert params["start_date"] == "2025-09-10"
+    
+    @patch('weather.integration.clients.weather._weather_batcher.max_wait', 0.5)
+    @patch('weather.integration.clients.weather._weather_batcher.max_size', 2)
+    def test_coalesced_request_error(self, mock_cache, mock_requests):
+        """Test that an upstream error is raised to every caller of the batch"""
+        mock_cache.side_effect = lambda key, func, timeout: func()
+        mock_requests.side_effect = Exception("Network error")
+        
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            futures = [
+                executor.submit(
+                    WeatherClient.get_historical_weather, latitude, 0.0, "2025-09-10", "2025-09-12", batch=True
+                )
+                for latitude in (10.0, 20.0)
+            ]
+        
+        # Verify
+        for future in futures:
+            with pytest.raises(Exception, match="Network error"):
+                future.result()
+        mock_requests.assert_called_once()
@@ -1,8 +1,10 @@
 import pytest
 from unittest.mock import patch, MagicMock
-from datetime import datetime, date
+from datetime import datetime, date, timedelta
+from django.db.models import Max
+from django.utils import timezone
 from weather.integration.services.weather import WeatherService
-from weather.models import WeatherData
+from weather.models import Location, WeatherData
 
 @pytest.fixture
 def sample_weather_data():
@@ -76,7 +78,7 @@ class TestWeatherService:
         
         # Assert the filter was called with correct parameters
         mock_filter.assert_called_once_with(
-            city=city,
+            location__normalized_name="new york",
             date__gte=start_date,
             date__lte=end_date
         )
@@ -98,10 +100,10 @@ class TestWeatherService:
         WeatherData.objects.all().delete()
         
         # Call the method
-        stored_data = WeatherService.store_weather_data(city, sample_weather_data)
+        counts = WeatherService.store_weather_data(city, sample_weather_data)
         
         # Verify data was stored
-        assert len(stored_data) == 3
+        assert counts == {"created": 3, "updated": 0, "unchanged": 0}
         
         # Check the database records
         db_records = WeatherData.objects.filter(city=city).order_by('date')
@@ -126,10 +128,10 @@ class TestWeatherService:
         )
         
         # Call the method
-        stored_data = WeatherService.store_weather_data(city, sample_weather_data)
+        counts = WeatherService.store_weather_data(city, sample_weather_data)
         
         # Verify data was stored
-        assert len(stored_data) == 3
+        assert counts == {"created": 2, "updated": 1, "unchanged": 0}
         
         # Check the database records
         db_records = WeatherData.objects.filter(city=city).order_by('date')
@@ -139,6 +141,54 @@ class TestWeatherService:
         first_record = db_records.first()
         assert first_record.temperature == sample_weather_data[0]["temperature"]
     
+    @pytest.mark.django_db
+    def test_store_weather_data_skips_unchanged(self, sample_weather_data):
+        """Test that storing identical data does not rewrite any record"""
+        city = "New York"
+        WeatherService.store_weather_data(city, sample_weather_data)
+        
+        # Store the same data again
+        counts = WeatherService.store_weather_data(city, sample_weather_data)
+        
+        # Verify
+        assert counts == {"created": 0, "updated": 0, "unchanged": 3}
+        assert WeatherData.objects.filter(city=city).count() == 3
+    
+    @pytest.mark.django_db
+    def test_store_weather_data_shares_rows_across_spellings(self, sample_weather_data):
+        """Test that different spellings of a city are stored as one series"""
+        WeatherService.store_weather_data("London", sample_weather_data)
+        
+        # Store the same data under other spellings
+        counts = WeatherService.store_weather_data("LONDON", sample_weather_data)
+        WeatherService.store_weather_data("london ", sample_weather_data)
+        
+        # Verify
+        assert counts == {"created": 0, "updated": 0, "unchanged": 3}
+        location = Location.objects.get()
+        assert location.weather_data.count() == 3
+        assert set(location.weather_data.values_list('city', flat=True)) == {"London"}
+        assert WeatherService.get_weather_from_db(
+            "london", date(2025, 9, 10), date(2025, 9, 12)
+        ) == sample_weather_data
+    
+    @pytest.mark.django_db
+    def test_bulk_upsert_weather_data_batches(self):
+        """Test bulk upserting records for several cities across batches"""
+        records = [
+            {"city": city, "date": date(2025, 9, day), "temperature": float(day)}
+            for city in ("London", "Paris")
+            for day in range(1, 6)
+        ]
+        
+        # Call the method with a batch size that does not divide the input evenly
+        counts = WeatherService.bulk_upsert_weather_data(records, batch_size=3)
+        
+        # Verify
+        assert counts == {"created": 10, "updated": 0, "unchanged": 0}
+        assert WeatherData.objects.filter(city="London").count() == 5
+        assert WeatherData.objects.filter(city="Paris").count() == 5
+    
     @patch('weather.integration.services.weather.GeocodingService.get_coordinates')
     @patch('weather.integration.services.weather.WeatherClient.get_historical_weather')
     @patch('weather.integration.services.weather.CacheManager.get_or_set')
@@ -188,6 +238,166 @@ class TestWeatherService:
         # Verify the weather client was called with correct parameters
         mock_weather_client.assert_called_once()
     
+    @patch('weather.integration.services.weather.get_date_range')
+    @patch('weather.integration.services.weather.GeocodingService.get_coordinates')
+    @patch('weather.integration.services.weather.WeatherClient.get_historical_weather')
+    @patch('weather.integration.services.weather.CacheManager.get_or_set')
+    def test_get_historical_weather_fetches_only_missing_dates(self, mock_cache, mock_weather_client,
+                                                                mock_geocoding, mock_date_range):
+        """Test that only dates missing from the database are fetched from the API"""
+        # Setup
+        city = "New York"
+        mock_date_range.return_value = (date(2025, 9, 10), date(2025, 9, 12))
+        mock_geocoding.return_value = {"latitude": 40.71, "longitude": -74.01}
+        mock_weather_client.return_value = {
+            "daily": {"time": ["2025-09-12"], "temperature_2m_max": [24.3]}
+        }
+        mock_cache.side_effect = lambda key, func, timeout: func()
+        
+        # Store the first two days of the window
+        location = Location.objects.for_city(city)
+        WeatherData.objects.create(city=city, location=location, date=date(2025, 9, 10), temperature=25.5)
+        WeatherData.objects.create(city=city, location=location, date=date(2025, 9, 11), temperature=26.8)
+        
+        # Call the method
+        result = WeatherService.get_historical_weather(city, 2)
+        
+        # Verify stored and fetched rows are combined in date order
+        assert result == [
+            {"date": "2025-09-10", "temperature": 25.5},
+            {"date": "2025-09-11", "temperature": 26.8},
+            {"date": "2025-09-12", "temperature": 24.3},
+        ]
+        
+        # Verify only the missing day was requested from the API and then stored
+        mock_weather_client.assert_called_once_with(40.71, -74.01, "2025-09-12", "2025-09-12", batch=False)
+        assert WeatherData.objects.filter(city=city).count() == 3
+    
+    @patch('weather.integration.services.weather.get_date_range')
+    @patch('weather.integration.services.weather.GeocodingService.get_coordinates')
+    @patch('weather.integration.services.weather.WeatherClient.get_historical_weather')
+    @patch('weather.integration.services.weather.CacheManager.get_or_set')
+    def test_get_historical_weather_complete_in_database(self, mock_cache, mock_weather_client,
+                                                          mock_geocoding, mock_date_range):
+        """Test that a fully stored window is served without any API call"""
+        # Setup
+        city = "New York"
+        mock_date_range.return_value = (date(2025, 9, 10), date(2025, 9, 11))
+        mock_cache.side_effect = lambda key, func, timeout: func()
+        location = Location.objects.for_city(city)
+        WeatherData.objects.create(city=city, location=location, date=date(2025, 9, 10), temperature=25.5)
+        WeatherData.objects.create(city=city, location=location, date=date(2025, 9, 11), temperature=26.8)
+        
+        # Call the method
+        result = WeatherService.get_historical_weather(city, 1)
+        
+        # Verify
+        assert len(result) == 2
+        mock_geocoding.assert_not_called()
+        mock_weather_client.assert_not_called()
+    
+    @patch('weather.integration.services.weather.get_date_range')
+    @patch('weather.integration.services.weather.GeocodingService.get_coordinates')
+    @patch('weather.integration.services.weather.WeatherClient.get_historical_weather')
+    @patch('weather.integration.services.weather.CacheManager.get_or_set')
+    def test_get_historical_weather_refreshes_recent_days(self, mock_cache, mock_weather_client,
+                                                          mock_geocoding, mock_date_range):
+        """Test that stored values of today and yesterday are fetched again once they are old"""
+        # Setup: a fully stored window written two hours ago
+        city = "New York"
+        today = date.today()
+        days = [today - timedelta(days=offset) for offset in (2, 1, 0)]
+        mock_date_range.return_value = (days[0], today)
+        mock_cache.side_effect = lambda key, func, timeout: func()
+        mock_geocoding.return_value = {"latitude": 40.71, "longitude": -74.01}
+        mock_weather_client.return_value = {
+            "daily": {"time": [str(days[1]), str(today)], "temperature_2m_max": [26.8, 27.5]}
+        }
+        location = Location.objects.for_city(city)
+        for day, temperature in zip(days, (25.5, 26.8, 20.0)):
+            WeatherData.objects.create(city=city, location=location, date=day, temperature=temperature)
+        WeatherData.objects.update(timestamp=timezone.now() - timedelta(hours=2))
+        
+        # Call the method
+        result = WeatherService.get_historical_weather(city, 2)
+        
+        # Verify only the recent days were fetched again and today's partial value replaced
+        mock_weather_client.assert_called_once_with(40.71, -74.01, str(days[1]), str(today), batch=False)
+        assert result[-1] == {"date": str(today), "temperature": 27.5}
+        
+        # Yesterday's unchanged row was not rewritten, so only it is due to be fetched again
+        assert WeatherData.objects.get(date=days[1]).timestamp < timezone.now() - timedelta(hours=1)
+        WeatherService.get_historical_weather(city, 2)
+        assert mock_weather_client.call_count == 2
+        mock_weather_client.assert_called_with(40.71, -74.01, str(days[1]), str(days[1]), batch=False)
+    
+    @patch('weather.integration.services.weather.get_date_range')
+    @patch('weather.integration.services.weather.WeatherClient.get_historical_weather')
+    @patch('weather.integration.services.weather.CacheManager.get_or_set')
+    def test_get_average_temperature_from_database(self, mock_cache, mock_weather_client, mock_date_range):
+        """Test that the average of a fully stored window is computed in the database"""
+        # Setup
+        mock_date_range.return_value = (date(2025, 9, 10), date(2025, 9, 12))
+        mock_cache.side_effect = lambda key, func, timeout: func()
+        WeatherService.store_weather_data("New York", [
+            {"date": "2025-09-09", "temperature": 99.0},
+            {"date": "2025-09-10", "temperature": 25.5},
+            {"date": "2025-09-11", "temperature": 26.8},
+            {"date": "2025-09-12", "temperature": 24.3},
+        ])
+        
+        # Call the method
+        result = WeatherService.get_average_temperature("new york", 2)
+        
+        # Verify
+        assert result == round((25.5 + 26.8 + 24.3) / 3, 2)
+        assert mock_cache.call_args.args[0] == "average_summary_new york_2"
+        mock_weather_client.assert_not_called()
+    
+    @patch('weather.integration.services.weather.get_date_range')
+    @patch('weather.integration.services.weather.CacheManager.get_or_set')
+    def test_get_average_summary(self, mock_cache, mock_date_range):
+        """Test that the average comes with the version of the stored days it covers"""
+        # Setup
+        mock_date_range.return_value = (date(2025, 9, 10), date(2025, 9, 11))
+        mock_cache.side_effect = lambda key, func, timeout: func()
+        WeatherService.store_weather_data("New York", [
+            {"date": "2025-09-10", "temperature": 25.0},
+            {"date": "2025-09-11", "temperature": 27.0},
+        ])
+        
+        # Call the method
+        summary = WeatherService.get_average_summary("New York", 1)
+        
+        # Verify
+        assert summary["average"] == 26.0
+        assert summary["day_count"] == 2
+        assert summary["last_modified"] == WeatherData.objects.aggregate(Max('timestamp'))["timestamp__max"]
+    
+    @patch('weather.integration.services.weather.get_date_range')
+    @patch('weather.integration.services.weather.GeocodingService.get_coordinates')
+    @patch('weather.integration.services.weather.WeatherClient.get_historical_weather')
+    @patch('weather.integration.services.weather.CacheManager.get_or_set')
+    def test_get_average_temperature_with_missing_dates(self, mock_cache, mock_weather_client,
+                                                        mock_geocoding, mock_date_range):
+        """Test that fetched dates are combined with the stored aggregate"""
+        # Setup: the 11th is stored, the 10th and 12th are missing and fetched as one range
+        mock_date_range.return_value = (date(2025, 9, 10), date(2025, 9, 12))
+        mock_cache.side_effect = lambda key, func, timeout: func()
+        mock_geocoding.return_value = {"latitude": 40.71, "longitude": -74.01}
+        mock_weather_client.return_value = {
+            "daily": {"time": ["2025-09-10", "2025-09-11", "2025-09-12"], "temperature_2m_max": [25.5, 26.8, 24.3]}
+        }
+        WeatherService.store_weather_data("New York", [{"date": "2025-09-11", "temperature": 20.0}])
+        
+        # Call the method
+        result = WeatherService.get_average_temperature("New York", 2)
+        
+        # Verify the fetched value of the 11th replaces the stored one
+        assert result == round((25.5 + 26.8 + 24.3) / 3, 2)
+        mock_weather_client.assert_called_once_with(40.71, -74.01, "2025-09-10", "2025-09-12", batch=False)
+        assert WeatherData.objects.filter(city="New York").count() == 3
+    
     @patch('weather.integration.services.weather.GeocodingService.get_coordinates')
     def test_get_historical_weather_geocoding_error(self, mock_geocoding):
         """Test error handling when geocoding fails"""
@@ -213,4 +423,43 @@ class TestWeatherService:
         assert "Could not find coordinates for city" in str(excinfo.value)
         
         # Verify the geocoding service was called
-        mock_geocoding.assert_called_once_with(city)
\ No newline at end of file
+        mock_geocoding.assert_called_once_with(city)
+    
+    @patch('weather.integration.services.weather.get_date_range')
+    @patch('weather.integration.services.weather.WeatherService.get_historical_weather')
+    @patch('weather.integration.services.weather.CacheManager.set')
+    @patch('weather.integration.services.weather.CacheManager.get_many')
+    def test_get_historical_weather_many(self, mock_get_many, mock_set, mock_get_weather, mock_date_range):
+        """Test resolving several cities from cache, database and the API"""
+        # Setup: London is cached, Paris is stored, Tokyo and Atlantis must be fetched
+        mock_date_range.return_value = (date(2025, 9, 10), date(2025, 9, 11))
+        london_data = [{"date": "2025-09-10", "temperature": 18.2}, {"date": "2025-09-11", "temperature": 17.5}]
+        mock_get_many.return_value = {"processed_weather_london_1": london_data}
+        paris = Location.objects.for_city("Paris")
+        WeatherData.objects.create(city="Paris", location=paris, date=date(2025, 9, 10), temperature=20.0)
+        WeatherData.objects.create(city="Paris", location=paris, date=date(2025, 9, 11), temperature=21.0)
+        tokyo_data = [{"date": "2025-09-10", "temperature": 28.9}, {"date": "2025-09-11", "temperature": 29.1}]
+        
+        def get_weather_side_effect(city, days, batch=False):
+            assert batch
+            if city == "Atlantis":
+                raise ValueError("Could not find coordinates for city: Atlantis")
+            return tokyo_data
+        
+        mock_get_weather.side_effect = get_weather_side_effect
+        
+        # Call the method, duplicates are resolved once
+        results, errors = WeatherService.get_historical_weather_many(
+            ["London", "Paris", "Tokyo", "Atlantis", "London"], 1
+        )
+        
+        # Verify
+        assert results == {
+            "London": london_data,
+            "Paris": [{"date": "2025-09-10", "temperature": 20.0}, {"date": "2025-09-11", "temperature": 21.0}],
+            "Tokyo": tokyo_data,
+        }
+        assert errors == {"Atlantis": "Could not find coordinates for city: Atlantis"}
+        assert sorted(call.args[0] for call in mock_get_weather.call_args_list) == ["Atlantis", "Tokyo"]
+        mock_set.assert_called_once()
+        assert mock_set.call_args.args[0] == "processed_weather_paris_1"
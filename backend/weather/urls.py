@@ -1,6 +1,6 @@
 from django.urls import path
 from django.http import HttpResponse
-from .views import WeatherAverageView, WeatherDataListView
+from .views import WeatherAverageView, WeatherBatchAverageView, WeatherDataExportView, WeatherDataListView
 
 # Simple health check view for monitoring
 def health_check(request):
@@ -8,6 +8,8 @@ def health_check(request):
 
 urlpatterns = [
     path('average', WeatherAverageView.as_view(), name='weather_average'),
+    path('average/batch', WeatherBatchAverageView.as_view(), name='weather_average_batch'),
     path('history', WeatherDataListView.as_view(), name='weather_history'),
+    path('history/export', WeatherDataExportView.as_view(), name='weather_history_export'),
     path('health/', health_check, name='health_check'),
 ]
@@ -0,0 +1,85 @@
+"""
+Coalescing of concurrent requests into batched calls
+"""
+import threading
+
+class _Batch:
+    """Requests collected for one batched call"""
+    
+    def __init__(self):
+        self.items = []
+        self.results = None
+        self.error = None
+        self.full = threading.Event()
+        self.done = threading.Event()
+
+class RequestBatcher:
+    """
+    Merges requests made by concurrent threads into batched calls. The first
+    request of a group waits up to max_wait seconds for others to join, then
+    makes one call for every collected request; the call is made as soon as
+    max_size requests were collected. Coalescing is per process.
+    """
+    
+    def __init__(self, fetch_many, max_size, max_wait):
+        """
+        Args:
+            fetch_many (callable): Called with a group key and a list of items, returns
+                the result of each item in the same order
+            max_size (int): Maximum number of items per call, 1 disables batching
+            max_wait (float): Seconds the first request of a batch waits for others,
+                0 disables batching
+        """
+        self.fetch_many = fetch_many
+        self.max_size = max_size
+        self.max_wait = max_wait
+        self._lock = threading.Lock()
+        self._open = {}
+    
+    def submit(self, group_key, item):
+        """
+        Get the result of one item, batched with the concurrent requests of the same group
+        
+        Args:
+            group_key (hashable): Only items of the same group are batched together
+            item (hashable): Requested item
+        
+        Returns:
+            Any: Result of the item
+        
+        Raises:
+            Exception: Whatever fetch_many raised for the batch
+        """
+        if self.max_size <= 1 or self.max_wait <= 0:
+            return self.fetch_many(group_key, [item])[0]
+        
+        with self._lock:
+            batch = self._open.get(group_key)
+            leader = batch is None
+            if leader:
+                batch = _Batch()
+                self._open[group_key] = batch
+            index = len(batch.items)
+            batch.items.append(item)
+            if len(batch.items) >= self.max_size:
+                # Later requests start a new batch
+                del self._open[group_key]
+                batch.full.set()
+        
+        if leader:
+            batch.full.wait(self.max_wait)
+            with self._lock:
+                if self._open.get(group_key) is batch:
+                    del self._open[group_key]
+            try:
+                batch.results = self.fetch_many(group_key, batch.items)
+            except Exception as e:
+                batch.error = e
+            finally:
+                batch.done.set()
+        else:
+            batch.done.wait()
+        
+        if batch.error is not None:
+            raise batch.error
+        return batch.results[index]
@@ -1,25 +1,526 @@
 """
 Caching utilities for the weather application
 """
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 from django.core.cache import cache
+from django.db import connections
+from weather.utils.constants import (
+    CACHE_SINGLE_FLIGHT,
+    CACHE_LOCK_TIMEOUT,
+    CACHE_LOCK_WAIT_TIMEOUT,
+    CACHE_LOCK_POLL_INTERVAL,
+    CACHE_STALE_WHILE_REVALIDATE,
+    CACHE_STALE_TTL_FACTOR,
+    CACHE_REFRESH_WORKERS,
+    CACHE_L1_ENABLED,
+    CACHE_L1_MAX_ENTRIES,
+    CACHE_L1_MAX_BYTES,
+    CACHE_L1_TTL,
+    CACHE_INVALIDATION_CHANNEL
+)
+from weather.utils.local_cache import LocalLRUCache
+from weather.utils.redis_utils import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+# Sentinel distinguishing a cache miss from a cached None
+_MISSING = object()
+
+# Cached value with the time after which it is stale and refreshed in the background
+CacheEntry = namedtuple("CacheEntry", ["value", "soft_expires_at"])
+
+# Background refreshes of stale entries, threads are only started on first use
+_refresh_executor = ThreadPoolExecutor(max_workers=CACHE_REFRESH_WORKERS, thread_name_prefix="cache-refresh")
+
+# Optional per-process first tier, kept coherent through Redis pub/sub invalidations
+_local_cache = LocalLRUCache(CACHE_L1_MAX_ENTRIES, CACHE_L1_MAX_BYTES, CACHE_L1_TTL) if CACHE_L1_ENABLED else None
+_listener_lock = threading.Lock()
+_listener_pid = None
+
+# Deletes a single-flight lock only while it still holds its owner's token, so an
+# owner whose lock expired cannot delete the lock another worker took since
+RELEASE_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+# Per-process hit/miss counters for the shared (L2) tier
+_l2_stats = {"hits": 0, "misses": 0}
+_l2_stats_lock = threading.Lock()
 
 class CacheManager:
     """
     Utility class for managing cache operations
     """
     
+    STATS_KEY_PREFIX = "cache_stats_"
+    LOCK_KEY_PREFIX = "lock_"
+    
     @staticmethod
-    def get_or_set(key, getter_func, timeout=3600):
+    def get_or_set(key, getter_func, timeout=3600, single_flight=CACHE_SINGLE_FLIGHT,
+                   stale_while_revalidate=CACHE_STALE_WHILE_REVALIDATE):
         """
         Get a value from cache or set it if not found
         
+        In single-flight mode only one worker computes a missing value while
+        holding a short-lived lock; concurrent callers wait for that value
+        instead of repeating the upstream work.
+        
+        With stale-while-revalidate, entries outlive their timeout: a stale
+        value is returned immediately and refreshed in the background.
+        
         Args:
             key (str): Cache key
             getter_func (callable): Function to get the value if not in cache
             timeout (int): Cache timeout in seconds (default: 1 hour)
+            single_flight (bool): Coalesce concurrent misses for the same key
+            stale_while_revalidate (bool): Serve stale entries while refreshing them
             
         Returns:
             Any: The cached or newly fetched value
         """
-        # Django's cache.get_or_set already implements this pattern efficiently
-        return cache.get_or_set(key, getter_func, timeout)
+        if _local_cache is not None:
+            entry = _local_cache.get(key, _MISSING)
+            if entry is not _MISSING:
+                if CacheManager._is_stale(entry):
+                    CacheManager._schedule_refresh(key, getter_func, timeout, stale_while_revalidate)
+                return CacheManager._unwrap(entry)
+        
+        if not single_flight and not stale_while_revalidate:
+            # Django's cache.get_or_set already implements this pattern efficiently
+            return CacheManager._unwrap(cache.get_or_set(key, getter_func, timeout))
+        
+        lock_key = f"{CacheManager.LOCK_KEY_PREFIX}{key}"
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + CACHE_LOCK_WAIT_TIMEOUT
+        waited = False
+        
+        while True:
+            entry = cache.get(key, _MISSING)
+            if not waited:
+                CacheManager._count_l2_lookup(entry is not _MISSING)
+            if entry is not _MISSING:
+                CacheManager._set_local(key, entry)
+                if waited:
+                    CacheManager.incr_stat("single_flight_coalesced")
+                if CacheManager._is_stale(entry):
+                    CacheManager._schedule_refresh(key, getter_func, timeout, stale_while_revalidate)
+                return CacheManager._unwrap(entry)
+            
+            if not single_flight:
+                return CacheManager._compute_and_set(key, getter_func, timeout, stale_while_revalidate)
+            
+            # The lock expires on its own so a crashed worker cannot block the key
+            if CacheManager._acquire_lock(lock_key, token):
+                try:
+                    return CacheManager._compute_and_set(key, getter_func, timeout, stale_while_revalidate)
+                finally:
+                    CacheManager._release_lock(lock_key, token)
+            
+            if time.monotonic() >= deadline:
+                break
+            
+            waited = True
+            time.sleep(CACHE_LOCK_POLL_INTERVAL)
+        
+        # The lock holder is taking too long, compute the value ourselves
+        logger.warning(f"Timed out waiting for cache key {key}, computing it without the lock")
+        CacheManager.incr_stat("single_flight_wait_timeouts")
+        return CacheManager._compute_and_set(key, getter_func, timeout, stale_while_revalidate)
+    
+    @staticmethod
+    def _acquire_lock(lock_key, token):
+        """
+        Take a single-flight lock that expires after CACHE_LOCK_TIMEOUT
+        
+        Args:
+            lock_key (str): Cache key of the lock
+            token (str): Token identifying the owner
+        
+        Returns:
+            bool: True if the lock was taken
+        """
+        client = get_redis_client()
+        if client is None:
+            return cache.add(lock_key, token, CACHE_LOCK_TIMEOUT)
+        # Stored as the raw token, so the release script can compare it
+        return bool(client.set(cache.make_key(lock_key), token, nx=True, ex=CACHE_LOCK_TIMEOUT))
+    
+    @staticmethod
+    def _release_lock(lock_key, token):
+        """
+        Release a single-flight lock if it is still owned by the token
+        
+        Args:
+            lock_key (str): Cache key of the lock
+            token (str): Token the lock was taken with
+        """
+        client = get_redis_client()
+        if client is None:
+            # Not atomic: the lock can expire and be taken by another worker in between
+            if cache.get(lock_key) == token:
+                cache.delete(lock_key)
+            return
+        client.eval(RELEASE_LOCK_SCRIPT, 1, cache.make_key(lock_key), token)
+    
+    @staticmethod
+    def _compute_and_set(key, getter_func, timeout, stale_while_revalidate):
+        """
+        Compute a value and store it in the cache
+        
+        Args:
+            key (str): Cache key
+            getter_func (callable): Function to get the value
+            timeout (int): Cache timeout in seconds
+            stale_while_revalidate (bool): Store the value with a soft expiry
+            
+        Returns:
+            Any: The newly fetched value
+        """
+        value = getter_func()
+        CacheManager.set(key, value, timeout, stale_while_revalidate)
+        return value
+    
+    @staticmethod
+    def set(key, value, timeout=3600, stale_while_revalidate=CACHE_STALE_WHILE_REVALIDATE):
+        """
+        Store a value in every cache tier
+        
+        Args:
+            key (str): Cache key
+            value (Any): Value to store
+            timeout (int): Cache timeout in seconds (default: 1 hour)
+            stale_while_revalidate (bool): Store the value with a soft expiry
+        """
+        if stale_while_revalidate:
+            # The soft expiry triggers a refresh, the hard expiry removes the entry
+            entry = CacheEntry(value, time.time() + timeout)
+            cache.set(key, entry, timeout * CACHE_STALE_TTL_FACTOR)
+        else:
+            entry = value
+            cache.set(key, entry, timeout)
+        
+        if _local_cache is not None:
+            # Other workers drop their local copy, this one keeps the new value
+            CacheManager._publish_invalidation(key)
+            CacheManager._set_local(key, entry)
+    
+    @staticmethod
+    def get_many(getters, timeout=3600, stale_while_revalidate=CACHE_STALE_WHILE_REVALIDATE):
+        """
+        Get several values with a single round trip to the shared cache.
+        Missing keys are left out; stale values are returned and refreshed
+        in the background with their getter.
+        
+        Args:
+            getters (dict): Getter function for each cache key
+            timeout (int): Cache timeout in seconds used for refreshes (default: 1 hour)
+            stale_while_revalidate (bool): Store refreshed values with a soft expiry
+            
+        Returns:
+            dict: Cached values keyed by cache key
+        """
+        entries = {}
+        remaining = list(getters)
+        
+        if _local_cache is not None:
+            for key in getters:
+                entry = _local_cache.get(key, _MISSING)
+                if entry is not _MISSING:
+                    entries[key] = entry
+            remaining = [key for key in getters if key not in entries]
+        
+        if remaining:
+            found = cache.get_many(remaining)
+            for key in remaining:
+                CacheManager._count_l2_lookup(key in found)
+                if key in found:
+                    CacheManager._set_local(key, found[key])
+            entries.update(found)
+        
+        values = {}
+        for key, entry in entries.items():
+            if CacheManager._is_stale(entry):
+                CacheManager._schedule_refresh(key, getters[key], timeout, stale_while_revalidate)
+            values[key] = CacheManager._unwrap(entry)
+        return values
+    
+    @staticmethod
+    def delete(key):
+        """
+        Remove a value from every cache tier
+        
+        Args:
+            key (str): Cache key
+        """
+        cache.delete(key)
+        if _local_cache is not None:
+            _local_cache.delete(key)
+            CacheManager._publish_invalidation(key)
+    
+    @staticmethod
+    def delete_many(keys):
+        """
+        Remove several values from every cache tier
+        
+        Args:
+            keys (list): Cache keys
+        """
+        cache.delete_many(keys)
+        if _local_cache is not None:
+            for key in keys:
+                _local_cache.delete(key)
+                CacheManager._publish_invalidation(key)
+    
+    @staticmethod
+    def time_to_refresh(key):
+        """
+        Get the number of seconds until a shared cache entry is refreshed:
+        its soft expiry with stale-while-revalidate, its expiry otherwise
+        
+        Args:
+            key (str): Cache key
+            
+        Returns:
+            float: Seconds until the refresh, 0 when it is due or unknown,
+                None when the key is not cached
+        """
+        entry = cache.get(key, _MISSING)
+        if entry is _MISSING:
+            return None
+        if isinstance(entry, CacheEntry):
+            return max(0.0, entry.soft_expires_at - time.time())
+        
+        # Only django-redis reports the expiry of plain entries
+        ttl = getattr(cache, "ttl", None)
+        if ttl is None:
+            return 0.0
+        remaining = ttl(key)
+        return float("inf") if remaining is None else float(max(0, remaining))
+    
+    @staticmethod
+    def _unwrap(entry):
+        """
+        Get the value stored in a cache entry
+        
+        Args:
+            entry (Any): A CacheEntry or a plain cached value
+            
+        Returns:
+            Any: The cached value
+        """
+        return entry.value if isinstance(entry, CacheEntry) else entry
+    
+    @staticmethod
+    def _is_stale(entry):
+        """
+        Check whether a cache entry is past its soft expiry
+        
+        Args:
+            entry (Any): A CacheEntry or a plain cached value
+            
+        Returns:
+            bool: True if the entry should be refreshed
+        """
+        return isinstance(entry, CacheEntry) and time.time() >= entry.soft_expires_at
+    
+    @staticmethod
+    def _schedule_refresh(key, getter_func, timeout, stale_while_revalidate):
+        """
+        Refresh a stale entry in a background thread. The key's lock ensures
+        only one worker refreshes it at a time.
+        
+        Args:
+            key (str): Cache key
+            getter_func (callable): Function to get the value
+            timeout (int): Cache timeout in seconds
+            stale_while_revalidate (bool): Store the value with a soft expiry
+        """
+        lock_key = f"{CacheManager.LOCK_KEY_PREFIX}{key}"
+        token = uuid.uuid4().hex
+        if not CacheManager._acquire_lock(lock_key, token):
+            return
+        
+        def refresh():
+            try:
+                CacheManager._compute_and_set(key, getter_func, timeout, stale_while_revalidate)
+                CacheManager.incr_stat("stale_refreshes")
+            except Exception as e:
+                # Keep serving the stale value, the next request will retry
+                logger.error(f"Background refresh of cache key {key} failed: {str(e)}")
+                CacheManager.incr_stat("stale_refresh_errors")
+            finally:
+                CacheManager._release_lock(lock_key, token)
+                # The refresh may have used the database from this thread
+                connections.close_all()
+        
+        logger.info(f"Serving stale value for cache key {key} while refreshing it")
+        _refresh_executor.submit(refresh)
+    
+    @staticmethod
+    def _set_local(key, entry):
+        """
+        Store an entry in the local tier, if enabled
+        
+        Args:
+            key (str): Cache key
+            entry (Any): A CacheEntry or a plain cached value
+        """
+        if _local_cache is None:
+            return
+        CacheManager._ensure_invalidation_listener()
+        _local_cache.set(key, entry)
+    
+    @staticmethod
+    def _count_l2_lookup(hit):
+        """
+        Count a lookup in the shared tier
+        
+        Args:
+            hit (bool): Whether the key was found
+        """
+        with _l2_stats_lock:
+            _l2_stats["hits" if hit else "misses"] += 1
+    
+    @staticmethod
+    def _invalidation_origin():
+        """
+        Identify this process in invalidation messages
+        
+        Returns:
+            str: Host name and process id
+        """
+        return f"{socket.gethostname()}:{os.getpid()}"
+    
+    @staticmethod
+    def _publish_invalidation(key):
+        """
+        Tell the other workers to drop their local copy of a key
+        
+        Args:
+            key (str): Cache key
+        """
+        client = get_redis_client()
+        if client is None:
+            return
+        try:
+            client.publish(CACHE_INVALIDATION_CHANNEL, f"{CacheManager._invalidation_origin()}|{key}")
+        except Exception as e:
+            # The short local TTL still bounds how long other workers can diverge
+            logger.warning(f"Could not publish cache invalidation for {key}: {str(e)}")
+    
+    @staticmethod
+    def _handle_invalidation(message):
+        """
+        Drop the local copy of a key named in an invalidation message
+        
+        Args:
+            message (bytes or str): Invalidation message in the form "origin|key"
+        """
+        if isinstance(message, bytes):
+            message = message.decode("utf-8")
+        origin, _, key = message.partition("|")
+        if origin != CacheManager._invalidation_origin() and _local_cache is not None:
+            _local_cache.delete(key)
+    
+    @staticmethod
+    def _ensure_invalidation_listener():
+        """
+        Start the invalidation listener thread once per process. The process id
+        is checked so that forked workers start their own listener.
+        """
+        global _listener_pid
+        if _listener_pid == os.getpid():
+            return
+        
+        with _listener_lock:
+            if _listener_pid == os.getpid():
+                return
+            _listener_pid = os.getpid()
+            
+            client = get_redis_client()
+            if client is None:
+                return
+            threading.Thread(
+                target=CacheManager._listen_for_invalidations,
+                args=(client,),
+                name="cache-invalidation",
+                daemon=True
+            ).start()
+    
+    @staticmethod
+    def _listen_for_invalidations(client):
+        """
+        Apply invalidation messages until the process exits, reconnecting on errors
+        
+        Args:
+            client (Redis): Redis client
+        """
+        while True:
+            try:
+                pubsub = client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(CACHE_INVALIDATION_CHANNEL)
+                for message in pubsub.listen():
+                    CacheManager._handle_invalidation(message["data"])
+            except Exception as e:
+                # Messages may have been missed while disconnected
+                logger.warning(f"Cache invalidation listener error: {str(e)}")
+                _local_cache.clear()
+                time.sleep(1)
+    
+    @staticmethod
+    def get_tier_stats():
+        """
+        Get hit and miss counters of this process for each cache tier
+        
+        Returns:
+            dict: Statistics for the local (l1) and shared (l2) tiers
+        """
+        with _l2_stats_lock:
+            l2_stats = dict(_l2_stats)
+        return {
+            "l1": _local_cache.stats() if _local_cache is not None else None,
+            "l2": l2_stats,
+        }
+    
+    @staticmethod
+    def incr_stat(name):
+        """
+        Increment a counter shared by all workers
+        
+        Args:
+            name (str): Counter name
+        """
+        stat_key = f"{CacheManager.STATS_KEY_PREFIX}{name}"
+        try:
+            cache.incr(stat_key)
+        except ValueError:
+            # The counter does not exist yet; another worker may create it first
+            if not cache.add(stat_key, 1, None):
+                cache.incr(stat_key)
+    
+    @staticmethod
+    def get_stats():
+        """
+        Get the shared cache counters
+        
+        Returns:
+            dict: Counter values keyed by name
+        """
+        names = [
+            "single_flight_coalesced",
+            "single_flight_wait_timeouts",
+            "stale_refreshes",
+            "stale_refresh_errors",
+        ]
+        values = cache.get_many([f"{CacheManager.STATS_KEY_PREFIX}{name}" for name in names])
+        return {name: values.get(f"{CacheManager.STATS_KEY_PREFIX}{name}", 0) for name in names}
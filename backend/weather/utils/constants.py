@@ -18,3 +18,111 @@ GEOCODING_API_BASE_URL = os.environ.get('GEOCODING_API_BASE_URL', "https://nomin
 
 # Application limits
 MAX_DAYS_ALLOWED = int(os.environ.get('MAX_DAYS_ALLOWED', 30))
+# Spellings remembered per location, further spellings still resolve but are not recorded
+LOCATION_MAX_ALIASES = int(os.environ.get('LOCATION_MAX_ALIASES', 20))
+
+# Upstream fetch tuning
+# Missing date ranges separated by at most this many stored days are fetched in a single call
+WEATHER_FETCH_MERGE_GAP_DAYS = int(os.environ.get('WEATHER_FETCH_MERGE_GAP_DAYS', 7))
+# Upstream values of the most recent days are provisional (today is partial and yesterday may
+# still be finalised), so stored rows of the last WEATHER_RECENT_DAYS days are fetched again once
+# they were written more than WEATHER_RECENT_REFRESH seconds ago
+WEATHER_RECENT_DAYS = int(os.environ.get('WEATHER_RECENT_DAYS', 2))
+WEATHER_RECENT_REFRESH = int(os.environ.get('WEATHER_RECENT_REFRESH', CACHE_TIMEOUT_HOUR))  # Seconds
+
+# Database write tuning
+WEATHER_UPSERT_BATCH_SIZE = int(os.environ.get('WEATHER_UPSERT_BATCH_SIZE', 1000))
+
+# Cache stampede protection (single-flight)
+CACHE_SINGLE_FLIGHT = os.environ.get('CACHE_SINGLE_FLIGHT', 'True') == 'True'
+CACHE_LOCK_TIMEOUT = int(os.environ.get('CACHE_LOCK_TIMEOUT', 30))                  # Lock expiry if a worker crashes
+CACHE_LOCK_WAIT_TIMEOUT = float(os.environ.get('CACHE_LOCK_WAIT_TIMEOUT', 10))      # Max time a waiter blocks
+CACHE_LOCK_POLL_INTERVAL = float(os.environ.get('CACHE_LOCK_POLL_INTERVAL', 0.05))  # Waiter poll interval
+
+# Stale-while-revalidate: entries are refreshed in the background once their timeout has
+# passed, and only dropped after timeout * CACHE_STALE_TTL_FACTOR
+CACHE_STALE_WHILE_REVALIDATE = os.environ.get('CACHE_STALE_WHILE_REVALIDATE', 'True') == 'True'
+CACHE_STALE_TTL_FACTOR = int(os.environ.get('CACHE_STALE_TTL_FACTOR', 24))
+CACHE_REFRESH_WORKERS = int(os.environ.get('CACHE_REFRESH_WORKERS', 4))
+
+# In-process (L1) cache in front of Redis, disabled by default
+CACHE_L1_ENABLED = os.environ.get('CACHE_L1_ENABLED', 'False') == 'True'
+CACHE_L1_MAX_ENTRIES = int(os.environ.get('CACHE_L1_MAX_ENTRIES', 1024))
+CACHE_L1_MAX_BYTES = int(os.environ.get('CACHE_L1_MAX_BYTES', 16 * 1024 * 1024))  # 16 MB
+CACHE_L1_TTL = float(os.environ.get('CACHE_L1_TTL', 5))                            # Seconds
+CACHE_INVALIDATION_CHANNEL = os.environ.get('CACHE_INVALIDATION_CHANNEL', 'weather_cache_invalidation')
+
+# Nominatim rate limiting (shared token bucket, max 1 request per second by usage policy)
+NOMINATIM_RATE_LIMIT_PER_SECOND = float(os.environ.get('NOMINATIM_RATE_LIMIT_PER_SECOND', 1))
+NOMINATIM_RATE_LIMIT_BURST = int(os.environ.get('NOMINATIM_RATE_LIMIT_BURST', 1))
+NOMINATIM_RATE_LIMIT_TIMEOUT = float(os.environ.get('NOMINATIM_RATE_LIMIT_TIMEOUT', 30))  # Max wait in seconds
+
+# Offline gazetteer consulted before Nominatim: a GeoNames cities dump (e.g. cities15000.txt)
+# or an index built from one with `manage.py build_gazetteer_index`. Disabled when empty.
+GAZETTEER_PATH = os.environ.get('GAZETTEER_PATH', '')
+
+# Multi-city batch requests
+BATCH_MAX_CITIES = int(os.environ.get('BATCH_MAX_CITIES', 200))
+BATCH_MAX_WORKERS = int(os.environ.get('BATCH_MAX_WORKERS', 8))  # Concurrent upstream fetches per request
+
+# Outgoing HTTP requests (shared keep-alive session per process)
+HTTP_CONNECT_TIMEOUT = float(os.environ.get('HTTP_CONNECT_TIMEOUT', 3.05))  # Seconds
+HTTP_READ_TIMEOUT = float(os.environ.get('HTTP_READ_TIMEOUT', 10))         # Seconds
+HTTP_POOL_MAXSIZE = int(os.environ.get('HTTP_POOL_MAXSIZE', 16))           # Connections kept per host
+HTTP_MAX_RETRIES = int(os.environ.get('HTTP_MAX_RETRIES', 2))              # Retries of idempotent GETs
+HTTP_BACKOFF_BASE = float(os.environ.get('HTTP_BACKOFF_BASE', 0.2))        # Seconds, doubled per retry
+HTTP_BACKOFF_MAX = float(os.environ.get('HTTP_BACKOFF_MAX', 5))            # Seconds
+
+# Coordinates sent to the weather API are snapped to this grid (degrees) so that nearby
+# lookups share cache entries. Open-Meteo combines models of 1-3 km resolution with elevation
+# correction, so the default of 0.02° (about 2 km) stays within a model cell; coarser grids
+# merge points with different weather. 0 disables snapping.
+WEATHER_GRID_RESOLUTION = float(os.environ.get('WEATHER_GRID_RESOLUTION', 0.02))
+
+# History pagination: rows per page by default and at most when the client asks for more
+HISTORY_PAGE_SIZE = int(os.environ.get('HISTORY_PAGE_SIZE', 100))
+HISTORY_MAX_PAGE_SIZE = int(os.environ.get('HISTORY_MAX_PAGE_SIZE', 1000))
+
+# Rows fetched per round trip of the export's server-side cursor and written per streamed chunk
+EXPORT_CHUNK_SIZE = int(os.environ.get('EXPORT_CHUNK_SIZE', 2000))
+# Rows per Parquet row group / Arrow record batch of the columnar exports
+EXPORT_COLUMNAR_BATCH_SIZE = int(os.environ.get('EXPORT_COLUMNAR_BATCH_SIZE', 100000))
+
+# Cache warming: requests are counted per (city, days) over a sliding window of days, and the
+# most requested keys are refreshed before they expire by `manage.py warm_weather_cache` or,
+# when CACHE_WARM_INTERVAL is set, by a scheduler thread in each web worker
+CACHE_WARM_TRACKING = os.environ.get('CACHE_WARM_TRACKING', 'True') == 'True'
+CACHE_WARM_WINDOW_DAYS = int(os.environ.get('CACHE_WARM_WINDOW_DAYS', 7))
+CACHE_WARM_TOP_N = int(os.environ.get('CACHE_WARM_TOP_N', 50))
+CACHE_WARM_AHEAD_SECONDS = int(os.environ.get('CACHE_WARM_AHEAD_SECONDS', 600))       # Refresh keys expiring sooner
+CACHE_WARM_MAX_UPSTREAM_CALLS = int(os.environ.get('CACHE_WARM_MAX_UPSTREAM_CALLS', 100))  # Budget per run
+CACHE_WARM_INTERVAL = int(os.environ.get('CACHE_WARM_INTERVAL', 0))                   # Seconds, 0 disables the scheduler
+
+# Historical backfill (`manage.py backfill_weather`): days per upstream call and concurrent calls
+BACKFILL_CHUNK_DAYS = int(os.environ.get('BACKFILL_CHUNK_DAYS', 90))
+BACKFILL_MAX_WORKERS = int(os.environ.get('BACKFILL_MAX_WORKERS', 4))
+
+# Concurrent weather API requests for the same date range made by the multi-city batch endpoint
+# and the backfill are merged into one multi-location call: the first request waits up to
+# WEATHER_BATCH_WAIT seconds for others to join, and a call carries at most
+# WEATHER_BATCH_MAX_LOCATIONS points. Single-city requests are sent at once, a sync worker
+# serves one request at a time and would only wait. A size of 1 or a wait of 0 disables batching.
+WEATHER_BATCH_MAX_LOCATIONS = int(os.environ.get('WEATHER_BATCH_MAX_LOCATIONS', 50))
+WEATHER_BATCH_WAIT = float(os.environ.get('WEATHER_BATCH_WAIT', 0.005))  # Seconds
+
+# PostgreSQL range partitioning of the weather data table by date ("year" or "month"), opt-in:
+# migration 0007 only converts the table when enabled, or `manage.py create_weather_partitions
+# --convert` later. Requests never run DDL; rows of dates without a partition go to the default
+# partition until the command (run it from cron) creates WEATHER_PARTITION_AHEAD future partitions.
+WEATHER_PARTITIONING = os.environ.get('WEATHER_PARTITIONING', 'False') == 'True'
+WEATHER_PARTITION_INTERVAL = os.environ.get('WEATHER_PARTITION_INTERVAL', 'year')
+WEATHER_PARTITION_AHEAD = int(os.environ.get('WEATHER_PARTITION_AHEAD', 1))
+
+# HTTP caching of the average and history responses: max-age of responses that change when new
+# data is stored, and of history pages that only cover past days
+HTTP_CACHE_MAX_AGE = int(os.environ.get('HTTP_CACHE_MAX_AGE', 300))  # 5 minutes
+HTTP_CACHE_PAST_MAX_AGE = int(os.environ.get('HTTP_CACHE_PAST_MAX_AGE', 86400))  # 1 day
+
+# The average and history views build their response data directly instead of running the
+# response serializers over values they computed or read themselves
+API_LEAN_SERIALIZATION = os.environ.get('API_LEAN_SERIALIZATION', 'True') == 'True'
@@ -16,3 +16,84 @@ def get_date_range(days_back):
     end_date = datetime.now().date()
     start_date = end_date - timedelta(days=days_back)
     return start_date, end_date
+
+def get_recent_start(recent_days):
+    """
+    Get the first of the most recent days, today included
+    
+    Args:
+        recent_days (int): Number of recent days
+        
+    Returns:
+        date: First recent date
+    """
+    return datetime.now().date() - timedelta(days=max(1, recent_days) - 1)
+
+def format_iso_datetime(value, current_timezone):
+    """
+    Represent a datetime as DRF's DateTimeField does with the default ISO 8601 format
+    
+    Args:
+        value (datetime): Datetime to represent
+        current_timezone (tzinfo): Time zone of the representation
+        
+    Returns:
+        str: ISO 8601 string, Z for UTC
+    """
+    if value.tzinfo is not None:
+        value = value.astimezone(current_timezone)
+    value = value.isoformat()
+    if value.endswith('+00:00'):
+        value = value[:-6] + 'Z'
+    return value
+
+def get_missing_date_ranges(start_date, end_date, existing_dates, max_gap_days=0):
+    """
+    Find the date sub-ranges within [start_date, end_date] that are not covered
+    by existing_dates, merged into as few ranges as possible
+    
+    Args:
+        start_date (date): First date of the range (inclusive)
+        end_date (date): Last date of the range (inclusive)
+        existing_dates (iterable): Dates already available
+        max_gap_days (int): Merge two missing ranges separated by at most this
+            many available dates, trading a few re-fetched days for one less call
+        
+    Returns:
+        list: List of (start_date, end_date) tuples, both inclusive, in order
+    """
+    existing = set(existing_dates)
+    ranges = []
+    current = start_date
+    
+    while current <= end_date:
+        if current not in existing:
+            if ranges and (current - ranges[-1][1]).days - 1 <= max_gap_days:
+                ranges[-1] = (ranges[-1][0], current)
+            else:
+                ranges.append((current, current))
+        current += timedelta(days=1)
+        
+    return ranges
+
+def split_date_range(start_date, end_date, chunk_days):
+    """
+    Split a date range into consecutive chunks of at most chunk_days dates
+    
+    Args:
+        start_date (date): First date of the range (inclusive)
+        end_date (date): Last date of the range (inclusive)
+        chunk_days (int): Maximum number of dates per chunk
+        
+    Returns:
+        list: List of (start_date, end_date) tuples, both inclusive, in order
+    """
+    chunks = []
+    current = start_date
+    
+    while current <= end_date:
+        chunk_end = min(end_date, current + timedelta(days=max(1, chunk_days) - 1))
+        chunks.append((current, chunk_end))
+        current = chunk_end + timedelta(days=1)
+        
+    return chunks
@@ -0,0 +1,19 @@
+"""
+Geographic utility functions
+"""
+
+def snap_coordinate(value, resolution):
+    """
+    Snap a latitude or longitude to the nearest point of a regular grid
+    
+    Args:
+        value (float): Coordinate in degrees
+        resolution (float): Grid spacing in degrees, 0 or less leaves the value unchanged
+        
+    Returns:
+        float: Snapped coordinate, e.g. 40.7128 -> 40.7 with a 0.1 grid
+    """
+    if resolution <= 0:
+        return value
+    # Rounding again removes floating point noise such as 40.699999999999996
+    return round(round(value / resolution) * resolution, 6)
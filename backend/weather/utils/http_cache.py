@@ -0,0 +1,96 @@
+"""
+Validators and cache headers of API responses
+"""
+import hashlib
+from datetime import datetime, timedelta
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+def make_etag(*parts):
+    """
+    Build a strong ETag from everything a response body depends on
+    
+    Args:
+        *parts: Values identifying the body, converted with str()
+    
+    Returns:
+        str: Quoted ETag
+    """
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+    return quote_etag(digest)
+
+def accepts_encoding(accept_encoding, coding):
+    """
+    Check whether an Accept-Encoding header accepts a content coding, a
+    q-value of 0 refusing it
+    
+    Args:
+        accept_encoding (str): Value of the Accept-Encoding header
+        coding (str): Content coding, e.g. "gzip"
+    
+    Returns:
+        bool: True if the coding is accepted by name or through "*"
+    """
+    qualities = {}
+    for entry in accept_encoding.split(","):
+        name, _, params = entry.partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[name] = quality
+    return qualities.get(coding, qualities.get("*", 0.0)) > 0
+
+def seconds_until_tomorrow():
+    """
+    Get the number of seconds until the date used by get_date_range changes
+    
+    Returns:
+        int: Seconds until midnight, at least 1
+    """
+    now = datetime.now()
+    midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+    return max(1, int((midnight - now).total_seconds()))
+
+def get_not_modified_response(request, etag, last_modified=None):
+    """
+    Answer a conditional request whose validators still match
+    
+    Args:
+        request (Request): Current request
+        etag (str): Quoted ETag of the current representation
+        last_modified (datetime, optional): When the underlying data last changed
+    
+    Returns:
+        HttpResponse: 304 or 412 response, None when the full response must be sent
+    """
+    timestamp = int(last_modified.timestamp()) if last_modified is not None else None
+    return get_conditional_response(request, etag=etag, last_modified=timestamp)
+
+def set_cache_headers(response, etag, last_modified, max_age):
+    """
+    Add the validators and caching directives to a response
+    
+    Args:
+        response (HttpResponse): Response to patch
+        etag (str): Quoted ETag
+        last_modified (datetime): When the underlying data last changed, or None
+        max_age (int): Seconds shared caches and clients may reuse the response
+    
+    Returns:
+        HttpResponse: The patched response
+    """
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    patch_cache_control(response, public=True, max_age=max_age)
+    # The browsable API and JSON renderings of the same URL are different bodies
+    patch_vary_headers(response, ('Accept',))
+    return response
@@ -0,0 +1,105 @@
+"""
+In-process LRU cache used as a first tier in front of the shared cache
+"""
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+class LocalLRUCache:
+    """
+    Thread-safe LRU cache bounded by entry count and approximate size in bytes,
+    with a short time-to-live for every entry
+    """
+    
+    def __init__(self, max_entries, max_bytes, ttl):
+        """
+        Args:
+            max_entries (int): Maximum number of entries kept
+            max_bytes (int): Maximum total pickled size of the entries kept
+            ttl (float): Seconds an entry stays valid
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (value, expires_at, size)
+        self._size = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+    
+    def get(self, key, default=None):
+        """
+        Get a value and mark it as recently used
+        
+        Args:
+            key (str): Cache key
+            default (Any): Value returned on a miss
+            
+        Returns:
+            Any: The cached value or default
+        """
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None or item[1] <= time.monotonic():
+                if item is not None:
+                    self._remove(key)
+                self._stats["misses"] += 1
+                return default
+            
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return item[0]
+    
+    def set(self, key, value):
+        """
+        Store a value, evicting least recently used entries to stay within bounds
+        
+        Args:
+            key (str): Cache key
+            value (Any): Picklable value
+        """
+        size = len(pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+        if size > self.max_bytes:
+            return
+        
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, time.monotonic() + self.ttl, size)
+            self._size += size
+            
+            while len(self._entries) > self.max_entries or self._size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self._stats["evictions"] += 1
+    
+    def delete(self, key):
+        """
+        Remove a value if present
+        
+        Args:
+            key (str): Cache key
+        """
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+    
+    def clear(self):
+        """Remove all values"""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+    
+    def stats(self):
+        """
+        Get usage statistics
+        
+        Returns:
+            dict: Hits, misses, evictions, entry count and size in bytes
+        """
+        with self._lock:
+            return dict(self._stats, entries=len(self._entries), bytes=self._size)
+    
+    def _remove(self, key):
+        """Remove an entry, the caller must hold the lock"""
+        _, _, size = self._entries.pop(key)
+        self._size -= size
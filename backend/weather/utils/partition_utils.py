@@ -0,0 +1,317 @@
+"""
+PostgreSQL range partitioning of the weather data table by date
+"""
+import logging
+import re
+import threading
+from datetime import date, datetime, timedelta
+from django.db import transaction
+from weather.utils.constants import WEATHER_PARTITION_INTERVAL, WEATHER_PARTITION_AHEAD
+
+logger = logging.getLogger(__name__)
+
+WEATHER_TABLE = "weather_weatherdata"
+DEFAULT_PARTITION = f"{WEATHER_TABLE}_default"
+BRIN_INDEX = "weather_date_brin_idx"
+
+_BOUND_PATTERN = re.compile(r"FROM \('([\d-]+)'\) TO \('([\d-]+)'\)")
+
+# Partitioning state of the table as seen by this process, loaded on first use
+_state_lock = threading.Lock()
+_state = {"partitioned": None, "bounds": []}
+
+def interval_bounds(date_obj, interval=WEATHER_PARTITION_INTERVAL):
+    """
+    Get the partition range containing a date
+    
+    Args:
+        date_obj (date): Date to place
+        interval (str): "year" or "month"
+    
+    Returns:
+        tuple: (start_date, end_date), start inclusive and end exclusive
+    """
+    if interval == "month":
+        start = date_obj.replace(day=1)
+        return start, (start + timedelta(days=32)).replace(day=1)
+    start = date_obj.replace(month=1, day=1)
+    return start, start.replace(year=start.year + 1)
+
+def partition_name(start, interval=WEATHER_PARTITION_INTERVAL):
+    """
+    Get the table name of the partition starting at a date
+    
+    Args:
+        start (date): First date of the partition
+        interval (str): "year" or "month"
+    
+    Returns:
+        str: Table name, e.g. weather_weatherdata_2025 or weather_weatherdata_2025_01
+    """
+    return f"{WEATHER_TABLE}_{start:%Y_%m}" if interval == "month" else f"{WEATHER_TABLE}_{start:%Y}"
+
+def is_partitioned(connection):
+    """
+    Check whether the weather data table is partitioned
+    
+    Args:
+        connection: Django database connection
+    
+    Returns:
+        bool: True on PostgreSQL once the table was converted
+    """
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s))",
+            [WEATHER_TABLE]
+        )
+        return cursor.fetchone()[0]
+
+def get_partition_bounds(connection):
+    """
+    Get the date ranges of the partitions, the default partition left out
+    
+    Args:
+        connection: Django database connection
+    
+    Returns:
+        list: (start_date, end_date) tuples, start inclusive and end exclusive, in order
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT pg_get_expr(c.relpartbound, c.oid) FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid WHERE i.inhparent = to_regclass(%s)",
+            [WEATHER_TABLE]
+        )
+        bounds = []
+        for (expression,) in cursor.fetchall():
+            match = _BOUND_PATTERN.search(expression or "")
+            if match:
+                bounds.append((date.fromisoformat(match.group(1)), date.fromisoformat(match.group(2))))
+    return sorted(bounds)
+
+def reset_partition_cache():
+    """Forget the partitioning state, e.g. after converting the table or rolling back"""
+    with _state_lock:
+        _state["partitioned"] = None
+        _state["bounds"] = []
+
+def ensure_partitions(connection, dates, interval=WEATHER_PARTITION_INTERVAL):
+    """
+    Create the partitions the dates fall in when they do not exist yet, so rows
+    do not end up in the default partition. Does nothing unless the table is
+    partitioned. Runs DDL, so it is meant for create_weather_partitions and not
+    for the request path.
+    
+    Args:
+        connection: Django database connection
+        dates (iterable): Dates about to be written
+        interval (str): "year" or "month", for new partitions
+    
+    Returns:
+        list: Names of the created partitions
+    """
+    if connection.vendor != 'postgresql':
+        return []
+    
+    with _state_lock:
+        if _state["partitioned"] is None:
+            _state["partitioned"] = is_partitioned(connection)
+            _state["bounds"] = get_partition_bounds(connection) if _state["partitioned"] else []
+        if not _state["partitioned"]:
+            return []
+        bounds = list(_state["bounds"])
+    
+    missing = sorted({
+        interval_bounds(date_obj, interval)
+        for date_obj in dates
+        if not any(start <= date_obj < end for start, end in bounds)
+    })
+    
+    created = []
+    for start, end in missing:
+        if create_partition(connection, start, end, partition_name(start, interval)):
+            created.append(partition_name(start, interval))
+    return created
+
+def create_partition(connection, start, end, name):
+    """
+    Create and attach a partition, moving its rows out of the default partition
+    
+    Args:
+        connection: Django database connection
+        start (date): First date of the partition
+        end (date): Day after the last date of the partition
+        name (str): Table name of the partition
+    
+    Returns:
+        bool: False if an existing partition already overlaps the range
+    """
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        # Workers writing new dates at the same time create the partition once
+        cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", [WEATHER_TABLE])
+        bounds = get_partition_bounds(connection)
+        with _state_lock:
+            _state["bounds"] = bounds
+        if any(start < existing_end and existing_start < end for existing_start, existing_end in bounds):
+            return False
+        
+        # Attaching fails while the default partition holds rows of the range, so they move first
+        cursor.execute(f"CREATE TABLE {name} (LIKE {WEATHER_TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+        cursor.execute(
+            f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} WHERE date >= %s AND date < %s RETURNING *) "
+            f"INSERT INTO {name} SELECT * FROM moved",
+            [start, end]
+        )
+        moved = cursor.rowcount
+        cursor.execute(
+            f"ALTER TABLE {WEATHER_TABLE} ATTACH PARTITION {name} "
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        )
+    
+    with _state_lock:
+        _state["bounds"] = sorted(bounds + [(start, end)])
+    logger.info(f"Created weather data partition {name} from {start} to {end}, moved {moved} rows into it")
+    return True
+
+def partition_weather_table(connection, interval=WEATHER_PARTITION_INTERVAL, ahead=WEATHER_PARTITION_AHEAD):
+    """
+    Convert the weather data table into a table partitioned by date range. The
+    rows are copied into partitions covering the stored dates up to ahead
+    intervals from today, plus a default partition; indexes and constraints
+    keep their names, the primary key becomes (id, date) as PostgreSQL requires
+    and a BRIN index on date is added. Rewrites the whole table.
+    
+    Args:
+        connection: Django database connection (PostgreSQL)
+        interval (str): "year" or "month"
+        ahead (int): Number of future partitions to create
+    """
+    if is_partitioned(connection):
+        return
+    
+    def create_partitions(cursor, source):
+        cursor.execute(f"SELECT min(date), max(date) FROM {source}")
+        first, last = cursor.fetchone()
+        today = datetime.now().date()
+        start = interval_bounds(min(first or today, today), interval)[0]
+        last = max(last or today, today)
+        for _ in range(ahead):
+            last = interval_bounds(last, interval)[1]
+        
+        while start <= last:
+            end = interval_bounds(start, interval)[1]
+            cursor.execute(
+                f"CREATE TABLE {partition_name(start, interval)} PARTITION OF {WEATHER_TABLE} "
+                f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+            )
+            start = end
+        cursor.execute(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {WEATHER_TABLE} DEFAULT")
+    
+    _rebuild_table(
+        connection,
+        partition_clause="PARTITION BY RANGE (date)",
+        primary_key="PRIMARY KEY (id, date)",
+        create_partitions=create_partitions,
+        extra_indexes=[f"CREATE INDEX {BRIN_INDEX} ON {WEATHER_TABLE} USING brin (date)"],
+        skipped_indexes=[]
+    )
+
+def unpartition_weather_table(connection):
+    """
+    Convert the partitioned weather data table back into a single table
+    
+    Args:
+        connection: Django database connection (PostgreSQL)
+    """
+    if not is_partitioned(connection):
+        return
+    
+    _rebuild_table(
+        connection,
+        partition_clause="",
+        primary_key="PRIMARY KEY (id)",
+        create_partitions=None,
+        extra_indexes=[],
+        skipped_indexes=[BRIN_INDEX]
+    )
+
+def _rebuild_table(connection, partition_clause, primary_key, create_partitions, extra_indexes, skipped_indexes):
+    """
+    Recreate the weather data table with the same columns, constraints and
+    indexes, copying the rows over
+    
+    Args:
+        connection: Django database connection (PostgreSQL)
+        partition_clause (str): Partitioning clause of the new table, empty for a plain table
+        primary_key (str): Primary key definition of the new table
+        create_partitions (callable): Called with a cursor and the old table name to create partitions
+        extra_indexes (list): CREATE INDEX statements run after the copy
+        skipped_indexes (list): Names of indexes of the old table that are not recreated
+    """
+    old_table = f"{WEATHER_TABLE}_old"
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        cursor.execute(f"LOCK TABLE {WEATHER_TABLE} IN ACCESS EXCLUSIVE MODE")
+        
+        # Constraint and index definitions, to recreate them under the same names
+        cursor.execute(
+            "SELECT conname, contype, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = to_regclass(%s) AND contype IN ('p', 'u', 'f')",
+            [WEATHER_TABLE]
+        )
+        constraints = cursor.fetchall()
+        cursor.execute(
+            "SELECT indexname, indexdef FROM pg_indexes WHERE schemaname = current_schema() AND tablename = %s",
+            [WEATHER_TABLE]
+        )
+        constraint_names = {name for name, _, _ in constraints}
+        # Indexes of a partitioned table are defined ON ONLY the parent, which would not recurse
+        indexes = [
+            definition.replace(" ON ONLY ", " ON ", 1) for name, definition in cursor.fetchall()
+            if name not in constraint_names and name not in skipped_indexes
+        ]
+        
+        # Django creates id as an identity column, older schemas as a serial
+        cursor.execute(
+            "SELECT attidentity FROM pg_attribute WHERE attrelid = to_regclass(%s) AND attname = 'id'",
+            [WEATHER_TABLE]
+        )
+        identity = cursor.fetchone()[0] != ''
+        cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", [WEATHER_TABLE])
+        sequence = cursor.fetchone()[0]
+        
+        cursor.execute(f"ALTER TABLE {WEATHER_TABLE} RENAME TO {old_table}")
+        cursor.execute(
+            f"CREATE TABLE {WEATHER_TABLE} (LIKE {old_table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS"
+            f"{' INCLUDING IDENTITY' if identity else ''}) {partition_clause}"
+        )
+        if create_partitions is not None:
+            create_partitions(cursor, old_table)
+        cursor.execute(f"INSERT INTO {WEATHER_TABLE} SELECT * FROM {old_table}")
+        
+        if identity:
+            # The new identity continues after the copied ids, under the usual sequence name
+            cursor.execute(
+                f"SELECT setval(pg_get_serial_sequence(%s, 'id'), coalesce(max(id), 0) + 1, false) FROM {WEATHER_TABLE}",
+                [WEATHER_TABLE]
+            )
+        else:
+            cursor.execute(f"ALTER SEQUENCE {sequence} OWNED BY {WEATHER_TABLE}.id")
+        cursor.execute(f"DROP TABLE {old_table}")
+        if identity:
+            cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", [WEATHER_TABLE])
+            new_sequence = cursor.fetchone()[0]
+            if new_sequence != sequence:
+                cursor.execute(f"ALTER SEQUENCE {new_sequence} RENAME TO {sequence.split('.')[-1]}")
+        
+        for name, contype, definition in constraints:
+            if contype == 'p':
+                definition = primary_key
+            cursor.execute(f"ALTER TABLE {WEATHER_TABLE} ADD CONSTRAINT {name} {definition}")
+        for definition in indexes + extra_indexes:
+            cursor.execute(definition)
+        cursor.execute(f"ANALYZE {WEATHER_TABLE}")
+    
+    reset_partition_cache()
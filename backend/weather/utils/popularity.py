@@ -0,0 +1,99 @@
+"""
+Request popularity counters shared by all workers through Redis
+"""
+import logging
+import threading
+from collections import Counter
+from datetime import date, timedelta
+from weather.utils.redis_utils import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+class PopularityTracker:
+    """
+    Counts how often members (e.g. cache keys) are requested over a sliding
+    window of days. Counts are kept in one Redis sorted set per day, so old
+    days expire on their own and the top members are one union away; without
+    Redis they are kept per process.
+    """
+    
+    def __init__(self, name, window_days):
+        """
+        Args:
+            name (str): Name of the counted requests, used in Redis keys
+            window_days (int): Number of days counted, including today
+        """
+        self.name = name
+        self.window_days = max(1, window_days)
+        self._lock = threading.Lock()
+        self._local_counts = {}
+    
+    def _day_key(self, day):
+        return f"popularity_{self.name}_{day:%Y%m%d}"
+    
+    def _window(self):
+        today = date.today()
+        return [today - timedelta(days=offset) for offset in range(self.window_days)]
+    
+    def record(self, member):
+        """
+        Count one request of a member
+        
+        Args:
+            member (str): Requested member
+        """
+        client = get_redis_client()
+        if client is None:
+            with self._lock:
+                window = self._window()
+                for day in [day for day in self._local_counts if day not in window]:
+                    del self._local_counts[day]
+                self._local_counts.setdefault(window[0], Counter())[member] += 1
+            return
+        
+        key = self._day_key(date.today())
+        pipeline = client.pipeline(transaction=False)
+        pipeline.zincrby(key, 1, member)
+        pipeline.expire(key, (self.window_days + 1) * 86400)
+        pipeline.execute()
+    
+    def top(self, limit):
+        """
+        Get the most requested members of the window
+        
+        Args:
+            limit (int): Maximum number of members
+        
+        Returns:
+            list: (member, count) tuples, most requested first
+        """
+        client = get_redis_client()
+        if client is None:
+            totals = Counter()
+            with self._lock:
+                window = self._window()
+                for day, counts in self._local_counts.items():
+                    if day in window:
+                        totals.update(counts)
+            return totals.most_common(limit)
+        
+        # One transaction, so concurrent callers do not share the temporary union
+        union_key = f"popularity_{self.name}_top"
+        pipeline = client.pipeline()
+        pipeline.zunionstore(union_key, [self._day_key(day) for day in self._window()])
+        pipeline.zrevrange(union_key, 0, limit - 1, withscores=True)
+        pipeline.delete(union_key)
+        _, members, _ = pipeline.execute()
+        return [
+            (member.decode() if isinstance(member, bytes) else member, int(count))
+            for member, count in members
+        ]
+    
+    def clear(self):
+        """Forget every count"""
+        client = get_redis_client()
+        if client is None:
+            with self._lock:
+                self._local_counts.clear()
+            return
+        client.delete(*[self._day_key(day) for day in self._window()])
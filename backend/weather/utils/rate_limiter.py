@@ -0,0 +1,242 @@
+"""
+Distributed token bucket rate limiter shared by all workers through Redis
+"""
+import contextvars
+import logging
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from weather.utils.redis_utils import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_INTERACTIVE = "interactive"
+PRIORITY_BACKGROUND = "background"
+
+# Priority used by acquire() when none is given, see TokenBucketRateLimiter.priority()
+_current_priority = contextvars.ContextVar("rate_limit_priority", default=PRIORITY_INTERACTIVE)
+
+# Refills the bucket, then takes a token or registers the caller as waiting.
+# Background callers yield while any interactive caller is waiting.
+# Returns the number of seconds to wait before trying again, 0 when a token was taken.
+TOKEN_BUCKET_SCRIPT = """
+local bucket_key, interactive_key, background_key = KEYS[1], KEYS[2], KEYS[3]
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local priority = ARGV[3]
+local waiter = ARGV[4]
+local waiter_ttl = tonumber(ARGV[5])
+
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+
+redis.call('ZREMRANGEBYSCORE', interactive_key, '-inf', now)
+redis.call('ZREMRANGEBYSCORE', background_key, '-inf', now)
+local own_key = background_key
+if priority == 'interactive' then own_key = interactive_key end
+
+local state = redis.call('HMGET', bucket_key, 'tokens', 'updated_at')
+local tokens = tonumber(state[1]) or capacity
+local updated_at = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated_at) * rate)
+
+local wait = 0
+if priority ~= 'interactive' and redis.call('ZCARD', interactive_key) > 0 then
+    wait = 1 / rate
+elseif tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+
+redis.call('HSET', bucket_key, 'tokens', tokens, 'updated_at', now)
+redis.call('EXPIRE', bucket_key, math.ceil(capacity / rate) + 60)
+if wait > 0 then
+    redis.call('ZADD', own_key, now + waiter_ttl, waiter)
+    redis.call('EXPIRE', own_key, math.ceil(waiter_ttl) + 60)
+else
+    redis.call('ZREM', own_key, waiter)
+end
+return tostring(wait)
+"""
+
+class TokenBucketRateLimiter:
+    """
+    Token bucket rate limiter. The bucket lives in Redis so the budget is
+    shared by every worker and container; without Redis it falls back to a
+    per-process bucket. Callers only wait when the budget is used up, and
+    interactive callers are served before background ones.
+    """
+    
+    def __init__(self, name, rate, capacity):
+        """
+        Args:
+            name (str): Name of the limited resource, used in Redis keys
+            rate (float): Tokens added per second
+            capacity (int): Maximum number of tokens, i.e. the allowed burst
+        """
+        self.name = name
+        self.rate = rate
+        self.capacity = capacity
+        self._script = None
+        self._lock = threading.Lock()
+        self._local_state = {"tokens": capacity, "updated_at": time.monotonic()}
+        self._local_waiters = {PRIORITY_INTERACTIVE: {}, PRIORITY_BACKGROUND: {}}
+        self._stats = {
+            "acquired": 0,
+            "waited": 0,
+            "wait_seconds_total": 0.0,
+            "wait_seconds_max": 0.0,
+            "timeouts": 0,
+        }
+    
+    @property
+    def _keys(self):
+        prefix = f"rate_limit_{self.name}"
+        return [prefix, f"{prefix}_waiting_interactive", f"{prefix}_waiting_background"]
+    
+    @staticmethod
+    @contextmanager
+    def priority(priority):
+        """
+        Set the priority of every acquire() made in this context, e.g. for
+        background cache warming
+        
+        Args:
+            priority (str): PRIORITY_INTERACTIVE or PRIORITY_BACKGROUND
+        """
+        token = _current_priority.set(priority)
+        try:
+            yield
+        finally:
+            _current_priority.reset(token)
+    
+    def acquire(self, priority=None, timeout=None):
+        """
+        Take a token, waiting until one is available
+        
+        Args:
+            priority (str, optional): PRIORITY_INTERACTIVE or PRIORITY_BACKGROUND,
+                defaults to the priority of the current context
+            timeout (float, optional): Maximum number of seconds to wait
+            
+        Returns:
+            float: Seconds spent waiting
+            
+        Raises:
+            TimeoutError: If no token became available within the timeout
+        """
+        priority = priority or _current_priority.get()
+        waiter = uuid.uuid4().hex
+        start = time.monotonic()
+        slept = False
+        
+        while True:
+            wait = self._try_acquire(priority, waiter, timeout)
+            waited = time.monotonic() - start if slept else 0.0
+            if wait <= 0:
+                self._record(waited)
+                return waited
+            
+            if timeout is not None and waited + wait > timeout:
+                self._remove_waiter(priority, waiter)
+                with self._lock:
+                    self._stats["timeouts"] += 1
+                raise TimeoutError(f"Rate limit for {self.name} not available within {timeout} seconds")
+            
+            time.sleep(wait)
+            slept = True
+    
+    def stats(self):
+        """
+        Get wait time statistics of this process and the current queue depth
+        
+        Returns:
+            dict: Counters, wait times and number of waiting callers per priority
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        stats["queue_depth"] = self._queue_depth()
+        return stats
+    
+    def _record(self, waited):
+        with self._lock:
+            self._stats["acquired"] += 1
+            if waited > 0:
+                self._stats["waited"] += 1
+                self._stats["wait_seconds_total"] += waited
+                self._stats["wait_seconds_max"] = max(self._stats["wait_seconds_max"], waited)
+    
+    def _waiter_ttl(self, timeout):
+        # A waiter that crashed stops counting as queued after this long
+        return (timeout or 0) + 2 / self.rate + 1
+    
+    def _try_acquire(self, priority, waiter, timeout):
+        """
+        Take a token or register as waiting
+        
+        Returns:
+            float: Seconds to wait before trying again, 0 when a token was taken
+        """
+        client = get_redis_client()
+        if client is None:
+            return self._try_acquire_local(priority, waiter, timeout)
+        
+        if self._script is None:
+            self._script = client.register_script(TOKEN_BUCKET_SCRIPT)
+        return float(self._script(
+            keys=self._keys,
+            args=[self.rate, self.capacity, priority, waiter, self._waiter_ttl(timeout)],
+            client=client
+        ))
+    
+    def _try_acquire_local(self, priority, waiter, timeout):
+        """Same as the Redis script, for a bucket kept in this process"""
+        with self._lock:
+            now = time.monotonic()
+            for waiters in self._local_waiters.values():
+                for expired in [w for w, expires_at in waiters.items() if expires_at <= now]:
+                    del waiters[expired]
+            
+            state = self._local_state
+            tokens = min(self.capacity, state["tokens"] + (now - state["updated_at"]) * self.rate)
+            
+            wait = 0
+            if priority != PRIORITY_INTERACTIVE and self._local_waiters[PRIORITY_INTERACTIVE]:
+                wait = 1 / self.rate
+            elif tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / self.rate
+            
+            state["tokens"], state["updated_at"] = tokens, now
+            own_waiters = self._local_waiters[
+                PRIORITY_INTERACTIVE if priority == PRIORITY_INTERACTIVE else PRIORITY_BACKGROUND
+            ]
+            if wait > 0:
+                own_waiters[waiter] = now + self._waiter_ttl(timeout)
+            else:
+                own_waiters.pop(waiter, None)
+            return wait
+    
+    def _remove_waiter(self, priority, waiter):
+        client = get_redis_client()
+        if client is None:
+            with self._lock:
+                for waiters in self._local_waiters.values():
+                    waiters.pop(waiter, None)
+            return
+        _, interactive_key, background_key = self._keys
+        client.zrem(interactive_key if priority == PRIORITY_INTERACTIVE else background_key, waiter)
+    
+    def _queue_depth(self):
+        client = get_redis_client()
+        if client is None:
+            with self._lock:
+                return {priority: len(waiters) for priority, waiters in self._local_waiters.items()}
+        _, interactive_key, background_key = self._keys
+        return {
+            PRIORITY_INTERACTIVE: client.zcard(interactive_key),
+            PRIORITY_BACKGROUND: client.zcard(background_key),
+        }
@@ -0,0 +1,21 @@
+"""
+Redis access utilities for features that need more than the Django cache API
+"""
+import logging
+
+logger = logging.getLogger(__name__)
+
+def get_redis_client():
+    """
+    Get the raw Redis client behind the default cache
+    
+    Returns:
+        Redis: Redis client, or None if the default cache is not backed by django-redis
+    """
+    try:
+        from django_redis import get_redis_connection
+        return get_redis_connection("default")
+    except NotImplementedError:
+        # Raised by django-redis when the configured cache backend is not Redis
+        logger.debug("Default cache is not backed by Redis")
+        return None
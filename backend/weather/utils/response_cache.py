@@ -0,0 +1,76 @@
+"""
+Cache of rendered API responses, invalidated per city when its weather data is rewritten
+"""
+import logging
+import uuid
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "response_"
+GENERATION_KEY_PREFIX = "response_generation_"
+
+class ResponseCache:
+    """
+    Rendered responses stored in the shared cache under a group, the
+    normalized city whose data they were built from. Every entry records the
+    generation of its group when the data was read; invalidating a group
+    moves it to a new generation, so all of its entries miss at once without
+    knowing their keys.
+    """
+    
+    @staticmethod
+    def get(key, group):
+        """
+        Look up a response and the current generation of its group with one round trip
+        
+        Args:
+            key (str): Response key
+            group (str): Group of the response
+        
+        Returns:
+            tuple: (value, generation), value is None on a miss; pass the
+                generation to set() once the response is built
+        """
+        entry_key = f"{KEY_PREFIX}{key}"
+        generation_key = f"{GENERATION_KEY_PREFIX}{group}"
+        found = cache.get_many([entry_key, generation_key])
+        generation = found.get(generation_key)
+        if generation is None:
+            # A group without a generation gets one, entries stored under None would
+            # match again once an invalidated generation is evicted
+            cache.add(generation_key, uuid.uuid4().hex, None)
+            return None, cache.get(generation_key)
+        entry = found.get(entry_key)
+        if entry is None or entry[0] != generation:
+            return None, generation
+        return entry[1], generation
+    
+    @staticmethod
+    def set(key, generation, value, timeout):
+        """
+        Store a response
+        
+        Args:
+            key (str): Response key
+            generation (str): Generation returned by get() before the data was read,
+                so a rewrite in the meantime makes the entry miss
+            value (Any): Response to store
+            timeout (int): Cache timeout in seconds
+        """
+        if generation is not None:
+            cache.set(f"{KEY_PREFIX}{key}", (generation, value), timeout)
+    
+    @staticmethod
+    def invalidate(group):
+        """
+        Drop every response of a group
+        
+        Args:
+            group (str): Group whose data changed
+        """
+        try:
+            cache.set(f"{GENERATION_KEY_PREFIX}{group}", uuid.uuid4().hex, None)
+        except Exception as e:
+            # A lost invalidation leaves entries until they expire, it must not fail the write
+            logger.warning(f"Could not invalidate cached responses of {group}: {str(e)}")
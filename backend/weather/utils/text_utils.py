@@ -0,0 +1,22 @@
+"""
+Text normalization utilities
+"""
+import re
+import unicodedata
+
+_NON_ALPHANUMERIC = re.compile(r"[\W_]+", re.UNICODE)
+
+def normalize_city_name(name):
+    """
+    Normalize a city name for lookups: diacritics are removed, case is folded
+    and punctuation and repeated whitespace collapse to single spaces
+    
+    Args:
+        name (str): City name as typed by a user or found in a dataset
+        
+    Returns:
+        str: Normalized name, e.g. "Saint-Étienne " -> "saint etienne"
+    """
+    decomposed = unicodedata.normalize("NFKD", name)
+    without_marks = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return _NON_ALPHANUMERIC.sub(" ", without_marks.casefold()).strip()
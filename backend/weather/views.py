@@ -1,7 +1,13 @@
+from datetime import date, datetime
 from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import generics
+from rest_framework.exceptions import ValidationError
+from django.db import connection
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_sequence
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 
@@ -9,11 +15,53 @@ from .models import WeatherData
 from .serializers import (
     WeatherAverageRequestSerializer, 
     WeatherAverageResponseSerializer,
-    WeatherDataSerializer
+    WeatherBatchAverageRequestSerializer,
+    WeatherBatchAverageResponseSerializer,
+    WeatherDataSerializer,
+    represent_average,
+    represent_weather_data
 )
+from .integration.services.cache_warming import KIND_AVERAGE, KIND_HISTORY, CacheWarmingService
 from .integration.services.weather import WeatherService
+from .pagination import KeysetPagination
 from .utils.date_utils import get_date_range
+from .utils.constants import (
+    API_LEAN_SERIALIZATION,
+    CACHE_TIMEOUT_HOUR,
+    EXPORT_CHUNK_SIZE,
+    EXPORT_COLUMNAR_BATCH_SIZE,
+    HTTP_CACHE_MAX_AGE,
+    HTTP_CACHE_PAST_MAX_AGE
+)
 from .utils.error_handlers import handle_api_exception
+from .utils.export_utils import iter_arrow, iter_csv, iter_ndjson, iter_parquet
+from .utils.http_cache import (
+    accepts_encoding,
+    get_not_modified_response,
+    make_etag,
+    seconds_until_tomorrow,
+    set_cache_headers
+)
+from .utils.response_cache import ResponseCache
+from .utils.text_utils import normalize_city_name
+
+# How the city filter of the history endpoint matches names
+CITY_MATCH_MODES = ('exact', 'prefix', 'contains', 'fuzzy')
+
+# Encoder, content type, rows per encoded chunk and whether gzip helps, per export format.
+# The columnar formats are compressed internally and use row groups/batches of many rows.
+EXPORT_FORMATS = {
+    'csv': (iter_csv, 'text/csv', EXPORT_CHUNK_SIZE, True),
+    'ndjson': (iter_ndjson, 'application/x-ndjson', EXPORT_CHUNK_SIZE, True),
+    'parquet': (iter_parquet, 'application/vnd.apache.parquet', EXPORT_COLUMNAR_BATCH_SIZE, False),
+    'arrow': (iter_arrow, 'application/vnd.apache.arrow.stream', EXPORT_COLUMNAR_BATCH_SIZE, False),
+}
+
+# Longest city name accepted by WeatherAverageRequestSerializer
+CITY_MAX_LENGTH = 100
+
+# Columns of the history export, the fields of WeatherDataSerializer
+EXPORT_FIELDS = ['id', 'city', 'date', 'temperature', 'timestamp']
 
 class WeatherAverageView(APIView):
     """
@@ -34,6 +82,14 @@ class WeatherAverageView(APIView):
     )
     @handle_api_exception
     def get(self, request):
+        # Repeat requests are answered with the rendered body, before any serializer runs
+        cache_key, group = self._response_cache_key(request)
+        generation = None
+        if cache_key is not None:
+            cached, generation = ResponseCache.get(cache_key, group)
+            if cached is not None:
+                return self._cached_response(request.query_params['city'].strip(), cached)
+        
         # Validate request parameters
         serializer = WeatherAverageRequestSerializer(data=request.query_params)
         if not serializer.is_valid():
@@ -44,74 +100,346 @@ class WeatherAverageView(APIView):
         days = serializer.validated_data['days']
         
         # Process the request
-        return self._process_weather_request(city, days)
+        return self._process_weather_request(city, days, cache_key, generation)
             
-    def _process_weather_request(self, city, days):
+    def _process_weather_request(self, city, days, cache_key=None, generation=None):
         """
         Process weather request for a city and number of days
         
         Args:
             city (str): City name
             days (int): Number of days
+            cache_key (str, optional): Key to store the rendered response under
+            generation (str, optional): Response cache generation read before the data
             
         Returns:
             Response: Django REST framework response
         """
-        # Get weather data
-        weather_data = WeatherService.get_historical_weather(city, days)
-        
-        # Calculate average temperature
-        avg_temp = WeatherService.calculate_average_temperature(weather_data)
+        CacheWarmingService.record_request(KIND_AVERAGE, city, days)
         
         # Get date range
         start_date, end_date = get_date_range(days)
+        window_days = (end_date - start_date).days + 1
+        
+        # Calculate average temperature, in the database where the data is stored; the
+        # version of the data it was computed from is cached with it
+        summary = WeatherService.get_average_summary(city, days)
+        avg_temp, day_count, last_modified = summary["average"], summary["day_count"], summary["last_modified"]
+        
+        # The window moves at midnight, until then the response only changes with the data
+        max_age = min(HTTP_CACHE_MAX_AGE, seconds_until_tomorrow())
+        etag = self._make_etag(city, days, start_date, day_count, last_modified)
+        not_modified = get_not_modified_response(self.request, etag, last_modified)
+        if not_modified is not None:
+            return set_cache_headers(not_modified, etag, last_modified, max_age)
+        
+        if API_LEAN_SERIALIZATION:
+            response_data = represent_average(city, avg_temp, days, start_date, end_date)
+        else:
+            # Prepare and validate response
+            response_serializer = WeatherAverageResponseSerializer(data={
+                'city': city,
+                'average_temperature': avg_temp,
+                'days': days,
+                'start_date': start_date,
+                'end_date': end_date
+            })
+            response_serializer.is_valid(raise_exception=True)
+            response_data = response_serializer.data
+        
+        if cache_key is not None and day_count == window_days:
+            # The body is stored without the city, which is echoed as each request spells it
+            body = {key: value for key, value in response_data.items() if key != 'city'}
+            ResponseCache.set(cache_key, generation, {
+                'body': self.request.accepted_renderer.render(body),
+                'days': days,
+                'start_date': start_date,
+                'day_count': day_count,
+                'last_modified': last_modified,
+            }, timeout=min(CACHE_TIMEOUT_HOUR, seconds_until_tomorrow()))
+        
+        response = Response(response_data, status=status.HTTP_200_OK)
+        return set_cache_headers(response, etag, last_modified, max_age)
+    
+    def _response_cache_key(self, request):
+        """
+        Build the response cache key of a request from its normalized parameters
+        
+        Args:
+            request (Request): Current request
+            
+        Returns:
+            tuple: (cache_key, group), both None if the response is not cached
+        """
+        # Only compact JSON is cached, other renderings go through the renderers
+        if request.accepted_renderer.format != 'json' or 'indent' in request.accepted_media_type:
+            return None, None
+        
+        city = request.query_params.get('city', '').strip()
+        days = request.query_params.get('days', '')
+        group = normalize_city_name(city)
+        # Parameters the serializer would reject never reach the cache
+        if not group or len(city) > CITY_MAX_LENGTH or '\x00' in city or not days.isdigit():
+            return None, None
+        return f"average_{group}_{int(days)}_{datetime.now().date():%Y%m%d}", group
+    
+    def _cached_response(self, city, cached):
+        """
+        Build the response of a response cache hit
+        
+        Args:
+            city (str): City name as requested
+            cached (dict): Rendered body without the city and the version of its data
+            
+        Returns:
+            HttpResponse: JSON response, or 304 if the client's copy is current
+        """
+        CacheWarmingService.record_request(KIND_AVERAGE, city, cached['days'])
+        
+        etag = self._make_etag(city, cached['days'], cached['start_date'], cached['day_count'], cached['last_modified'])
+        max_age = min(HTTP_CACHE_MAX_AGE, seconds_until_tomorrow())
+        not_modified = get_not_modified_response(self.request, etag, cached['last_modified'])
+        if not_modified is not None:
+            return set_cache_headers(not_modified, etag, cached['last_modified'], max_age)
+        
+        body = b'{"city":' + self.request.accepted_renderer.render(city) + b',' + cached['body'][1:]
+        response = HttpResponse(body, content_type='application/json')
+        return set_cache_headers(response, etag, cached['last_modified'], max_age)
+    
+    def _make_etag(self, city, days, start_date, day_count, last_modified):
+        """
+        Build the ETag of an average response from its parameters and the version of the stored data
+        
+        Args:
+            city (str): City name as requested, it is echoed in the body
+            days (int): Number of days
+            start_date (date): First date of the window
+            day_count (int): Number of stored days in the window
+            last_modified (datetime): When the stored days were last written, or None
+            
+        Returns:
+            str: Quoted ETag
+        """
+        return make_etag(self.request.accepted_renderer.format, city, days, start_date, day_count, last_modified)
+
+class WeatherBatchAverageView(APIView):
+    """
+    API view to get average temperatures for several cities over a specified number of days
+    """
+    
+    @swagger_auto_schema(
+        operation_description="Get average temperatures for a list of cities over a specified number of days",
+        request_body=WeatherBatchAverageRequestSerializer,
+        responses={
+            200: WeatherBatchAverageResponseSerializer,
+            400: "Bad request",
+            500: "Internal server error"
+        }
+    )
+    @handle_api_exception
+    def post(self, request):
+        # Validate request parameters
+        serializer = WeatherBatchAverageRequestSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        cities = serializer.validated_data['cities']
+        days = serializer.validated_data['days']
+        
+        for city in dict.fromkeys(cities):
+            CacheWarmingService.record_request(KIND_HISTORY, city, days)
+        
+        # Get weather data for every city, failures are reported per city
+        weather_data, errors = WeatherService.get_historical_weather_many(cities, days)
+        start_date, end_date = get_date_range(days)
         
-        # Prepare and validate response
-        response_data = {
-            'city': city,
-            'average_temperature': avg_temp,
+        results = [
+            {
+                'city': city,
+                'average_temperature': WeatherService.calculate_average_temperature(weather_data[city]),
+                'days': days,
+                'start_date': start_date,
+                'end_date': end_date
+            }
+            for city in dict.fromkeys(cities) if city in weather_data
+        ]
+        
+        return Response({
             'days': days,
             'start_date': start_date,
-            'end_date': end_date
-        }
+            'end_date': end_date,
+            'results': results,
+            'errors': [{'city': city, 'error': error} for city, error in errors.items()]
+        }, status=status.HTTP_200_OK)
+
+class WeatherDataFilterMixin:
+    """
+    Filters of the weather history, shared by the list and export views
+    """
+    
+    def filter_weather_data(self, queryset):
+        """
+        Filter weather data based on the query parameters of the request
+        
+        Args:
+            queryset (QuerySet): Weather data to filter
+            
+        Returns:
+            QuerySet: Filtered weather data, newest first
+        """
+        # Apply filters if provided
+        city = self.request.query_params.get('city')
+        start_date = self.request.query_params.get('start_date')
+        end_date = self.request.query_params.get('end_date')
+        
+        if city:
+            queryset = self._filter_by_city(queryset, city, self.request.query_params.get('match', 'contains'))
         
-        response_serializer = WeatherAverageResponseSerializer(data=response_data)
-        response_serializer.is_valid(raise_exception=True)
+        if start_date:
+            queryset = queryset.filter(date__gte=start_date)
+        
+        if end_date:
+            queryset = queryset.filter(date__lte=end_date)
+        
+        return queryset.order_by('-date', '-id')
+    
+    @staticmethod
+    def _filter_by_city(queryset, city, match):
+        """
+        Filter on the normalized city name so that every match mode can use an
+        index: the B-tree for exact and prefix matches, the trigram index for
+        substrings and similar names
         
-        return Response(response_serializer.data, status=status.HTTP_200_OK)
+        Args:
+            queryset (QuerySet): Weather data to filter
+            city (str): City name as typed by the user
+            match (str): One of CITY_MATCH_MODES
+            
+        Returns:
+            QuerySet: Filtered weather data
+        """
+        city_norm = normalize_city_name(city)
+        
+        if match == 'exact':
+            return queryset.filter(city_norm=city_norm)
+        if match == 'prefix':
+            return queryset.filter(city_norm__startswith=city_norm)
+        if match == 'contains':
+            return queryset.filter(city_norm__contains=city_norm)
+        if match == 'fuzzy':
+            # Similarity matching needs pg_trgm, other databases fall back to substrings
+            if connection.vendor == 'postgresql':
+                return queryset.filter(city_norm__trigram_similar=city_norm)
+            return queryset.filter(city_norm__contains=city_norm)
+        
+        raise ValidationError({'match': [f"Must be one of: {', '.join(CITY_MATCH_MODES)}."]})
 
-class WeatherDataListView(generics.ListAPIView):
+class WeatherDataListView(WeatherDataFilterMixin, generics.ListAPIView):
     """
-    API view to list historical weather data from the database
+    API view to list historical weather data from the database, newest first
+    and one page at a time
     """
     serializer_class = WeatherDataSerializer
+    pagination_class = KeysetPagination
     
     @swagger_auto_schema(
         operation_description="Get historical weather data for a city",
         manual_parameters=[
             openapi.Parameter('city', openapi.IN_QUERY, description="City name (optional)", type=openapi.TYPE_STRING),
+            openapi.Parameter('match', openapi.IN_QUERY, description="How the city is matched (default: contains)", type=openapi.TYPE_STRING, enum=list(CITY_MATCH_MODES)),
             openapi.Parameter('start_date', openapi.IN_QUERY, description="Start date (YYYY-MM-DD)", type=openapi.TYPE_STRING),
             openapi.Parameter('end_date', openapi.IN_QUERY, description="End date (YYYY-MM-DD)", type=openapi.TYPE_STRING),
+            openapi.Parameter('cursor', openapi.IN_QUERY, description="Cursor of the page, from the next link of the previous page", type=openapi.TYPE_STRING),
+            openapi.Parameter('page_size', openapi.IN_QUERY, description="Number of records per page", type=openapi.TYPE_INTEGER),
         ],
     )
     def get_queryset(self):
         """
         Filter the queryset based on query parameters
         """
-        queryset = WeatherData.objects.all()
+        return self.filter_weather_data(WeatherData.objects.all())
+    
+    def list(self, request, *args, **kwargs):
+        page = self.paginate_queryset(self.filter_queryset(self.get_queryset()))
         
-        # Apply filters if provided
-        city = self.request.query_params.get('city')
-        start_date = self.request.query_params.get('start_date')
-        end_date = self.request.query_params.get('end_date')
+        # Rows get a new timestamp whenever they are written, so the rows of the page
+        # and their timestamps identify the body before anything is serialized
+        last_modified = max((row.timestamp for row in page), default=None)
+        etag = make_etag(
+            request.accepted_renderer.format,
+            request.build_absolute_uri(),
+            *(f"{row.pk}@{row.timestamp.isoformat()}" for row in page)
+        )
+        max_age = HTTP_CACHE_PAST_MAX_AGE if self._covers_past_only() else HTTP_CACHE_MAX_AGE
         
-        if city:
-            queryset = queryset.filter(city__icontains=city)
+        not_modified = get_not_modified_response(request, etag, last_modified)
+        if not_modified is not None:
+            return set_cache_headers(not_modified, etag, last_modified, max_age)
         
-        if start_date:
-            queryset = queryset.filter(date__gte=start_date)
+        if API_LEAN_SERIALIZATION:
+            data = represent_weather_data(page)
+        else:
+            data = self.get_serializer(page, many=True).data
+        return set_cache_headers(self.get_paginated_response(data), etag, last_modified, max_age)
+    
+    def _covers_past_only(self):
+        """
+        Check whether the requested history ends before today, so new data does not change it
         
-        if end_date:
-            queryset = queryset.filter(date__lte=end_date)
+        Returns:
+            bool: True if the end_date filter is a past date
+        """
+        try:
+            return date.fromisoformat(self.request.query_params.get('end_date', '')) < datetime.now().date()
+        except ValueError:
+            return False
+
+class WeatherDataExportView(WeatherDataFilterMixin, APIView):
+    """
+    API view to export historical weather data as a stream, with the filters
+    of the history list
+    """
+    
+    @swagger_auto_schema(
+        operation_description=(
+            "Export historical weather data as CSV or NDJSON, gzip compressed if the client accepts it, "
+            "or as columns in a Parquet file or an Arrow IPC stream"
+        ),
+        manual_parameters=[
+            openapi.Parameter('export_format', openapi.IN_QUERY, description="Export format (default: csv)", type=openapi.TYPE_STRING, enum=list(EXPORT_FORMATS)),
+            openapi.Parameter('city', openapi.IN_QUERY, description="City name (optional)", type=openapi.TYPE_STRING),
+            openapi.Parameter('match', openapi.IN_QUERY, description="How the city is matched (default: contains)", type=openapi.TYPE_STRING, enum=list(CITY_MATCH_MODES)),
+            openapi.Parameter('start_date', openapi.IN_QUERY, description="Start date (YYYY-MM-DD)", type=openapi.TYPE_STRING),
+            openapi.Parameter('end_date', openapi.IN_QUERY, description="End date (YYYY-MM-DD)", type=openapi.TYPE_STRING),
+        ],
+        responses={
+            200: "Exported weather data",
+            400: "Bad request"
+        }
+    )
+    def get(self, request):
+        export_format = request.query_params.get('export_format', 'csv')
+        if export_format not in EXPORT_FORMATS:
+            return Response(
+                {'export_format': [f"Must be one of: {', '.join(EXPORT_FORMATS)}."]},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        encode, content_type, batch_size, compressible = EXPORT_FORMATS[export_format]
+        
+        # Rows are read through a server-side cursor and encoded a chunk at a
+        # time, so memory stays flat however many rows are exported
+        rows = self.filter_weather_data(WeatherData.objects.all()).values_list(
+            *EXPORT_FIELDS
+        ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+        content = encode(EXPORT_FIELDS, rows, batch_size)
+        
+        gzipped = compressible and accepts_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''), 'gzip')
+        if gzipped:
+            content = compress_sequence(content)
         
-        return queryset.order_by('-date')
+        response = StreamingHttpResponse(content, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="weather-history.{export_format}"'
+        if gzipped:
+            response['Content-Encoding'] = 'gzip'
+        patch_vary_headers(response, ('Accept-Encoding',))
+        return response
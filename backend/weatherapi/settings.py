@@ -43,6 +43,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     
     # Third-party apps
     'rest_framework',
@@ -85,14 +86,19 @@ WSGI_APPLICATION = 'weatherapi.wsgi.application'
 
 # ======== REST FRAMEWORK SETTINGS ========
 
+# JSON renderer ("orjson" or "json" for the standard library), and whether the browsable
+# API is served, by default only in development
+API_JSON_RENDERER = os.environ.get('API_JSON_RENDERER', 'orjson')
+API_BROWSABLE = os.environ.get('API_BROWSABLE', str(DEBUG)) == 'True'
+
 REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',
     ],
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
-        'rest_framework.renderers.BrowsableAPIRenderer',
-    ],
+        'weather.renderers.ORJSONRenderer' if API_JSON_RENDERER == 'orjson'
+        else 'rest_framework.renderers.JSONRenderer',
+    ] + (['rest_framework.renderers.BrowsableAPIRenderer'] if API_BROWSABLE else []),
 }
 
 # ======== DATABASE SETTINGS ========